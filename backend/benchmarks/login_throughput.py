@@ -0,0 +1,98 @@
+"""
+Login throughput benchmark for the employee service.
+
+Fires a burst of concurrent /login calls (the 9am rush) against an in-memory database and
+reports throughput, latency percentiles and how many requests were shed with 503.
+
+(run from backend)
+    python -m benchmarks.login_throughput --workers 0 --concurrency 16 --requests 200
+    python -m benchmarks.login_throughput --workers 4 --concurrency 16 --requests 200
+
+--workers 0 hashes inline on the request threads (the old behaviour); N > 0 uses the
+process pool. --method sets the hash cost policy, e.g. "pbkdf2:sha256:600000".
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--max-pending", type=int, default=None)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--method", default=None)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    # the service reads its hashing config at import time
+    os.environ["TESTING"] = "true"
+    os.environ["PASSWORD_HASH_WORKERS"] = str(args.workers)
+    if args.max_pending is not None:
+        os.environ["PASSWORD_HASH_MAX_PENDING"] = str(args.max_pending)
+    if args.method:
+        os.environ["PASSWORD_HASH_METHOD"] = args.method
+
+    from sqlalchemy.pool import StaticPool
+    from employee import employee as service
+
+    app = service.app
+    # one shared in-memory database across the request threads
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"poolclass": StaticPool, "connect_args": {"check_same_thread": False}}
+
+    with app.app_context():
+        service.db.create_all()
+        client = app.test_client()
+        for i in range(args.users):
+            client.post("/register", json={
+                "email": f"bench{i}@example.com",
+                "password": "Password!1",
+                "department": "IT",
+                "employee_name": f"Bench {i}",
+                "role": "staff",
+                "team": "A"
+            })
+
+    def one_login(i):
+        started = time.perf_counter()
+        response = app.test_client().post("/login", json={
+            "email": f"bench{i % args.users}@example.com",
+            "password": "Password!1"
+        })
+        return response.status_code, time.perf_counter() - started
+
+    # warm the pool so process start-up isn't counted
+    one_login(0)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(one_login, range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for status, latency in results if status == 200)
+    shed = sum(1 for status, _ in results if status == 503)
+    failed = sum(1 for status, _ in results if status not in (200, 503))
+
+    print(f"method={service.PASSWORD_HASH_METHOD} workers={service.PASSWORD_HASH_WORKERS} "
+          f"max_pending={service.PASSWORD_HASH_MAX_PENDING} concurrency={args.concurrency}")
+    print(f"requests={args.requests} ok={len(latencies)} shed_503={shed} failed={failed} elapsed={elapsed:.2f}s")
+    print(f"throughput={len(latencies) / elapsed:.1f} logins/s")
+    if latencies:
+        p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) >= 20 else latencies[-1]
+        print(f"latency p50={statistics.median(latencies) * 1000:.1f}ms p95={p95 * 1000:.1f}ms")
+
+    if service._hash_pool is not None:
+        service._hash_pool.shutdown()
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
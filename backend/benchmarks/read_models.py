@@ -0,0 +1,145 @@
+"""
+Read-model benchmark: ORM objects vs plain-row read models on the hot GET paths.
+
+Builds an in-memory company (default 100k tasks, a fifth of them subtasks, two collaborators
+each) and times each path with its Python allocation peak (tracemalloc):
+
+  load   every task as Task objects vs TaskRow read models (no serialisation)
+  team   one team's /tasks fragment: Task.to_dict() per task vs task_tree_dicts()
+  all    every top-level task serialised with its subtasks (the ORM side is one query
+         per task per relationship, so expect it to take minutes at 100k)
+
+(run from backend)
+    python -m benchmarks.read_models
+    python -m benchmarks.read_models --tasks 20000 --scenario load team all
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--staff", type=int, default=500)
+    parser.add_argument("--departments", type=int, default=10)
+    parser.add_argument("--teams", type=int, default=5, help="teams per department")
+    parser.add_argument("--scenario", nargs="+", choices=["load", "team", "all"], default=["load", "team"])
+    parser.add_argument("--seed", type=int, default=1)
+    return parser.parse_args()
+
+
+def measure(label, fn):
+    from models.extensions import db
+
+    db.session.remove()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    tracked = len(db.session.identity_map)
+    print(f"  {label:<12} {elapsed * 1000:10.1f} ms   peak {peak / 2**20:8.1f} MiB   identity map {tracked:>7}")
+    db.session.remove()
+    return result
+
+
+def populate(db, args, rng):
+    from models.staff import Staff
+    from models.task import Task, Task_Collaborators
+
+    staff_rows = []
+    for i in range(args.staff):
+        dept = i % args.departments
+        staff_rows.append({
+            "employee_id": i + 1, "employee_name": f"Bench {i}", "email": f"bench{i}@example.com",
+            "department": f"Dept {dept}", "team": chr(ord("A") + (i // args.departments) % args.teams),
+            "role": "staff", "password": "x"
+        })
+    db.session.execute(Staff.__table__.insert(), staff_rows)
+
+    now = datetime(2025, 1, 1)
+    n_parents = args.tasks - args.tasks // 5
+    task_rows, links = [], []
+    for task_id in range(1, args.tasks + 1):
+        parent_id = None if task_id <= n_parents else rng.randint(1, n_parents)
+        owner = rng.randint(1, args.staff)
+        task_rows.append({
+            "task_id": task_id, "title": f"Task {task_id}", "description": "Benchmark task " * 4,
+            "attachment": "[]", "priority": rng.randint(1, 10), "recurrence": None,
+            "deadline": now + timedelta(days=rng.randint(1, 90)), "created_at": now,
+            "status": rng.choice(["unassigned", "ongoing", "under review", "done"]),
+            "owner": owner, "project_id": None, "parent_id": parent_id
+        })
+        for staff_id in {owner, rng.randint(1, args.staff)}:
+            links.append({"task_id": task_id, "staff_id": staff_id})
+    db.session.execute(Task.__table__.insert(), task_rows)
+    db.session.execute(Task_Collaborators.insert(), links)
+    db.session.commit()
+
+
+def main():
+    args = parse_args()
+    os.environ["TESTING"] = "true"
+
+    from sqlalchemy.pool import StaticPool
+    from tasks import task as service
+    from models.staff import Staff
+    from models.task import Task
+    from models.read_models import task_rows, staff_rows, task_tree_dicts, top_level_task_rows_by_member
+
+    app, db = service.app, service.db
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"poolclass": StaticPool, "connect_args": {"check_same_thread": False}}
+
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        populate(db, args, random.Random(args.seed))
+        print(f"populated {args.tasks} tasks / {args.staff} staff in {time.perf_counter() - started:.1f}s")
+
+        if "load" in args.scenario:
+            print("load: every task")
+            measure("orm", lambda: Task.query.all())
+            measure("read model", lambda: task_rows(Task.query))
+
+        if "team" in args.scenario:
+            print("team: Dept 0 / A fragment")
+
+            def team_members():
+                return Staff.query.filter_by(department="Dept 0", team="A").order_by(Staff.employee_id)
+
+            def orm_team():
+                out = {}
+                for member in team_members().all():
+                    tasks = Task.query.filter(Task.collaborators.any(employee_id=member.employee_id),
+                                              Task.parent_id.is_(None)).order_by(Task.task_id).all()
+                    out[member.employee_name] = [t.to_dict() for t in tasks]
+                return out
+
+            def read_model_team():
+                members = staff_rows(team_members())
+                by_member = top_level_task_rows_by_member([m.employee_id for m in members])
+                rows = {row.task_id: row for member_rows in by_member.values() for row in member_rows}
+                dicts = dict(zip(rows, task_tree_dicts(list(rows.values()))))
+                return {m.employee_name: [dicts[row.task_id] for row in by_member[m.employee_id]] for m in members}
+
+            size = sum(len(v) for v in measure("orm", orm_team).values())
+            measure("read model", read_model_team)
+            print(f"  ({size} member-task entries)")
+
+        if "all" in args.scenario:
+            print("all: every top-level task with subtasks")
+            top_level = lambda: Task.query.filter(Task.parent_id.is_(None)).order_by(Task.task_id)
+            measure("orm", lambda: [t.to_dict() for t in top_level().all()])
+            measure("read model", lambda: task_tree_dicts(task_rows(top_level())))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,4 @@
+from .circuit_breaker import CircuitBreaker, CircuitOpenError, get_breaker, breaker_snapshots, reset_breakers
+from .view_cache import ScopedCache, EVERYTHING
+from .compression import init_compression, compress_response
+from .json_stream import iter_json, json_stream_response, JSONObject, RawJSON
@@ -0,0 +1,160 @@
+"""
+Circuit breakers for calls between services.
+
+One breaker per downstream service, shared by every call site in the process. After
+`failure_threshold` consecutive failures the breaker opens and calls fail fast with
+CircuitOpenError instead of waiting on timeouts. After `reset_timeout` seconds it goes
+half-open and lets a trial call through: success closes it again, failure re-opens it.
+"""
+import os
+import threading
+import time
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+DEFAULT_FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', 5))
+DEFAULT_RESET_TIMEOUT = float(os.getenv('BREAKER_RESET_TIMEOUT', 30))
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of making a call while the breaker is open"""
+
+    def __init__(self, name, retry_in):
+        super().__init__(f"{name} circuit is open (retry in {retry_in:.0f}s)")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+
+    def __init__(self, name, failure_threshold=None, reset_timeout=None, half_open_max_calls=1, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold or DEFAULT_FAILURE_THRESHOLD
+        self.reset_timeout = reset_timeout if reset_timeout is not None else DEFAULT_RESET_TIMEOUT
+        self.half_open_max_calls = half_open_max_calls
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._trial_calls = 0
+        self._rejected = 0
+        self._last_error = None
+
+    def _refresh(self):
+        # caller holds the lock
+        if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._trial_calls = 0
+
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = self._clock()
+
+    @property
+    def state(self):
+        with self._lock:
+            self._refresh()
+            return self._state
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go out now"""
+        with self._lock:
+            self._refresh()
+            if self._state == CLOSED:
+                return
+            if self._state == HALF_OPEN and self._trial_calls < self.half_open_max_calls:
+                self._trial_calls += 1
+                return
+            self._rejected += 1
+            retry_in = 0 if self._state == HALF_OPEN else self.reset_timeout - (self._clock() - self._opened_at)
+            raise CircuitOpenError(self.name, max(retry_in, 0))
+
+    def record_success(self):
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self, error=None):
+        with self._lock:
+            self._last_error = str(error) if error is not None else None
+            if self._state == HALF_OPEN:
+                self._open()
+                return
+            self._failures += 1
+            if self._state == CLOSED and self._failures >= self.failure_threshold:
+                self._open()
+                print(f"[Breaker] {self.name} opened after {self._failures} consecutive failures: {self._last_error}")
+
+    def call(self, fn, *args, **kwargs):
+        """
+        Run fn through the breaker. Exceptions and 5xx responses count as failures; 4xx
+        responses are the caller's problem and count as successes.
+        """
+        self.before_call()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        status = getattr(result, 'status_code', None)
+        if isinstance(status, int) and status >= 500:
+            self.record_failure(f"HTTP {status}")
+        else:
+            self.record_success()
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._opened_at = None
+            self._trial_calls = 0
+            self._rejected = 0
+            self._last_error = None
+
+    def snapshot(self):
+        with self._lock:
+            self._refresh()
+            retry_in = None
+            if self._state == OPEN:
+                retry_in = round(max(self.reset_timeout - (self._clock() - self._opened_at), 0), 1)
+            return {
+                'name': self.name,
+                'state': self._state,
+                'consecutive_failures': self._failures,
+                'failure_threshold': self.failure_threshold,
+                'reset_timeout': self.reset_timeout,
+                'retry_in': retry_in,
+                'rejected_calls': self._rejected,
+                'last_error': self._last_error
+            }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name, **config):
+    """The process-wide breaker for a downstream service, created on first use"""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name, **config)
+        return _breakers[name]
+
+
+def breaker_snapshots():
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return [b.snapshot() for b in sorted(breakers, key=lambda b: b.name)]
+
+
+def reset_breakers():
+    """Close every breaker (tests, or after an operator confirms a dependency is back)"""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    for breaker in breakers:
+        breaker.reset()
@@ -0,0 +1,102 @@
+"""
+Negotiated response compression for the Flask services.
+
+init_compression(app) compresses JSON / text responses with brotli or gzip, whichever the
+client prefers in Accept-Encoding (brotli only when the optional `brotli` package is
+installed). Buffered bodies smaller than COMPRESS_MIN_SIZE bytes are sent as-is; streamed
+bodies are compressed chunk by chunk as they are produced, so they stay streamed.
+"""
+import os
+import zlib
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only without it
+    brotli = None
+
+COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+GZIP_LEVEL = int(os.getenv('COMPRESS_GZIP_LEVEL', 6))
+BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', 5))
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/x-ndjson', 'application/javascript'}
+
+
+def available_encodings():
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def _compressor(encoding):
+    """(compress(chunk), flush()) for one response"""
+    if encoding == 'br':
+        c = brotli.Compressor(quality=BROTLI_QUALITY)
+        return c.process, c.finish
+    # wbits=31: gzip container
+    c = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    return c.compress, c.flush
+
+
+def compress_bytes(data, encoding):
+    compress, flush = _compressor(encoding)
+    return compress(data) + flush()
+
+
+def _compress_stream(chunks, encoding):
+    compress, flush = _compressor(encoding)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            out = compress(chunk)
+            if out:
+                yield out
+        yield flush()
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+def _is_compressible(response):
+    mimetype = response.mimetype or ''
+    return mimetype.startswith('text/') or mimetype in COMPRESSIBLE_MIMETYPES
+
+
+def compress_response(response, accept_encodings, min_size=None):
+    """Compress response in place if the client accepts it and it is worth it; returns response"""
+    min_size = COMPRESS_MIN_SIZE if min_size is None else min_size
+    if (response.status_code < 200 or response.status_code in (204, 206, 304)
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or 'no-transform' in response.headers.get('Cache-Control', '')
+            or not _is_compressible(response)):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = accept_encodings.best_match(available_encodings())
+    if not encoding:
+        return response
+
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+        response.set_data(compress_bytes(data, encoding))
+
+    response.headers['Content-Encoding'] = encoding
+    # the compressed bytes differ, but the representation is the same: keep conditional requests working
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app, min_size=None):
+    from flask import request
+
+    @app.after_request
+    def _compress(response):
+        return compress_response(response, request.accept_encodings, min_size)
+
+    return app
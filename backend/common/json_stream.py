@@ -0,0 +1,76 @@
+"""
+Incremental JSON encoding for large responses.
+
+iter_json(value) yields the JSON text of value in chunks of about CHUNK_SIZE characters.
+Besides plain JSON values it accepts
+  - any iterator / generator, encoded as an array as it is consumed,
+  - JSONObject(pairs), an object whose (key, value) pairs come from an iterable, likewise lazily,
+  - RawJSON(text), text that is already serialised JSON and is copied through as-is,
+so a handler can describe a large document without ever building it in memory.
+"""
+import json
+from collections.abc import Iterator
+
+from flask import Response, stream_with_context
+
+CHUNK_SIZE = 16 * 1024
+
+_encode = json.JSONEncoder(separators=(',', ':')).encode
+
+
+class RawJSON:
+    __slots__ = ('text',)
+
+    def __init__(self, text):
+        self.text = text
+
+
+class JSONObject:
+    __slots__ = ('pairs',)
+
+    def __init__(self, pairs):
+        self.pairs = pairs
+
+
+def _pieces(value):
+    if isinstance(value, RawJSON):
+        yield value.text
+    elif isinstance(value, JSONObject) or isinstance(value, dict):
+        pairs = value.pairs if isinstance(value, JSONObject) else value.items()
+        yield '{'
+        first = True
+        for key, item in pairs:
+            yield ('' if first else ',') + _encode(str(key)) + ':'
+            yield from _pieces(item)
+            first = False
+        yield '}'
+    elif isinstance(value, (Iterator, list, tuple)):
+        yield '['
+        first = True
+        for item in value:
+            if not first:
+                yield ','
+            yield from _pieces(item)
+            first = False
+        yield ']'
+    else:
+        yield _encode(value)
+
+
+def iter_json(value, chunk_size=CHUNK_SIZE):
+    """JSON text of value, in chunks of roughly chunk_size characters"""
+    buffer, size = [], 0
+    for piece in _pieces(value):
+        buffer.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def json_stream_response(value, status=200, headers=None):
+    """Stream value as an application/json response (inside the request context, so lazy parts can query)"""
+    return Response(stream_with_context(iter_json(value)), status=status, headers=headers,
+                    mimetype='application/json')
@@ -0,0 +1,163 @@
+"""
+In-process cache of serialised response fragments, keyed by scope (a team, a department, the company).
+
+Each entry records which task ids and staff ids it was built from, so a committed write only
+drops the entries it could have changed. Writes made by other processes are caught through a shared
+version counter: callers pass its current value to sync() before reading, and the whole cache is
+dropped when it has moved on (advance() accounts for this process's own writes, which it has already
+invalidated precisely). Entries are evicted least-recently-used once the cache holds more than
+`max_entries` entries or `max_bytes` bytes, and expire after `ttl` seconds.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAX_BYTES = int(os.getenv('VIEW_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+DEFAULT_MAX_ENTRIES = int(os.getenv('VIEW_CACHE_MAX_ENTRIES', 1024))
+DEFAULT_TTL = float(os.getenv('VIEW_CACHE_TTL', 30))
+
+# depends_on for entries that any task or staff write can change (e.g. company-wide counts)
+EVERYTHING = None
+
+
+class _Entry:
+    __slots__ = ('value', 'size', 'task_ids', 'staff_ids', 'expires_at')
+
+    def __init__(self, value, size, task_ids, staff_ids, expires_at):
+        self.value = value
+        self.size = size
+        self.task_ids = task_ids
+        self.staff_ids = staff_ids
+        self.expires_at = expires_at
+
+
+class ScopedCache:
+
+    def __init__(self, name, max_bytes=None, max_entries=None, ttl=None, clock=time.monotonic):
+        self.name = name
+        self.max_bytes = max_bytes or DEFAULT_MAX_BYTES
+        self.max_entries = max_entries or DEFAULT_MAX_ENTRIES
+        self.ttl = ttl if ttl is not None else DEFAULT_TTL
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        # bumped by every invalidation, so a build that raced one is not published
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+        # last shared version this cache is known to be current with (None: never synced)
+        self._version = None
+
+    def _drop(self, scope):
+        # caller holds the lock
+        entry = self._entries.pop(scope)
+        self._bytes -= entry.size
+
+    def get(self, scope):
+        with self._lock:
+            entry = self._entries.get(scope)
+            if entry is not None and entry.expires_at <= self._clock():
+                self._drop(scope)
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(scope)
+            self._hits += 1
+            return entry.value
+
+    def get_or_build(self, scope, build, size=len):
+        """
+        Cached value for scope, or build() -> (value, task_ids, staff_ids) on a miss.
+        Pass task_ids=EVERYTHING for a value that any write can change. size(value) is its cost in bytes.
+        Empty values are returned but never stored: they depend on nothing a write could invalidate,
+        and a lookup for any made-up scope would otherwise take an entry.
+        """
+        value = self.get(scope)
+        if value is not None:
+            return value
+        with self._lock:
+            generation = self._generation
+        value, task_ids, staff_ids = build()
+        if value:
+            self._put(scope, value, size(value), task_ids, staff_ids, generation)
+        return value
+
+    def _put(self, scope, value, size, task_ids, staff_ids, generation):
+        if size > self.max_bytes:
+            return
+        entry = _Entry(value, size,
+                       None if task_ids is EVERYTHING else frozenset(task_ids),
+                       frozenset(staff_ids or ()),
+                       self._clock() + self.ttl)
+        with self._lock:
+            if generation != self._generation:
+                return
+            if scope in self._entries:
+                self._drop(scope)
+            self._entries[scope] = entry
+            self._bytes += size
+            while self._bytes > self.max_bytes or len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self._evictions += 1
+
+    def invalidate(self, task_ids=(), staff_ids=()):
+        """Drop every entry built from any of these tasks or staff (and every EVERYTHING entry)"""
+        task_ids = set(task_ids)
+        staff_ids = set(staff_ids)
+        with self._lock:
+            self._generation += 1
+            stale = [scope for scope, entry in self._entries.items()
+                     if entry.task_ids is None or entry.task_ids & task_ids or entry.staff_ids & staff_ids]
+            for scope in stale:
+                self._drop(scope)
+            self._invalidations += len(stale)
+        return len(stale)
+
+    def sync(self, version):
+        """Drop everything if the shared version moved since this cache last saw it"""
+        with self._lock:
+            if version == self._version:
+                return
+            if self._version is not None:
+                self._generation += 1
+                self._invalidations += len(self._entries)
+                self._entries.clear()
+                self._bytes = 0
+            self._version = version
+
+    def advance(self, old, new):
+        """This process bumped the shared version old -> new (and invalidated its own entries)"""
+        with self._lock:
+            if self._version == old:
+                self._version = new
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._invalidations += len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+
+    def snapshot(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'name': self.name,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'version': self._version,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': round(self._hits / lookups, 4) if lookups else None,
+                'evictions': self._evictions,
+                'invalidations': self._invalidations
+            }
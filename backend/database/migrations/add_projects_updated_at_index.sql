@@ -0,0 +1,5 @@
+-- Add the (updated_at, id) index behind the paged project listing to an existing database.
+-- New databases get it from schema.sql.
+
+ALTER TABLE projects
+  ADD INDEX ix_projects_updated_at_id (updated_at, id);
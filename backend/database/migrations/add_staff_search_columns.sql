@@ -0,0 +1,10 @@
+-- Add the staff directory / search columns and indexes to an existing database.
+-- New databases get them from schema.sql.
+
+ALTER TABLE staff
+  ADD COLUMN name_search VARCHAR(100) AS (LOWER(TRIM(employee_name))) STORED,
+  ADD COLUMN email_search VARCHAR(255) AS (LOWER(TRIM(email))) STORED,
+  ADD INDEX ix_staff_department_team (department, team),
+  ADD INDEX ix_staff_team (team),
+  ADD INDEX ix_staff_name_search (name_search, employee_id),
+  ADD INDEX ix_staff_email_search (email_search, employee_id);
@@ -0,0 +1,16 @@
+-- Add task.subtask_count / task.open_subtasks to an existing database and backfill them.
+-- New databases get the columns from schema.sql; the backfill is safe to re-run.
+
+ALTER TABLE task
+  ADD COLUMN subtask_count INT NOT NULL DEFAULT 0 AFTER parent_id,
+  ADD COLUMN open_subtasks INT NOT NULL DEFAULT 0 AFTER subtask_count;
+
+UPDATE task p
+JOIN (
+  SELECT parent_id, COUNT(*) AS subtask_count, SUM(status <> 'done') AS open_subtasks
+  FROM task
+  WHERE parent_id IS NOT NULL
+  GROUP BY parent_id
+) s ON s.parent_id = p.task_id
+SET p.subtask_count = s.subtask_count,
+    p.open_subtasks = s.open_subtasks;
@@ -0,0 +1,15 @@
+-- Add the notification outbox table to an existing database.
+-- New databases get it from schema.sql.
+
+CREATE TABLE IF NOT EXISTS task_outbox (
+  id INT PRIMARY KEY AUTO_INCREMENT,
+  task_id INT DEFAULT NULL,
+  path VARCHAR(255) NOT NULL,
+  payload TEXT DEFAULT NULL,
+  created_at DATETIME NOT NULL,
+  attempts INT NOT NULL DEFAULT 0,
+  next_attempt_at DATETIME DEFAULT NULL,
+  last_error TEXT DEFAULT NULL,
+  INDEX ix_task_outbox_task_id (task_id),
+  INDEX ix_task_outbox_next_attempt_at (next_attempt_at)
+) ENGINE=InnoDB;
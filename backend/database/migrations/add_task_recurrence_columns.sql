@@ -0,0 +1,9 @@
+-- Add the recurrence engine's columns to an existing database.
+-- New databases get them from schema.sql. Recurring tasks already done before the upgrade
+-- are not rescheduled; they get their next occurrence the next time they are marked done.
+
+ALTER TABLE task
+  ADD COLUMN next_recurrence_at DATETIME DEFAULT NULL,
+  ADD COLUMN recurs_from_id INT DEFAULT NULL,
+  ADD INDEX ix_task_next_recurrence_at (next_recurrence_at),
+  ADD INDEX ix_task_recurs_from_id (recurs_from_id);
@@ -0,0 +1,9 @@
+-- Add the cached-view version counters to an existing database.
+-- New databases get them from schema.sql; safe to re-run.
+
+CREATE TABLE IF NOT EXISTS view_versions (
+  name VARCHAR(64) PRIMARY KEY,
+  version BIGINT NOT NULL DEFAULT 0
+) ENGINE=InnoDB;
+
+INSERT IGNORE INTO view_versions (name, version) VALUES ('task-views', 0);
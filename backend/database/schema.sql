@@ -5,6 +5,7 @@ USE SPM;
 -- Drop existing tables (clean slate)
 SET FOREIGN_KEY_CHECKS=0;
 DROP TABLE IF EXISTS comment_attachments;
+DROP TABLE IF EXISTS task_outbox;
 DROP TABLE IF EXISTS comment_mentions;
 DROP TABLE IF EXISTS task_comments;
 DROP TABLE IF EXISTS task_collaborators;
@@ -22,7 +23,13 @@ CREATE TABLE staff (
   department VARCHAR(100) NOT NULL,
   role VARCHAR(50) NOT NULL,
   password VARCHAR(255) NOT NULL,
-  team VARCHAR(100) NOT NULL
+  team VARCHAR(100) NOT NULL,
+  name_search VARCHAR(100) AS (LOWER(TRIM(employee_name))) STORED,
+  email_search VARCHAR(255) AS (LOWER(TRIM(email))) STORED,
+  INDEX ix_staff_department_team (department, team),
+  INDEX ix_staff_team (team),
+  INDEX ix_staff_name_search (name_search, employee_id),
+  INDEX ix_staff_email_search (email_search, employee_id)
 ) ENGINE=InnoDB;
 
 -- Create projects table (FIXED: added proper defaults)
@@ -35,7 +42,8 @@ CREATE TABLE projects (
   tasks_total INT NOT NULL,
   due_date DATETIME DEFAULT NULL,
   updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-  INDEX ix_projects_owner_id (owner_id)
+  INDEX ix_projects_owner_id (owner_id),
+  INDEX ix_projects_updated_at_id (updated_at, id)
 ) ENGINE=InnoDB;
 
 -- Create task table (EXACT match to your current - lowercase 'task')
@@ -54,10 +62,16 @@ CREATE TABLE task (
   owner INT NOT NULL,
   project_id INT DEFAULT NULL,
   parent_id INT DEFAULT NULL,
+  subtask_count INT NOT NULL DEFAULT 0,
+  open_subtasks INT NOT NULL DEFAULT 0,
+  next_recurrence_at DATETIME DEFAULT NULL,
+  recurs_from_id INT DEFAULT NULL,
   INDEX parent_id (parent_id),
   INDEX ix_Task_owner (owner),
   INDEX ix_Task_project_id (project_id),
-  INDEX ix_Task_deadline (deadline)
+  INDEX ix_Task_deadline (deadline),
+  INDEX ix_task_next_recurrence_at (next_recurrence_at),
+  INDEX ix_task_recurs_from_id (recurs_from_id)
 ) ENGINE=InnoDB;
 
 -- Create project_members table (EXACT match)
@@ -98,6 +112,28 @@ CREATE TABLE comment_mentions (
   INDEX ix_comment_mentions_comment_id (comment_id)
 ) ENGINE=InnoDB;
 
+-- Create task_outbox table (notification events staged with the task write, drained by the relay)
+CREATE TABLE task_outbox (
+  id INT PRIMARY KEY AUTO_INCREMENT,
+  task_id INT DEFAULT NULL,
+  path VARCHAR(255) NOT NULL,
+  payload TEXT DEFAULT NULL,
+  created_at DATETIME NOT NULL,
+  attempts INT NOT NULL DEFAULT 0,
+  next_attempt_at DATETIME DEFAULT NULL,
+  last_error TEXT DEFAULT NULL,
+  INDEX ix_task_outbox_task_id (task_id),
+  INDEX ix_task_outbox_next_attempt_at (next_attempt_at)
+) ENGINE=InnoDB;
+
+-- Create view_versions table: one counter per family of cached views, bumped by every write that can change them
+CREATE TABLE view_versions (
+  name VARCHAR(64) PRIMARY KEY,
+  version BIGINT NOT NULL DEFAULT 0
+) ENGINE=InnoDB;
+
+INSERT INTO view_versions (name, version) VALUES ('task-views', 0);
+
 -- Create comment_attachments table (EXACT match)
 CREATE TABLE comment_attachments (
   id INT PRIMARY KEY AUTO_INCREMENT,
@@ -147,6 +147,17 @@ INSERT INTO task (task_id, title, description, attachment, priority, recurrence,
 (65, 'Prepare Monthly Staff Attendance Report', 'Compile attendance summaries and report to HR.', '[]', 6, NULL, NULL, '2025-11-05 10:00:00', NULL, '2025-10-29 11:06:00', 'done', 47, 4, NULL),
 (66, 'Office Layout Update Plan', 'Assist management in drafting new seating arrangement plans.', '[]', 7, NULL, NULL, '2025-11-11 12:00:00', NULL, '2025-10-29 11:07:00', 'under review', 47, 4, NULL);
 
+-- subtask counters for the task rows above (plain SQL inserts bypass the app)
+UPDATE task p
+JOIN (
+  SELECT parent_id, COUNT(*) AS subtask_count, SUM(status <> 'done') AS open_subtasks
+  FROM task
+  WHERE parent_id IS NOT NULL
+  GROUP BY parent_id
+) s ON s.parent_id = p.task_id
+SET p.subtask_count = s.subtask_count,
+    p.open_subtasks = s.open_subtasks;
+
 -- Insert project members (from your current data)
 INSERT INTO project_members (project_id, staff_id) VALUES
 (1, 1), (1, 2),  -- Website Redesign team
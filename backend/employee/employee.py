@@ -1,16 +1,26 @@
-from flask import Flask, request, jsonify, session
+from flask import Flask, Response, request, jsonify, session
 from flask_cors import CORS
-# from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import event, or_, and_
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session
+from werkzeug.security import generate_password_hash, check_password_hash
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+import hashlib
+import json
 import os
+import threading
 
 from models import db, Staff, Task
+from common.compression import init_compression
 
 app = Flask(__name__)
 app.secret_key = "issa_secret_key"
 app.config["SESSION_COOKIE_SAMESITE"] = "None"
 app.config["SESSION_COOKIE_SECURE"] = True  
 
-CORS(app, supports_credentials=True, origins=["http://localhost:5173", "http://localhost:5174"])
+CORS(app, supports_credentials=True, origins=["http://localhost:5173", "http://localhost:5174"],
+     expose_headers=["ETag", "X-Directory-Version"])
+init_compression(app)
 
 # Only use production database if not testing
 if not os.getenv('TESTING'):
@@ -23,6 +33,184 @@ app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'pool_recycle': 299} # do not timeout
 db.init_app(app) # initialise connection to db
 
 
+# ------------------ Directory snapshot ------------------
+# The directory endpoints are read on every ReportsView / task form mount but staff rarely
+# change, so they are answered from an in-process snapshot (one column query) that is only
+# rebuilt after a committed staff insert/update/delete. Each distinct response body is
+# serialised once per snapshot version and served as bytes with a strong ETag.
+
+_directory_lock = threading.Lock()
+_directory = {"version": 0, "snapshot": None}
+
+def invalidate_directory():
+    """Drop the current snapshot; the next directory read rebuilds it under a new version"""
+    with _directory_lock:
+        _directory["version"] += 1
+        _directory["snapshot"] = None
+
+DIRECTORY_FIELDS = ("employee_name", "department", "role", "team")
+
+@event.listens_for(Staff, "after_insert", propagate=True)
+@event.listens_for(Staff, "after_delete", propagate=True)
+def _mark_staff_changed(mapper, connection, target):
+    Session.object_session(target).info["staff_changed"] = True
+
+@event.listens_for(Staff, "after_update", propagate=True)
+def _mark_staff_updated(mapper, connection, target):
+    # password rehashes on login don't change anything the directory shows
+    state = sa_inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in DIRECTORY_FIELDS):
+        Session.object_session(target).info["staff_changed"] = True
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_staff_commit(db_session):
+    # wait for the commit so a concurrent rebuild can't cache uncommitted rows
+    if db_session.info.pop("staff_changed", False):
+        invalidate_directory()
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_staff_changes(db_session):
+    db_session.info.pop("staff_changed", None)
+
+def directory_key(value):
+    # lookups match the way the MySQL collation compares: ignoring case (and padding)
+    return (value or "").strip().casefold()
+
+def build_directory_snapshot(version):
+    rows = db.session.query(
+        Staff.employee_id, Staff.employee_name, Staff.department, Staff.role, Staff.team
+    ).order_by(Staff.employee_id).all()
+
+    employees = []
+    by_department = {}
+    by_team = {}
+    departments = {}
+    for employee_id, name, department, role, team in rows:
+        emp = {
+            "employee_id": employee_id,
+            "employee_name": name,
+            "department": department,
+            "role": role,
+            "team": team
+        }
+        employees.append(emp)
+        by_department.setdefault(directory_key(department), []).append(emp)
+        by_team.setdefault((directory_key(department), directory_key(team)), []).append(emp)
+        if department:
+            # one entry per department, as SELECT DISTINCT returned under that collation
+            departments.setdefault(directory_key(department), department)
+
+    return {
+        "version": version,
+        "employees": employees,
+        "by_department": by_department,
+        "by_team": by_team,
+        "departments": list(departments.values()),
+        "bodies": {}
+    }
+
+def directory_snapshot():
+    with _directory_lock:
+        snapshot = _directory["snapshot"]
+        version = _directory["version"]
+    if snapshot is not None:
+        return snapshot
+
+    snapshot = build_directory_snapshot(version)
+    with _directory_lock:
+        # only publish if nothing was invalidated while we were reading
+        if _directory["version"] == version:
+            _directory["snapshot"] = snapshot
+    return snapshot
+
+def directory_response(key, select):
+    """Serve select(snapshot) as pre-serialised JSON; key must identify the selection"""
+    snapshot = directory_snapshot()
+    data = select(snapshot)
+    if not data:
+        # unknown departments/teams share one "[]" body instead of growing the cache
+        key = ("empty",)
+    cached = snapshot["bodies"].get(key)
+    if cached is None:
+        body = json.dumps(data, separators=(",", ":")).encode()
+        cached = (body, f'{snapshot["version"]}-{hashlib.md5(body).hexdigest()}')
+        snapshot["bodies"][key] = cached
+
+    body, etag = cached
+    response = Response(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Directory-Version"] = str(snapshot["version"])
+    return response.make_conditional(request)
+
+# ------------------ Password hashing ------------------
+# Hashing is deliberately slow, so it runs in a small process pool instead of on the
+# request thread. At most PASSWORD_HASH_MAX_PENDING jobs may be queued or running; beyond
+# that login/register fail fast with 503 + Retry-After rather than piling up workers.
+# PASSWORD_HASH_METHOD is the cost policy (any werkzeug method string); hashes made under
+# an older policy are transparently upgraded on the next successful login.
+
+PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+
+def hash_method_prefix(method):
+    # werkzeug expands short policies ("scrypt", "pbkdf2") to the full string it stores in the hash
+    return generate_password_hash("", method).split("$", 1)[0]
+
+PASSWORD_HASH_PREFIX = hash_method_prefix(PASSWORD_HASH_METHOD)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "0" if os.getenv('TESTING') else str(os.cpu_count() or 2)))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(max(PASSWORD_HASH_WORKERS, 1) * 8)))
+PASSWORD_HASH_TIMEOUT = 10  # seconds a request waits for its hash job
+HASHER_RETRY_AFTER = "1"
+
+class HasherBusy(Exception):
+    """Raised when the hashing queue is full"""
+
+_hash_pool = None
+_hash_pool_lock = threading.Lock()
+_hash_slots = threading.BoundedSemaphore(PASSWORD_HASH_MAX_PENDING)
+
+def hash_pool():
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            _hash_pool = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS)
+        return _hash_pool
+
+def run_hash_job(fn, *args):
+    """Run a werkzeug hash function in the pool (inline when PASSWORD_HASH_WORKERS is 0)"""
+    if not _hash_slots.acquire(blocking=False):
+        raise HasherBusy()
+    if PASSWORD_HASH_WORKERS <= 0:
+        try:
+            return fn(*args)
+        finally:
+            _hash_slots.release()
+    try:
+        future = hash_pool().submit(fn, *args)
+    except Exception:
+        _hash_slots.release()
+        raise
+    # the slot belongs to the job, not the request: a request that times out leaves the job
+    # queued/running in the pool, and it keeps counting against the limit until it finishes
+    future.add_done_callback(lambda _: _hash_slots.release())
+    try:
+        return future.result(timeout=PASSWORD_HASH_TIMEOUT)
+    except FutureTimeoutError:
+        raise HasherBusy()
+
+def hash_password(password):
+    return run_hash_job(generate_password_hash, password, PASSWORD_HASH_METHOD)
+
+def verify_password(pwhash, password):
+    return run_hash_job(check_password_hash, pwhash, password)
+
+def needs_rehash(pwhash):
+    # werkzeug hashes look like "<method>$<salt>$<hash>"
+    return pwhash.split("$", 1)[0] != PASSWORD_HASH_PREFIX
+
+def hasher_busy_response():
+    return {"error": "Too many sign-in requests, please retry shortly"}, 503, {"Retry-After": HASHER_RETRY_AFTER}
+
 @app.route('/register', methods=['POST'])
 def register():
 
@@ -38,14 +226,19 @@ def register():
     if employee:
         return {"error": "Employee already exists"}, 409
 
+    try:
+        password_hash = hash_password(password)
+    except HasherBusy:
+        return hasher_busy_response()
+
     new_employee = Staff(
         email=email,
         employee_name=name,
         department=department,
         role=role,
-        team=team
+        team=team,
+        password=password_hash
     )
-    new_employee.set_password(password)
 
     db.session.add(new_employee)
     db.session.commit()
@@ -61,13 +254,17 @@ def create_fake_user():
         role="staff",
         team="Development"
     )
-    fake_user.set_password("password123")
-    
+
     # Check if user already exists
     existing = Staff.query.filter_by(email="zhengruichew@gmail.com").first()
     if existing:
         return {"message": "Fake user already exists", "employee_id": existing.employee_id}, 200
-    
+
+    try:
+        fake_user.password = hash_password("password123")
+    except HasherBusy:
+        return hasher_busy_response()
+
     db.session.add(fake_user)
     db.session.commit()
     return {"message": "Fake user created", "employee_id": fake_user.employee_id}, 201
@@ -84,9 +281,19 @@ def login():
 
     if not employee:
         return {"error": "Employee does not exist"}, 404
-    if not employee.check_password(password):
+    try:
+        password_ok = verify_password(employee.password, password)
+    except HasherBusy:
+        return hasher_busy_response()
+    if not password_ok:
         return {"error": "Incorrect password"}, 401
-    
+    if needs_rehash(employee.password):
+        try:
+            employee.password = hash_password(password)
+            db.session.commit()
+        except HasherBusy:
+            pass  # keep the old hash, it gets upgraded on a later login
+
     session['employee_id'] = employee.employee_id
     session['role'] = employee.role
     session['team'] = employee.team
@@ -114,43 +321,95 @@ def reset():
 @app.route('/employees/<department>', methods=['GET'])
 def get_employees_by_department(department):
     # used for create task - collaborators are employees in the same department
-    employees = Staff.query.filter_by(department=department).all()
-    result = []
-    for emp in employees:
-        emp_data = {
-            "employee_id": emp.employee_id,
-            "employee_name": emp.employee_name,
-            # "email": emp.email,
-            "department": emp.department,
-            "role": emp.role,
-            "team": emp.team
-        } # frontend asked for id and name, dept, role and team returned jic
-        result.append(emp_data)
-    return jsonify(result), 200
+    # frontend asked for id and name, dept, role and team returned jic
+    key = directory_key(department)
+    return directory_response(("department", key), lambda snapshot: snapshot["by_department"].get(key, []))
 
 @app.route('/employees/all', methods=['GET'])
 def get_all_employees():
     # used for HR and Senior Manager - can see all employees
-    employees = Staff.query.all()
-    result = []
-    for emp in employees:
-        emp_data = {
-            "employee_id": emp.employee_id,
-            "employee_name": emp.employee_name,
-            "department": emp.department,
-            "role": emp.role,
-            "team": emp.team
-        }
-        result.append(emp_data)
-    return jsonify(result), 200
+    return directory_response(("all",), lambda snapshot: snapshot["employees"])
 
 @app.route('/departments', methods=['GET'])
 def get_all_departments():
     # used for HR and Senior Manager - get all unique departments
-    departments = db.session.query(Staff.department).distinct().all()
-    result = [dept[0] for dept in departments if dept[0]]  # Filter out None values
-    return jsonify(result), 200
+    return directory_response(("departments",), lambda snapshot: snapshot["departments"])
+
+
+DEFAULT_SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 100
+
+def normalise_search_text(value):
+    # same normalisation as the name_search / email_search columns (lower + trim); inner spaces are kept
+    return (value or "").strip().lower()
 
+def escape_like(value):
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def encode_search_cursor(name_search, employee_id):
+    return f"{employee_id}_{name_search}"
+
+def decode_search_cursor(cursor):
+    employee_id, _, name_search = cursor.partition("_")
+    return name_search, int(employee_id)
+
+@app.route('/employees/search', methods=['GET'])
+def search_employees():
+    """
+    Collaborator picker search: ?q=&department=&team=&limit=&cursor=
+    q is a prefix of the (normalised) name or email; results are ordered by name and
+    keyset-paginated - pass next_cursor back as ?cursor= for the following page
+    """
+    q = normalise_search_text(request.args.get('q'))
+    department = (request.args.get('department') or "").strip()
+    team = (request.args.get('team') or "").strip()
+    limit = request.args.get('limit', DEFAULT_SEARCH_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, MAX_SEARCH_PAGE_SIZE))
+
+    query = db.session.query(
+        Staff.employee_id, Staff.employee_name, Staff.department, Staff.role, Staff.team, Staff.name_search
+    )
+    if q:
+        pattern = escape_like(q) + "%"
+        query = query.filter(or_(
+            Staff.name_search.like(pattern, escape="\\"),
+            Staff.email_search.like(pattern, escape="\\")
+        ))
+    if department:
+        query = query.filter(Staff.department == department)
+    if team:
+        query = query.filter(Staff.team == team)
+
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            cursor_name, cursor_id = decode_search_cursor(cursor)
+        except ValueError:
+            return {"error": "Invalid cursor"}, 400
+        query = query.filter(or_(
+            Staff.name_search > cursor_name,
+            and_(Staff.name_search == cursor_name, Staff.employee_id > cursor_id)
+        ))
+
+    rows = query.order_by(Staff.name_search, Staff.employee_id).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_search_cursor(rows[-1].name_search, rows[-1].employee_id)
+
+    return jsonify({
+        "employees": [
+            {
+                "employee_id": row.employee_id,
+                "employee_name": row.employee_name,
+                "department": row.department,
+                "role": row.role,
+                "team": row.team
+            }
+            for row in rows
+        ],
+        "next_cursor": next_cursor
+    }), 200
 
 @app.route('/employee/<int:project_id>', methods=['GET'])
 def get_employees_by_project(project_id):
@@ -172,28 +431,22 @@ def get_employees_by_project(project_id):
 @app.route('/employees/department/<department>/team/<team>', methods=['GET'])
 def get_employees_by_department_and_team(department, team):
     """Return all employees in the same department and team (case-insensitive)."""
-    department = (department or "").strip()
-    team = (team or "").strip()
+    team_key = (directory_key(department), directory_key(team))
+    return directory_response(("team",) + team_key, lambda snapshot: snapshot["by_team"].get(team_key, []))
 
-    employees = Staff.query.filter(
-        Staff.department.ilike(department),
-        Staff.team.ilike(team)
-    ).all()
-
-    result = [
-        {
-            "employee_id": emp.employee_id,
-            "employee_name": emp.employee_name,
-            "department": emp.department,
-            "role": emp.role,
-            "team": emp.team,
-        }
-        for emp in employees
-    ]
+# ------------------ Internal API for Other Services ------------------
 
-    return jsonify(result), 200
+MAX_BULK_LOOKUP = 1000  # ids per /api/internal/employees call
 
-# ------------------ Internal API for Other Services ------------------
+def internal_employee_dict(employee):
+    return {
+        'employee_id': employee.employee_id,
+        'employee_name': employee.employee_name,
+        'email': employee.email,
+        'department': employee.department,
+        'role': employee.role,
+        'team': employee.team
+    }
 
 @app.route('/api/internal/employee/<int:employee_id>', methods=['GET'])
 def get_employee_internal(employee_id):
@@ -206,16 +459,37 @@ def get_employee_internal(employee_id):
     if not employee:
         return jsonify({'error': 'Employee not found'}), 404
     
+    return jsonify(internal_employee_dict(employee)), 200
+
+@app.route('/api/internal/employees', methods=['GET', 'POST'])
+def get_employees_internal():
+    """
+    Bulk version of /api/internal/employee/<id> - one query for many staff
+    GET ?ids=1,2,3 for small sets, POST {"ids": [...]} when the list is too long for a URL
+    Unknown ids are listed under "missing" instead of failing the whole call
+    """
+    if request.method == 'POST':
+        ids = (request.get_json(silent=True) or {}).get('ids')
+        if not isinstance(ids, list):
+            return jsonify({'error': 'ids must be a list'}), 400
+    else:
+        ids = [part for part in request.args.get('ids', '').split(',') if part.strip()]
+
+    try:
+        ids = {int(i) for i in ids}
+    except (TypeError, ValueError):
+        return jsonify({'error': 'ids must be integers'}), 400
+    if len(ids) > MAX_BULK_LOOKUP:
+        return jsonify({'error': f'at most {MAX_BULK_LOOKUP} ids per request'}), 400
+
+    employees = Staff.query.filter(Staff.employee_id.in_(ids)).all() if ids else []
+    found = {emp.employee_id for emp in employees}
+
     return jsonify({
-        'employee_id': employee.employee_id,
-        'employee_name': employee.employee_name,
-        'email': employee.email,
-        'department': employee.department,
-        'role': employee.role,
-        'team': employee.team
+        'employees': [internal_employee_dict(emp) for emp in employees],
+        'missing': sorted(ids - found)
     }), 200
 
-
 if __name__ == "__main__":
     with app.app_context():
         db.create_all()
@@ -4,4 +4,6 @@ from .extensions import db
 from .project import Project
 from .comment import Comment
 from .comment_mention import CommentMention
-from .comment_attachment import CommentAttachment
\ No newline at end of file
+from .comment_attachment import CommentAttachment
+from .outbox import OutboxEvent
+from .view_version import ViewVersion
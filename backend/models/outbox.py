@@ -0,0 +1,22 @@
+from datetime import datetime
+
+from models.extensions import db
+
+
+class OutboxEvent(db.Model):
+    """
+    A notification-service call staged in the same transaction as the task change that caused it.
+    The task service's relay worker POSTs `payload` to `path` and deletes the row once delivered;
+    events with the same task_id are delivered in id order.
+    """
+    __tablename__ = 'task_outbox'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    task_id = db.Column(db.Integer, nullable=True, index=True)  # ordering key; None for service-wide events
+    path = db.Column(db.String(255), nullable=False)
+    payload = db.Column(db.Text, nullable=True)  # JSON body
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    # None once the event has given up (kept for inspection, no longer retried)
+    next_attempt_at = db.Column(db.DateTime, nullable=True, default=datetime.now, index=True)
+    last_error = db.Column(db.Text, nullable=True)
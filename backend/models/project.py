@@ -1,4 +1,5 @@
 from models.extensions import db
+from models.staff import Staff
 from datetime import datetime
 
 project_members = db.Table(
@@ -8,6 +9,22 @@ project_members = db.Table(
     mysql_engine="InnoDB"
 )
 
+def project_dict(project, members):
+    """The API shape of a project; project is a Project or a read_models.ProjectRow, members [(employee_id, employee_name)]"""
+    return {
+        "id": project.id,
+        "name": project.name,
+        "owner": project.owner,
+        "ownerId": project.owner_id,
+        # "status": project.status,
+        "tasksDone": project.tasks_done,
+        "tasksTotal": project.tasks_total,
+        "dueDate": (project.due_date.isoformat(timespec="milliseconds") + "Z") if project.due_date else None,
+        "updatedAt": project.updated_at.isoformat(timespec="milliseconds") + "Z",
+        "memberIds": [employee_id for employee_id, _ in members],
+        "memberNames": [employee_name for _, employee_name in members],
+    }
+
 class Project(db.Model):
     __tablename__ = 'projects'
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
@@ -24,20 +41,34 @@ class Project(db.Model):
 
     members = db.relationship('Staff', secondary=project_members, lazy='dynamic')
 
-    def to_dict(self):
-        member_objs = self.members.all()
-        member_ids = [m.employee_id for m in member_objs]
-        member_names = [m.employee_name for m in member_objs]
-        return {
-            "id": self.id,
-            "name": self.name,
-            "owner": self.owner,
-            "ownerId": self.owner_id,
-            # "status": self.status,
-            "tasksDone": self.tasks_done,
-            "tasksTotal": self.tasks_total,
-            "dueDate": (self.due_date.isoformat(timespec="milliseconds") + "Z") if self.due_date else None,
-            "updatedAt": self.updated_at.isoformat(timespec="milliseconds") + "Z",
-            "memberIds": member_ids,
-            "memberNames": member_names,
-        }
\ No newline at end of file
+    # listing order is updated_at desc, id desc (keyset pagination in list_projects)
+    __table_args__ = (
+        db.Index('ix_projects_updated_at_id', 'updated_at', 'id'),
+    )
+
+    @staticmethod
+    def members_by_project(project_ids):
+        """{project_id: [(employee_id, employee_name), ...]} for many projects in one query"""
+        result = {pid: [] for pid in project_ids}
+        if not project_ids:
+            return result
+        rows = (db.session.query(project_members.c.project_id, Staff.employee_id, Staff.employee_name)
+                .join(Staff, Staff.employee_id == project_members.c.staff_id)
+                .filter(project_members.c.project_id.in_(project_ids))
+                .order_by(project_members.c.project_id, Staff.employee_id)
+                .all())
+        for pid, employee_id, employee_name in rows:
+            result[pid].append((employee_id, employee_name))
+        return result
+
+    @classmethod
+    def bulk_to_dict(cls, projects):
+        """Serialize a list of projects with a single member query instead of one per project"""
+        members = cls.members_by_project([p.id for p in projects])
+        return [p.to_dict(members=members[p.id]) for p in projects]
+
+    def to_dict(self, members=None):
+        # members: optional preloaded [(employee_id, employee_name)], see bulk_to_dict
+        if members is None:
+            members = [(m.employee_id, m.employee_name) for m in self.members.all()]
+        return project_dict(self, members)
\ No newline at end of file
@@ -0,0 +1,135 @@
+"""
+Read models for the hot GET paths.
+
+Plain column selects into frozen __slots__ dataclasses: no identity map, no change tracking,
+no dynamic relationships. Use them where a handler only turns rows into response dicts;
+anything that writes should keep using the ORM models. The dict shapes are shared with
+Task.to_dict / Project.to_dict (task_dict / project_dict), so both paths serialise identically.
+"""
+from dataclasses import dataclass, fields
+from datetime import datetime
+
+from models.extensions import db
+from models.project import Project, project_dict
+from models.staff import Staff
+from models.task import Task, Task_Collaborators, task_dict
+
+
+@dataclass(slots=True, frozen=True)
+class TaskRow:
+    task_id: int
+    title: str
+    description: str
+    attachment: str | None
+    priority: int | None
+    recurrence: int | None
+    start_date: datetime | None
+    deadline: datetime | None
+    completed_date: datetime | None
+    created_at: datetime
+    status: str
+    owner: int
+    project_id: int | None
+    parent_id: int | None
+    subtask_count: int
+    open_subtasks: int
+
+
+@dataclass(slots=True, frozen=True)
+class StaffRow:
+    employee_id: int
+    employee_name: str
+    department: str
+    role: str
+    team: str
+
+
+@dataclass(slots=True, frozen=True)
+class ProjectRow:
+    id: int
+    name: str
+    owner: str | None
+    owner_id: int | None
+    tasks_done: int
+    tasks_total: int
+    due_date: datetime | None
+    updated_at: datetime
+
+
+def _columns(row_type, model):
+    return tuple(getattr(model, f.name) for f in fields(row_type))
+
+TASK_COLUMNS = _columns(TaskRow, Task)
+STAFF_COLUMNS = _columns(StaffRow, Staff)
+PROJECT_COLUMNS = _columns(ProjectRow, Project)
+
+
+def task_rows(query):
+    """[TaskRow] for a Task query (its filters and ordering are kept, the entities replaced)"""
+    return [TaskRow(*row) for row in query.with_entities(*TASK_COLUMNS)]
+
+def staff_rows(query):
+    return [StaffRow(*row) for row in query.with_entities(*STAFF_COLUMNS)]
+
+def project_rows(query):
+    return [ProjectRow(*row) for row in query.with_entities(*PROJECT_COLUMNS)]
+
+
+def collaborator_ids_by_task(task_ids):
+    """{task_id: [staff_id, ...]} for many tasks in one query on task_collaborators"""
+    result = {tid: [] for tid in task_ids}
+    if not result:
+        return result
+    rows = (db.session.query(Task_Collaborators.c.task_id, Task_Collaborators.c.staff_id)
+            .filter(Task_Collaborators.c.task_id.in_(list(result)))
+            .order_by(Task_Collaborators.c.task_id, Task_Collaborators.c.staff_id)
+            .all())
+    for task_id, staff_id in rows:
+        result[task_id].append(staff_id)
+    return result
+
+
+def top_level_task_rows_by_member(member_ids):
+    """{staff_id: [TaskRow, ...]} of the top-level tasks each employee collaborates on, in one query"""
+    result = {mid: [] for mid in member_ids}
+    if not result:
+        return result
+    rows = (db.session.query(Task_Collaborators.c.staff_id, *TASK_COLUMNS)
+            .join(Task, Task.task_id == Task_Collaborators.c.task_id)
+            .filter(Task_Collaborators.c.staff_id.in_(list(result)), Task.parent_id.is_(None))
+            .order_by(Task_Collaborators.c.staff_id, Task.task_id)
+            .all())
+    for staff_id, *columns in rows:
+        result[staff_id].append(TaskRow(*columns))
+    return result
+
+
+def task_tree_dicts(rows):
+    """
+    Task.to_dict() for every TaskRow in rows, subtasks nested, without the per-task queries:
+    one select per level of subtasks plus one for all collaborator links. Tasks whose subtask_count
+    is 0 are not looked up.
+    """
+    children = {}
+    seen = {row.task_id for row in rows}
+    level = [row.task_id for row in rows if row.subtask_count]
+    while level:
+        subtasks = task_rows(Task.query.filter(Task.parent_id.in_(level)).order_by(Task.task_id))
+        for sub in subtasks:
+            children.setdefault(sub.parent_id, []).append(sub)
+        level = [sub.task_id for sub in subtasks if sub.subtask_count and sub.task_id not in seen]
+        seen.update(level)
+
+    all_ids = {row.task_id for row in rows} | {sub.task_id for subs in children.values() for sub in subs}
+    collaborators = collaborator_ids_by_task(all_ids)
+
+    def to_dict(row):
+        return task_dict(row, collaborators[row.task_id], [to_dict(sub) for sub in children.get(row.task_id, [])])
+
+    return [to_dict(row) for row in rows]
+
+
+def project_list_dicts(rows):
+    """project_dict for every ProjectRow, members in one query"""
+    members = Project.members_by_project([p.id for p in rows])
+    return [project_dict(p, members[p.id]) for p in rows]
@@ -10,6 +10,16 @@ class Staff(db.Model):
     role = db.Column(db.String(50), nullable=False) # 'staff', 'manager', 'director'
     password = db.Column(db.String(255), nullable=False)
     team = db.Column(db.String(100), nullable=False)
+    # lower-cased copies kept by the database itself, indexed for /employees/search prefix lookups
+    name_search = db.Column(db.String(100), db.Computed("lower(trim(employee_name))", persisted=True))
+    email_search = db.Column(db.String(255), db.Computed("lower(trim(email))", persisted=True))
+
+    __table_args__ = (
+        db.Index('ix_staff_department_team', 'department', 'team'),
+        db.Index('ix_staff_team', 'team'),
+        db.Index('ix_staff_name_search', 'name_search', 'employee_id'),
+        db.Index('ix_staff_email_search', 'email_search', 'employee_id'),
+    )
 
     __mapper_args__ = {
         "polymorphic_on": role,
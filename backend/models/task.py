@@ -1,5 +1,7 @@
 from models.extensions import db
 from datetime import datetime, timezone
+from sqlalchemy import bindparam, event, inspect, select
+from sqlalchemy.orm import Session
 
 def return_datetime(dt_naive_utc: datetime):
     """
@@ -11,6 +13,29 @@ def return_datetime(dt_naive_utc: datetime):
     return dt_naive_utc.replace(microsecond=0)\
         .replace(tzinfo=timezone.utc).isoformat().replace("+00:00", "Z")
 
+def task_dict(task, collaborators, subtasks):
+    """The API shape of a task; task is a Task or a read_models.TaskRow"""
+    return {
+        "task_id": task.task_id,
+        "title": task.title,
+        "description": task.description,
+        "attachment": task.attachment,
+        "deadline": return_datetime(task.deadline),
+        "status": task.status,
+        "owner": task.owner,
+        "project_id": task.project_id,
+        "parent_id": task.parent_id,
+        "subtask_count": task.subtask_count,
+        "open_subtasks": task.open_subtasks,
+        "priority": task.priority,
+        "collaborators": collaborators,
+        "subtasks": subtasks,
+        "start_date": return_datetime(task.start_date) if task.start_date else None,
+        "completed_date": return_datetime(task.completed_date) if task.completed_date else None,
+        "created_at": return_datetime(task.created_at),
+        "recurrence": task.recurrence
+    }
+
 Task_Collaborators = db.Table(
     'task_collaborators',
     db.Column('task_id', db.Integer, db.ForeignKey('task.task_id', ondelete='CASCADE'), primary_key=True),
@@ -41,6 +66,16 @@ class Task(db.Model):
 
     # self-referential unary relationship for one-level subtasks
     parent_id      = db.Column(db.Integer, db.ForeignKey('task.task_id', ondelete='CASCADE'), nullable=True)
+    # subtask totals, so a progress bar never has to load the subtasks. ORM writes keep them with relative
+    # updates in the flush hook below; bulk / core writes through the session apply the same deltas.
+    # Rows that predate the columns are backfilled by database/migrations/add_subtask_counters.sql.
+    subtask_count  = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    open_subtasks  = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    # recurrence engine: when the next occurrence is due (set when a recurring task is done, cleared once
+    # the occurrence exists), and on each occurrence, the task it was generated from
+    next_recurrence_at = db.Column(db.DateTime, nullable=True, index=True)
+    recurs_from_id     = db.Column(db.Integer, db.ForeignKey('task.task_id', ondelete='SET NULL'), nullable=True, index=True)
 
     # relationship wiring: parent <-> subtasks
     parent   = db.relationship('Task',
@@ -94,23 +129,131 @@ class Task(db.Model):
 
     def to_dict(self):
         # print(self.subtasks.all())
-        return {
-            "task_id": self.task_id,
-            "title": self.title,
-            "description": self.description,
-            "attachment": self.attachment,
-            "deadline": return_datetime(self.deadline),
-            "status": self.status,
-            "owner": self.owner,
-            "project_id": self.project_id,
-            "parent_id": self.parent_id,
-            "priority": self.priority,
-            "collaborators": [collaborator.employee_id for collaborator in self.collaborators],
-            "subtasks": [subtask.to_dict() for subtask in self.subtasks.all()],
-            "start_date": return_datetime(self.start_date) if self.start_date else None,
-            "completed_date": return_datetime(self.completed_date) if self.completed_date else None,
-            "created_at": return_datetime(self.created_at),
-            "recurrence": self.recurrence
-        }
+        return task_dict(
+            self,
+            [collaborator.employee_id for collaborator in self.collaborators],
+            [subtask.to_dict() for subtask in self.subtasks.all()]
+        )
+
+
+def _apply_subtask_deltas(db_session, deltas):
+    """Add {parent_id: [subtask_count delta, open_subtasks delta]} to the parent rows"""
+    rows = [{'b_parent': pid, 'b_count': count, 'b_open': open_}
+            for pid, (count, open_) in deltas.items() if count or open_]
+    if not rows:
+        return
+    table = Task.__table__
+    # relative updates, so concurrent transactions touching the same parent don't lose counts
+    db_session.connection().execute(
+        table.update().where(table.c.task_id == bindparam('b_parent')).values(
+            subtask_count=table.c.subtask_count + bindparam('b_count'),
+            open_subtasks=table.c.open_subtasks + bindparam('b_open')),
+        rows)
+    db_session.info.setdefault("subtask_counters_stale", set()).update(row['b_parent'] for row in rows)
+
+def _before(history, current):
+    return history.deleted[0] if history.deleted else current
+
+@event.listens_for(Session, "after_flush")
+def _update_subtask_counters(db_session, flush_context):
+    # {parent_id: [subtask_count delta, open_subtasks delta]} from the subtasks written in this flush
+    deltas = {}
+
+    def add(parent_id, status, sign):
+        if parent_id is not None:
+            delta = deltas.setdefault(parent_id, [0, 0])
+            delta[0] += sign
+            delta[1] += sign * (status != 'done')
+
+    for obj in db_session.new:
+        if isinstance(obj, Task):
+            add(obj.parent_id, obj.status, 1)
+    for obj in list(db_session.dirty) + list(db_session.deleted):
+        if not isinstance(obj, Task):
+            continue
+        attrs = inspect(obj).attrs
+        parent_history, status_history = attrs.parent_id.history, attrs.status.history
+        if obj in db_session.deleted:
+            add(_before(parent_history, obj.parent_id), _before(status_history, obj.status), -1)
+        elif parent_history.has_changes() or status_history.has_changes():
+            add(_before(parent_history, obj.parent_id), _before(status_history, obj.status), -1)
+            add(obj.parent_id, obj.status, 1)
+
+    _apply_subtask_deltas(db_session, deltas)
+
+@event.listens_for(Session, "after_flush_postexec")
+def _expire_subtask_counters(db_session, flush_context):
+    # loaded parents still hold the old counts; reload them on next access
+    for pid in db_session.info.pop("subtask_counters_stale", ()):
+        parent = db_session.identity_map.get(Session.identity_key(Task, pid))
+        if parent is not None:
+            db_session.expire(parent, ['subtask_count', 'open_subtasks'])
+
+# a statement that sets none of these can't change any parent's counts
+_COUNTED_COLUMNS = {'parent_id', 'status'}
+
+def _sets_counted_columns(statement, params):
+    values = dict(getattr(statement, '_values', None) or {})
+    values.update(getattr(statement, '_ordered_values', None) or ())
+    names = {getattr(key, 'key', key) for key in values}
+    # without .values(), an UPDATE sets the columns named by its parameters
+    for row in (params if isinstance(params, list) else [params or {}]):
+        names.update(row)
+    return bool(names & _COUNTED_COLUMNS)
+
+@event.listens_for(Session, "do_orm_execute")
+def _count_bulk_subtask_writes(orm_execute_state):
+    # Query.update / delete and core statements on the task table skip the flush hook. Inserts and
+    # deletes, and updates that set parent_id or status, apply the same relative deltas to the parents,
+    # worked out from the touched rows as they were before and after the write (read FOR UPDATE)
+    state = orm_execute_state
+    statement = state.statement
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return None
+    if state.bind_mapper is not Task.__mapper__ and getattr(statement, 'table', None) is not Task.__table__:
+        return None
+    params = state.parameters
+    if state.is_update and not _sets_counted_columns(statement, params):
+        return None
+    db_session, table = state.session, Task.__table__
+    connection = db_session.connection()
+    deltas = {}
+
+    def add(parent_id, status, sign):
+        if parent_id is not None:
+            delta = deltas.setdefault(parent_id, [0, 0])
+            delta[0] += sign
+            delta[1] += sign * (status != 'done')
 
+    if state.is_insert:
+        result = state.invoke_statement()
+        rows = params if isinstance(params, list) else [params or statement.compile().params]
+        for row in rows:
+            add(row.get('parent_id'), row.get('status'), 1)
+    else:
+        touched = select(table.c.task_id, table.c.parent_id, table.c.status).with_for_update()
+        if statement.whereclause is not None:
+            touched = touched.where(statement.whereclause)
+        elif isinstance(params, list):
+            # ORM bulk UPDATE by primary key: the rows are the ones named in the parameters
+            touched = touched.where(table.c.task_id.in_([row['task_id'] for row in params]))
+            params = None
+        before = {}
+        # an executemany carries its criteria per parameter set
+        for row_params in (params if isinstance(params, list) else [params or {}]):
+            before.update((tid, (pid, status)) for tid, pid, status in connection.execute(touched, row_params))
+        result = state.invoke_statement()
+        for pid, status in before.values():
+            add(pid, status, -1)
+        if state.is_update and before:
+            for _, pid, status in connection.execute(
+                    select(table.c.task_id, table.c.parent_id, table.c.status)
+                    .where(table.c.task_id.in_(list(before)))):
+                add(pid, status, 1)
 
+    _apply_subtask_deltas(db_session, deltas)
+    for pid in db_session.info.pop("subtask_counters_stale", ()):
+        parent = db_session.identity_map.get(Session.identity_key(Task, pid))
+        if parent is not None:
+            db_session.expire(parent, ['subtask_count', 'open_subtasks'])
+    return result
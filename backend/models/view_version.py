@@ -0,0 +1,70 @@
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from models.extensions import db
+from models.staff import Staff
+from models.task import Task
+
+# the family of cached task views (team fragments, company summary) kept by the task service
+TASK_VIEWS = 'task-views'
+
+# staff columns that appear in task views; a password rehash on login doesn't count
+_STAFF_VIEW_FIELDS = ('employee_name', 'department', 'team', 'role')
+
+
+class ViewVersion(db.Model):
+    """
+    A counter per family of cached views, bumped in the same transaction as any write that can change
+    them - from any service or worker. A process caching those views compares its last-seen version on
+    each read, so a write made elsewhere invalidates its cache straight away instead of after a TTL.
+    """
+    __tablename__ = 'view_versions'
+
+    name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+def current_view_version(name):
+    return db.session.execute(select(ViewVersion.version).where(ViewVersion.name == name)).scalar() or 0
+
+def mark_view_write(db_session, name=TASK_VIEWS):
+    """Bump the version of `name` when this transaction commits (for writes the flush hook can't see)"""
+    db_session.info.setdefault("view_versions_pending", set()).add(name)
+
+def _bump(db_session, name):
+    """Increment the counter inside the current transaction; returns (old, new)"""
+    connection = db_session.connection()
+    table = ViewVersion.__table__
+    if connection.execute(table.update().where(table.c.name == name)
+                          .values(version=table.c.version + 1)).rowcount == 0:
+        connection.execute(table.insert().values(name=name, version=1))
+    # the row stays locked until commit, so this is exactly our increment
+    new = connection.execute(select(table.c.version).where(table.c.name == name)).scalar()
+    return new - 1, new
+
+@event.listens_for(Session, "after_flush")
+def _collect_view_writes(db_session, flush_context):
+    for obj in list(db_session.new) + list(db_session.dirty) + list(db_session.deleted):
+        if isinstance(obj, Task):
+            mark_view_write(db_session)
+            return
+        if isinstance(obj, Staff):
+            state = inspect(obj)
+            if obj not in db_session.dirty or any(state.attrs[f].history.has_changes() for f in _STAFF_VIEW_FIELDS):
+                mark_view_write(db_session)
+                return
+
+@event.listens_for(Session, "before_commit")
+def _bump_view_versions(db_session):
+    db_session.info.pop("view_versions_bumped", None)
+    # before_commit runs ahead of commit's own flush: flush now so its writes are counted
+    db_session.flush()
+    pending = db_session.info.pop("view_versions_pending", None)
+    if pending:
+        # read back in after_commit by the process that caches the views
+        db_session.info["view_versions_bumped"] = {name: _bump(db_session, name) for name in sorted(pending)}
+
+@event.listens_for(Session, "after_rollback")
+def _forget_view_writes(db_session):
+    db_session.info.pop("view_versions_pending", None)
+    db_session.info.pop("view_versions_bumped", None)
@@ -14,6 +14,8 @@ from models.extensions import db
 from models.notification import Notification, NotificationPreferences, DeadlineNotificationLog
 from models.staff import Staff
 from models.comment import Comment
+from common.circuit_breaker import CircuitOpenError, get_breaker, breaker_snapshots
+from common.compression import init_compression
 
 app = Flask(__name__)
 app.secret_key = "issa_secret_key"
@@ -30,6 +32,7 @@ CORS(app,
          "expose_headers": ["Content-Type", "Access-Control-Allow-Credentials", "Access-Control-Allow-Origin"]
      }},
      send_wildcard=True)
+init_compression(app)
 
 socketio = SocketIO(app, 
                    cors_allowed_origins=["http://localhost:5173", "http://localhost:5174", "http://127.0.0.1:5173"],
@@ -52,6 +55,9 @@ db.init_app(app)
 EMPLOYEE_SERVICE_URL = "http://localhost:5000"
 TASK_SERVICE_URL = "http://localhost:5002"  # Your tasks run on 5002
 PROJECT_SERVICE_URL = "http://localhost:8001"  # Assuming projects on 8001
+# fail fast instead of waiting on timeouts while a dependency is down
+task_service_breaker = get_breaker('task-service')
+employee_service_breaker = get_breaker('employee-service')
 
 def _room_for_employee(employee_id: str) -> str:
     return f"employee:{employee_id}"
@@ -82,15 +88,48 @@ def _create_notification(staff_id: int, notif_type: str, title: str, message: st
     socketio.emit('new_notification', payload, room=_room_for_employee(str(staff_id)))
     return payload
 
+def _create_notifications(rows: list) -> list:
+    """Batch form of _create_notification: one commit for all rows, then one socket emit each"""
+    notifications = [
+        Notification(notification_id=str(uuid.uuid4()), is_read=False, **row)
+        for row in rows
+    ]
+    if not notifications:
+        return []
+    db.session.add_all(notifications)
+    db.session.commit()
+    payloads = [n.to_dict() for n in notifications]
+    for payload in payloads:
+        socketio.emit('new_notification', payload, room=_room_for_employee(str(payload['staff_id'])))
+    return payloads
+
 def _get_task(task_id: int):
     try:
-        resp = requests.get(f"{TASK_SERVICE_URL}/tasks/{task_id}")
+        resp = task_service_breaker.call(requests.get, f"{TASK_SERVICE_URL}/tasks/{task_id}", timeout=3)
         if resp.ok:
             return resp.json()
+    except CircuitOpenError as e:
+        print(f"DEBUG: Skipping task lookup: {e}")
     except Exception:
         pass
     return None
 
+def _get_employee_names(employee_ids) -> dict:
+    """Resolve {employee_id: employee_name} with one call to the employee service's bulk lookup"""
+    ids = sorted({int(i) for i in employee_ids if i})
+    if not ids:
+        return {}
+    try:
+        resp = employee_service_breaker.call(
+            requests.post, f"{EMPLOYEE_SERVICE_URL}/api/internal/employees", json={'ids': ids}, timeout=2)
+        if resp.ok:
+            employees = resp.json().get('employees') or []
+            return {e['employee_id']: e.get('employee_name') for e in employees if 'employee_id' in e}
+        print(f"DEBUG: Failed to get employee names: {resp.text}")
+    except Exception as e:
+        print(f"DEBUG: Exception getting employee names: {e}")
+    return {}
+
 def _get_task_recipients(task: dict) -> list:
     recipients = []
     owner_id = task.get('owner')
@@ -237,6 +276,42 @@ def event_comment_changed():
     )
     return jsonify({'status': 'ok'}), 200
 
+def _task_update_message(task: dict, changed_fields: list, actor_name: str):
+    """(notif_type, title, message) for a task-updated event"""
+    # Use different notification types based on what changed
+    if 'collaborators' in changed_fields:
+        return ('collaborators_changed', f"Collaborators updated: {task.get('title')}",
+                "Task collaborators have been updated")
+    if 'deadline' in changed_fields:
+        return ('due_date_changed', f"Due date changed: {task.get('title')}",
+                f"{actor_name} updated the deadline")
+    if 'status' in changed_fields:
+        return ('task_status_updated', f"Status updated: {task.get('title')}",
+                f"{actor_name} changed task status to: {task.get('status', 'unknown')}")
+    if 'priority' in changed_fields:
+        return ('priority_updated', f"Priority updated: {task.get('title')}",
+                f"Task priority changed to: {task.get('priority', 'unknown')}")
+    if 'description' in changed_fields:
+        return ('description_updated', f"Description updated: {task.get('title')}",
+                "Task description has been updated")
+    if 'title' in changed_fields:
+        return ('name_updated', f"Task name updated: {task.get('title')}",
+                "Task name has been updated")
+    # Generic task update for other fields
+    return ('task_status_updated', f"Task updated: {task.get('title')}",
+            f"Changed: {', '.join(changed_fields)}")
+
+def _names_actor(changed_fields: list) -> bool:
+    # only the deadline and status messages name the actor
+    return 'deadline' in changed_fields or 'status' in changed_fields
+
+def _event_task(event: dict):
+    """The task as of the event: the snapshot the task service embedded, else fetched back from it"""
+    snapshot = event.get('task')
+    if isinstance(snapshot, dict) and snapshot.get('task_id') == event.get('task_id'):
+        return snapshot
+    return _get_task(event.get('task_id'))
+
 # Event: task updated
 @app.route('/api/events/task-updated', methods=['POST'])
 def event_task_updated():
@@ -249,68 +324,15 @@ def event_task_updated():
     
     if not task_id or not changed_fields:
         return jsonify({'error': 'task_id and changed_fields required'}), 400
-    task = _get_task(task_id)
+    task = _event_task(payload)
     if not task:
         return jsonify({'error': 'task not found'}), 404
     recipients = _get_task_recipients(task)
-    title = f"Task updated: {task.get('title')}"
-    message = f"Changed: {', '.join(changed_fields)}"
-    
-    # Use different notification types based on what changed
-    notif_type = 'task_status_updated'  # default
-    if 'collaborators' in changed_fields:
-        notif_type = 'collaborators_changed'
-        title = f"Collaborators updated: {task.get('title')}"
-        message = "Task collaborators have been updated"
-    elif 'deadline' in changed_fields:
-        notif_type = 'due_date_changed'
-        title = f"Due date changed: {task.get('title')}"
-        # Get actor name for more context
-        actor_name = "Someone"
-        if actor_id:
-            try:
-                print(f"DEBUG: Fetching actor name for employee_id: {actor_id}")
-                actor_resp = requests.get(f"{EMPLOYEE_SERVICE_URL}/api/internal/employee/{actor_id}", timeout=2)
-                print(f"DEBUG: Actor response status: {actor_resp.status_code}")
-                if actor_resp.ok:
-                    actor_data = actor_resp.json()
-                    actor_name = actor_data.get('employee_name', 'Someone')
-                    print(f"DEBUG: Actor name: {actor_name}")
-                else:
-                    print(f"DEBUG: Failed to get actor name: {actor_resp.text}")
-            except Exception as e:
-                print(f"DEBUG: Exception getting actor name: {e}")
-        message = f"{actor_name} updated the deadline"
-    elif 'status' in changed_fields:
-        notif_type = 'task_status_updated'
-        title = f"Status updated: {task.get('title')}"
-        # Get actor name
-        actor_name = "Someone"
-        if actor_id:
-            try:
-                actor_resp = requests.get(f"{EMPLOYEE_SERVICE_URL}/api/internal/employee/{actor_id}", timeout=2)
-                if actor_resp.ok:
-                    actor_name = actor_resp.json().get('employee_name', 'Someone')
-            except Exception:
-                pass
-        message = f"{actor_name} changed task status to: {task.get('status', 'unknown')}"
-    elif 'priority' in changed_fields:
-        notif_type = 'priority_updated'
-        title = f"Priority updated: {task.get('title')}"
-        message = f"Task priority changed to: {task.get('priority', 'unknown')}"
-    elif 'description' in changed_fields:
-        notif_type = 'description_updated'
-        title = f"Description updated: {task.get('title')}"
-        message = "Task description has been updated"
-    elif 'title' in changed_fields:
-        notif_type = 'name_updated'
-        title = f"Task name updated: {task.get('title')}"
-        message = "Task name has been updated"
-    else:
-        # Generic task update for other fields
-        notif_type = 'task_status_updated'
-        title = f"Task updated: {task.get('title')}"
-        message = f"Changed: {', '.join(changed_fields)}"
+    # resolve the actor once, and only when the message uses it
+    actor_name = payload.get('actor_name') or "Someone"
+    if actor_id and not payload.get('actor_name') and _names_actor(changed_fields):
+        actor_name = _get_employee_names([actor_id]).get(int(actor_id)) or "Someone"
+    notif_type, title, message = _task_update_message(task, changed_fields, actor_name)
     
     print(f"DEBUG: Sending notifications to recipients: {recipients}")
     print(f"DEBUG: Notification details - type: {notif_type}, title: {title}, message: {message}")
@@ -319,6 +341,85 @@ def event_task_updated():
         _create_notification(staff_id=staff_id, notif_type=notif_type, title=title, message=message, related_task_id=task_id)
     return jsonify({'status': 'ok'}), 200
 
+# Event: many task updates at once (batch status changes)
+@app.route('/api/events/task-updated/batch', methods=['POST'])
+def event_task_updated_batch():
+    """
+    payload: {events: [{task_id, changed_fields, actor_id, actor_name?, task?}, ...]}
+    Snapshots and actor names carried in the events are used as-is; anything missing is
+    fetched (actor names in one lookup). All notifications are written in one commit.
+    """
+    payload = request.get_json(force=True) or {}
+    events = [e for e in (payload.get('events') or []) if e.get('task_id') and e.get('changed_fields')]
+    if not events:
+        return jsonify({'error': 'events required'}), 400
+
+    actor_names = _get_employee_names(
+        e.get('actor_id') for e in events if not e.get('actor_name') and _names_actor(e['changed_fields'])
+    )
+    rows = []
+    skipped = []
+    for event in events:
+        task = _event_task(event)
+        if not task:
+            skipped.append(event['task_id'])
+            continue
+        actor_id = event.get('actor_id')
+        actor_name = event.get('actor_name') or (actor_names.get(int(actor_id)) if actor_id else None)
+        notif_type, title, message = _task_update_message(task, event['changed_fields'], actor_name or "Someone")
+        for staff_id in _get_task_recipients(task):
+            rows.append({'staff_id': staff_id, 'type': notif_type, 'title': title,
+                         'message': message, 'related_task_id': event['task_id']})
+    _create_notifications(rows)
+    return jsonify({'status': 'ok', 'notified': len(rows), 'skipped': skipped}), 200
+
+# Event: many tasks created at once (bulk import)
+@app.route('/api/events/tasks-created', methods=['POST'])
+def event_tasks_created():
+    """
+    One notification per recipient for a whole import rather than one per task.
+    payload: {actor_id, tasks: [{task_id, title, parent_id, owner, collaborators}]}
+    """
+    payload = request.get_json(force=True) or {}
+    actor_id = payload.get('actor_id')
+    tasks = payload.get('tasks') or []
+    if not tasks:
+        return jsonify({'error': 'tasks required'}), 400
+
+    by_recipient = {}
+    for task in tasks:
+        for staff_id in _get_task_recipients(task):
+            if staff_id != actor_id:
+                by_recipient.setdefault(staff_id, []).append(task)
+
+    actor_name = "Someone"
+    if actor_id and by_recipient:
+        actor_name = _get_employee_names([actor_id]).get(int(actor_id)) or "Someone"
+    rows = []
+    for staff_id, assigned in by_recipient.items():
+        if len(assigned) == 1:
+            task = assigned[0]
+            label = 'Subtask' if task.get('parent_id') else 'Task'
+            rows.append({
+                'staff_id': staff_id,
+                'type': 'task_assigned',
+                'title': f"New {label.lower()}: {task.get('title')}",
+                'message': f"{actor_name} added you to a {label.lower()}",
+                'related_task_id': task.get('task_id')
+            })
+        else:
+            titles = ', '.join(t.get('title') or '' for t in assigned[:5])
+            more = f" and {len(assigned) - 5} more" if len(assigned) > 5 else ""
+            rows.append({
+                'staff_id': staff_id,
+                'type': 'task_assigned',
+                'title': f"You were added to {len(assigned)} new tasks",
+                'message': f"{actor_name} imported: {titles}{more}",
+                'related_task_id': None
+            })
+    _create_notifications(rows)
+    return jsonify({'status': 'ok', 'notified': len(rows)}), 200
+
 # Scheduler: approaching deadlines and overdue
 scheduler = BackgroundScheduler()
 
@@ -347,25 +448,44 @@ def _within_day(target: datetime, days_before_deadline: int) -> bool:
     # Check if today is exactly the reminder date
     return today == reminder_date
 
+REMINDER_PAGE_SIZE = 500
+
+def _reminder_lookahead_days() -> int:
+    """The furthest ahead anyone wants a deadline reminder (defaults to 7 days)"""
+    days = [7]
+    for (value,) in db.session.query(NotificationPreferences.deadline_reminder_days).distinct():
+        days.extend(int(d.strip()) for d in (value or '').split(',') if d.strip().isdigit())
+    return max(days)
+
 def _send_deadline_reminders():
     print("=" * 60)
     print(f"🔔 Running deadline reminder check at {datetime.now(timezone.utc)}")
     print("=" * 60)
     
-    # Fetch tasks via tasks service (unfiltered, then filter here if needed)
+    # Fetch only open tasks due within the longest reminder window (or already overdue), page by page
+    now = datetime.now(timezone.utc)
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+    params = {
+        'exclude_status': 'done,completed',
+        'deadline_to': (today + timedelta(days=_reminder_lookahead_days() + 1)).isoformat(),
+        'limit': REMINDER_PAGE_SIZE
+    }
+    tasks = []
+    after_id = 0
     try:
-        resp = requests.get(f"{TASK_SERVICE_URL}/api/internal/tasks/all")
-        if not resp.ok:
-            print("❌ Failed to fetch tasks from task service")
-            return
-        tasks_data = resp.json()
-        # Get tasks from the response
-        tasks = tasks_data.get('tasks', [])
+        while after_id is not None:
+            resp = task_service_breaker.call(requests.get, f"{TASK_SERVICE_URL}/api/internal/tasks/all",
+                                             params={**params, 'after_id': after_id}, timeout=10)
+            if not resp.ok:
+                print("❌ Failed to fetch tasks from task service")
+                return
+            tasks_data = resp.json()
+            tasks.extend(tasks_data.get('tasks', []))
+            after_id = tasks_data.get('next_after_id')
         print(f"✅ Fetched {len(tasks)} tasks from task service")
     except Exception as e:
         print(f"❌ Exception fetching tasks: {e}")
         return
-    now = datetime.now(timezone.utc)
     for t in tasks:
         deadline_str = t.get('deadline')
         status = t.get('status')
@@ -469,6 +589,32 @@ def clear_deadline_logs(task_id):
         print(f"[Internal API] Error clearing deadline logs: {e}")
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+@app.route('/api/internal/clear-deadline-logs', methods=['POST'])
+def clear_deadline_logs_bulk():
+    """Clear deadline notification logs for many tasks at once: {task_ids: [...]}"""
+    payload = request.get_json(silent=True) or {}
+    task_ids = payload.get('task_ids')
+    if not isinstance(task_ids, list) or not all(isinstance(t, int) for t in task_ids):
+        return jsonify({'status': 'error', 'message': 'task_ids must be a list of integers'}), 400
+    if not task_ids:
+        return jsonify({'status': 'ok', 'deleted': 0}), 200
+    try:
+        deleted = DeadlineNotificationLog.query.filter(
+            DeadlineNotificationLog.task_id.in_(task_ids)
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        print(f"[Internal API] Cleared {deleted} deadline notification logs for {len(task_ids)} tasks")
+        return jsonify({'status': 'ok', 'deleted': deleted}), 200
+    except Exception as e:
+        db.session.rollback()
+        print(f"[Internal API] Error clearing deadline logs: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/internal/circuit-breakers', methods=['GET'])
+def circuit_breaker_status():
+    """State of this service's breakers for the task and employee services"""
+    return jsonify({'breakers': breaker_snapshots()}), 200
+
 # Add OPTIONS handler for CORS preflight
 @app.route('/api/<path:path>', methods=['OPTIONS'])
 def handle_options(path):
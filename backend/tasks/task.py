@@ -1,20 +1,39 @@
 import os
+import io
+import csv
 import time
 import json
+import hashlib
+import uuid
+import threading
+from functools import lru_cache
+from types import SimpleNamespace
 from werkzeug.utils import secure_filename
+from werkzeug.security import safe_join
 
-from flask import Flask, request, jsonify, session, send_from_directory
+from flask import Flask, Response, has_request_context, request, jsonify, session, send_from_directory, stream_with_context
 from flask_sqlalchemy import SQLAlchemy 
 from flask_cors import CORS
+from sqlalchemy import or_, and_, exists, event, func, inspect as sa_inspect
+from sqlalchemy.orm import Session
+from apscheduler.schedulers.background import BackgroundScheduler
 
 from models.extensions import db
-from models.task import Task
+from models.task import Task, Task_Collaborators
 from models.staff import Staff
 from models.comment import Comment
 from models.comment_mention import CommentMention
 from models.comment_attachment import CommentAttachment
-from models.project import Project
-from datetime import datetime, timezone, timedelta
+from models.project import Project, project_members
+from models.outbox import OutboxEvent
+from models.view_version import TASK_VIEWS, current_view_version, mark_view_write
+from models.read_models import (collaborator_ids_by_task, staff_rows, task_rows, task_tree_dicts,
+                                 top_level_task_rows_by_member)
+from common.circuit_breaker import CircuitOpenError, get_breaker, breaker_snapshots
+from common.view_cache import ScopedCache, EVERYTHING
+from common.compression import init_compression
+from common.json_stream import json_stream_response, JSONObject, RawJSON
+from datetime import date, datetime, timezone, timedelta
 import zoneinfo
 import re
 import os
@@ -24,9 +43,24 @@ import requests
 
 # ADD this constant after your app configuration
 NOTIFICATION_SERVICE_URL = "http://localhost:5003"
+# fail fast instead of waiting on timeouts while a dependency is down
+notification_service_breaker = get_breaker('notification-service')
 
 ALLOWED_EXTENSIONS = {'pdf', 'png', 'jpg', 'jpeg'}
 
+# Uploads are stored as "<sha256 prefix>_<name>", so their bytes never change for a given name
+CONTENT_ADDRESSED_RE = re.compile(r'^[0-9a-f]{32}_')
+ATTACHMENT_MAX_AGE = 365 * 24 * 60 * 60  # one year, for content-addressed files only
+ATTACHMENT_CHUNK_SIZE = 64 * 1024
+# most recent legacy file versions whose ETag is remembered
+ATTACHMENT_ETAG_CACHE_SIZE = 1024
+
+# Chunked (resumable) uploads
+UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024
+UPLOAD_MAX_SIZE = 1024 * 1024 * 1024
+UPLOAD_SESSION_TTL = timedelta(hours=24)
+UPLOAD_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+
 def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -36,8 +70,11 @@ app.secret_key = "issa_secret_key"
 app.config["SESSION_COOKIE_SAMESITE"] = "None"
 app.config["SESSION_COOKIE_SECURE"] = True  
 app.config['UPLOAD_FOLDER'] = 'uploads/attachments'
+# Hand file bodies to the front proxy (nginx/apache X-Sendfile) instead of streaming them from Python
+app.config['USE_X_SENDFILE'] = os.getenv('USE_X_SENDFILE', '').lower() in ('1', 'true', 'yes')
 
 CORS(app, supports_credentials=True, origins=["http://localhost:5173", "http://localhost:5174"])
+init_compression(app)
 # Only use production database if not testing
 if not os.getenv('TESTING'):
     app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv("DATABASE_URI", "mysql+mysqlconnector://root@localhost:3306/SPM")
@@ -84,6 +121,32 @@ def get_collaborators(collaborator_ids):
             collaborators.append(staff)
     return collaborators
 
+def staff_by_ids(staff_ids):
+    """{employee_id: Staff} for every id that exists, in one IN query"""
+    ids = {sid for sid in staff_ids if sid is not None}
+    if not ids:
+        return {}
+    return {s.employee_id: s for s in Staff.query.filter(Staff.employee_id.in_(ids)).all()}
+
+def staff_names(staff_ids):
+    """{employee_id: employee_name}; staff the request already loaded are not queried again"""
+    ids = {sid for sid in staff_ids if sid is not None}
+    staff = {sid: db.session.identity_map.get(Session.identity_key(Staff, sid)) for sid in ids}
+    staff.update(staff_by_ids(sid for sid, member in staff.items() if member is None))
+    return {sid: member.employee_name for sid, member in staff.items() if member is not None}
+
+def project_member_id_set(project_id):
+    """Set of staff ids on a project's roster, read straight from project_members"""
+    rows = db.session.query(project_members.c.staff_id).filter(project_members.c.project_id == project_id).all()
+    return {staff_id for (staff_id,) in rows}
+
+def open_task_title_exists(title):
+    # same-title tasks are allowed once the old one is done (recurring tasks keep their title)
+    return db.session.query(exists().where(and_(
+        Task.title == title,
+        Task.status.in_(['ongoing', 'unassigned'])
+    ))).scalar()
+
 def set_timestamps_by_status(task, old_status, new_status):
     """Set start_date and completed_date based on status transitions"""
 
@@ -107,115 +170,310 @@ def set_timestamps_by_status(task, old_status, new_status):
         if new_status == 'done':
             task.completed_date = now
 
-# ------------------ Notification Helpers ------------------
-
-def get_task_collaborators_ids(task_id):
-    """Get list of collaborator employee_ids for a task"""
-    task = Task.query.get(task_id)
-    if not task:
-        return []
-    return [c.employee_id for c in task.collaborators.all()]
-
-def get_employee_name(employee_id):
-    """Get employee name from Employee service"""
-    try:
-        response = requests.get(f'http://localhost:5000/api/internal/employee/{employee_id}')
-        if response.status_code == 200:
-            return response.json().get('employee_name', 'Unknown')
-    except Exception as e:
-        print(f"Failed to get employee name: {e}")
-    return 'Unknown'
-
-def notify_task_status_updated(task_id, old_status, new_status, updated_by_id):
-    """Send notification when task status changes"""
+# ------------------ Notification Outbox ------------------
+# Calls to the notification service are not made on the request. They are staged as OutboxEvent
+# rows in the same transaction as the task change and delivered by a relay worker, in batches,
+# retrying with backoff and keeping events for the same task in order.
+
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', 100))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', 8))
+OUTBOX_INTERVAL_SECONDS = int(os.getenv('OUTBOX_INTERVAL_SECONDS', 5))
+OUTBOX_SEND_TIMEOUT = 5
+# how long a relay holds the events it claimed; longer than a full batch of sends can take
+OUTBOX_CLAIM_SECONDS = int(os.getenv('OUTBOX_CLAIM_SECONDS', 600))
+TASK_UPDATED_PATH = '/api/events/task-updated'
+TASK_UPDATED_BATCH_PATH = '/api/events/task-updated/batch'
+# no scheduler runs under TESTING, so the relay drains right after the request that staged events
+OUTBOX_INLINE = bool(os.getenv('TESTING'))
+
+def enqueue_notification(path, payload=None, task_id=None):
+    """Stage a POST to the notification service; it is sent once the current transaction commits"""
+    db.session.info.setdefault("outbox", []).append({
+        'task_id': task_id,
+        'path': path,
+        'payload': json.dumps(payload) if payload is not None else None
+    })
+
+@event.listens_for(Session, "before_commit")
+def _write_outbox(db_session):
+    # one executemany for everything the request staged, inside the transaction being committed
+    rows = db_session.info.pop("outbox", None)
+    if rows:
+        db_session.execute(OutboxEvent.__table__.insert(), rows)
+        db_session.info["outbox_staged"] = True
+
+@event.listens_for(Session, "after_commit")
+def _mark_outbox_committed(db_session):
+    if db_session.info.pop("outbox_staged", False):
+        db_session.info["outbox_committed"] = True
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_outbox(db_session):
+    db_session.info.pop("outbox", None)
+    db_session.info.pop("outbox_staged", None)
+
+def post_outbox_payload(path, payload):
+    """
+    POST to the notification service; returns (error, permanent) with error None on success.
+    Raises CircuitOpenError without calling out while the notification service is marked down.
+    """
     try:
-        task = Task.query.get(task_id)
-        if not task:
-            return
-        
-        # Use the same task-updated endpoint as other field changes
-        requests.post(
-            f'{NOTIFICATION_SERVICE_URL}/api/events/task-updated',
-            json={
-                'task_id': task_id,
-                'changed_fields': ['status'],
-                'actor_id': updated_by_id
-            },
-            timeout=2
-        )
-        print(f"[Notification] Sent status update notification for task {task_id}")
+        response = notification_service_breaker.call(
+            requests.post, f'{NOTIFICATION_SERVICE_URL}{path}', json=payload, timeout=OUTBOX_SEND_TIMEOUT)
+    except CircuitOpenError:
+        raise
     except Exception as e:
-        print(f"[Notification] Failed to send status update: {e}")
+        return str(e), False
+    if response.ok:
+        return None, False
+    # a 4xx will be rejected again, so it is not retried
+    return f"HTTP {response.status_code}", response.status_code < 500
+
+def outbox_retry_delay(attempts):
+    return timedelta(seconds=min(2 ** attempts, 300))
+
+def relay_outbox_batch(batch_size=None):
+    """Deliver up to batch_size due events in id order.
+    Returns (taken, attempted): events read, and how many of them were sent rather than held back.
+
+    Events are claimed in a short transaction (their next_attempt_at pushed out to a lease) that is
+    committed before anything is posted, so no row locks are held across the HTTP calls; the results
+    are written back in a second transaction. A relay that dies mid-batch leaves its events to be
+    picked up again once the lease runs out.
+    """
+    now = datetime.now()
+    # DATETIME columns drop microseconds, and the lease is matched again when results are written back
+    lease = (now + timedelta(seconds=OUTBOX_CLAIM_SECONDS)).replace(microsecond=0)
+    events = (OutboxEvent.query
+              .filter(OutboxEvent.next_attempt_at.isnot(None), OutboxEvent.next_attempt_at <= now)
+              .order_by(OutboxEvent.id)
+              .limit(batch_size or OUTBOX_BATCH_SIZE)
+              .with_for_update(skip_locked=True)
+              .all())
+    if not events:
+        db.session.rollback()
+        return 0, 0
+
+    # per-task ordering: a task's events wait while an earlier one is backing off or held by another relay
+    keys = {e.task_id for e in events}
+    key_filter = OutboxEvent.task_id.in_([k for k in keys if k is not None])
+    if None in keys:
+        key_filter = or_(key_filter, OutboxEvent.task_id.is_(None))
+    first_pending = dict(db.session.query(OutboxEvent.task_id, func.min(OutboxEvent.id))
+                         .filter(key_filter, OutboxEvent.next_attempt_at.isnot(None))
+                         .group_by(OutboxEvent.task_id).all())
+    first_in_batch = {}
+    for e in events:
+        first_in_batch.setdefault(e.task_id, e.id)
+    blocked = {key for key in keys if first_pending.get(key) != first_in_batch[key]}
+
+    # plain copies: the ORM rows are expired by the claim commit
+    claimed = [{'id': e.id, 'task_id': e.task_id, 'path': e.path, 'payload': e.payload,
+                'attempts': e.attempts, 'next_attempt_at': e.next_attempt_at}
+               for e in events if e.task_id not in blocked]
+    taken = len(events)
+    if claimed:
+        # the claimed rows stay pending (not None), so other relays keep holding back later events of those tasks
+        (OutboxEvent.query.filter(OutboxEvent.id.in_([e['id'] for e in claimed]))
+         .update({OutboxEvent.next_attempt_at: lease}, synchronize_session=False))
+    db.session.commit()
 
-def notify_task_assigned(task_id, assigned_to, assigned_by_id):
-    """Send notification when task is assigned"""
-    try:
-        task = Task.query.get(task_id)
-        if not task:
-            return
-        
-        requests.post(
-            f'{NOTIFICATION_SERVICE_URL}/api/internal/events/task-assigned',
-            json={
-                'task_id': task_id,
-                'task_title': task.title,
-                'assigned_to': assigned_to,
-                'assigned_by_name': get_employee_name(assigned_by_id)
-            },
-            timeout=2
-        )
-        print(f"[Notification] Sent assignment notification for task {task_id}")
-    except Exception as e:
-        print(f"[Notification] Failed to send assignment notification: {e}")
+    delivered = []
+    failed = []
+    attempted = 0
+    breaker_open = False
 
-def notify_due_date_changed(task_id, old_date, new_date, changed_by_id):
-    """Send notification when due date changes"""
-    try:
-        task = Task.query.get(task_id)
-        if not task:
+    def send(path, payload, batch):
+        nonlocal attempted, breaker_open
+        if breaker_open:
             return
-        
-        # Send due date changed notification
-        requests.post(
-            f'{NOTIFICATION_SERVICE_URL}/api/events/task-updated',
-            json={
-                'task_id': task_id,
-                'changed_fields': ['deadline'],
-                'actor_id': changed_by_id
-            },
-            timeout=3
-        )
-        print(f"[Notification] Sent due date change notification for task {task_id}")
-        
-        # Clear old deadline notification logs so new deadline reminders can be sent
         try:
-            clear_resp = requests.delete(
-                f'{NOTIFICATION_SERVICE_URL}/api/internal/clear-deadline-logs/{task_id}',
-                timeout=2
-            )
-            if clear_resp.ok:
-                print(f"[Notification] Cleared deadline notification logs for task {task_id}")
+            error, permanent = post_outbox_payload(path, payload)
+        except CircuitOpenError as e:
+            # leave the rest of the batch due, untouched, for when the service is back
+            breaker_open = True
+            print(f"[Outbox] Holding events: {e}")
+            return
+        attempted += len(batch)
+        if error is None:
+            delivered.extend(e['id'] for e in batch)
+            return
+        for e in batch:
+            attempts = e['attempts'] + 1
+            if permanent or attempts >= OUTBOX_MAX_ATTEMPTS:
+                next_attempt_at = None
+                print(f"[Outbox] Giving up on event {e['id']} ({e['path']}) after {attempts} attempts: {error}")
             else:
-                print(f"[Notification] Failed to clear deadline logs: {clear_resp.status_code}")
+                next_attempt_at = now + outbox_retry_delay(attempts)
+                # later events for this task wait for this one
+                blocked.add(e['task_id'])
+                print(f"[Outbox] Event {e['id']} ({e['path']}) failed, retrying: {error}")
+            failed.append({'id': e['id'], 'attempts': attempts, 'last_error': error,
+                           'next_attempt_at': next_attempt_at})
+
+    # consecutive task-updated events go out as one call to the batch endpoint; walking the
+    # batch in id order keeps each task's events in order around the other event types
+    run = []
+
+    def send_run():
+        if len(run) == 1:
+            send(run[0]['path'], json.loads(run[0]['payload']), run)
+        elif run:
+            send(TASK_UPDATED_BATCH_PATH, {'events': [json.loads(e['payload']) for e in run]}, list(run))
+        run.clear()
+
+    for e in claimed:
+        if e['task_id'] in blocked:
+            continue
+        if e['path'] == TASK_UPDATED_PATH:
+            run.append(e)
+            continue
+        send_run()
+        if e['task_id'] not in blocked:
+            send(e['path'], json.loads(e['payload']) if e['payload'] else None, [e])
+    send_run()
+
+    # write back; rows whose lease has since been taken over by another relay are left to it
+    finished = set(delivered) | {f['id'] for f in failed}
+    if delivered:
+        OutboxEvent.query.filter(OutboxEvent.id.in_(delivered)).delete(synchronize_session=False)
+        print(f"[Outbox] Delivered {len(delivered)} events")
+    for f in failed:
+        (OutboxEvent.query.filter(OutboxEvent.id == f['id'], OutboxEvent.next_attempt_at == lease)
+         .update({OutboxEvent.attempts: f['attempts'], OutboxEvent.last_error: f['last_error'],
+                  OutboxEvent.next_attempt_at: f['next_attempt_at']}, synchronize_session=False))
+    for e in claimed:
+        if e['id'] not in finished:
+            # held back mid-batch: due again as it was before the claim
+            (OutboxEvent.query.filter(OutboxEvent.id == e['id'], OutboxEvent.next_attempt_at == lease)
+             .update({OutboxEvent.next_attempt_at: e['next_attempt_at']}, synchronize_session=False))
+    db.session.commit()
+    return taken, attempted
+
+def relay_outbox(batch_size=None):
+    """Drain due events batch by batch until a batch comes back short or everything in it is held back"""
+    batch_size = batch_size or OUTBOX_BATCH_SIZE
+    sent = 0
+    while True:
+        try:
+            taken, attempted = relay_outbox_batch(batch_size)
         except Exception as e:
-            print(f"[Notification] Error clearing deadline logs: {e}")
-            
-    except Exception as e:
-        print(f"[Notification] Failed to send due date notification: {e}")
+            db.session.rollback()
+            print(f"[Outbox] Relay failed: {e}")
+            break
+        sent += attempted
+        if taken < batch_size or attempted == 0:
+            break
+    return sent
+
+def run_outbox_relay():
+    """Scheduler entry point"""
+    with app.app_context():
+        relay_outbox()
+
+def wake_outbox_relay():
+    """Deliver newly committed events now instead of at the next interval"""
+    if OUTBOX_INLINE:
+        relay_outbox()
+    elif scheduler.running:
+        scheduler.modify_job('outbox_relay', next_run_time=datetime.now())
 
-def trigger_deadline_reminder_check():
-    """Trigger deadline reminder check immediately after task creation/update"""
+@app.after_request
+def _wake_relay_after_commit(response):
+    if db.session.info.pop("outbox_committed", False):
+        wake_outbox_relay()
+    return response
+
+# ------------------ Notification Helpers ------------------
+
+def task_snapshots(task_ids):
+    """{task_id: snapshot} with the fields the notification service renders, in two queries"""
+    ids = list(dict.fromkeys(task_ids))
+    if not ids:
+        return {}
+    rows = (db.session.query(Task.task_id, Task.title, Task.status, Task.priority, Task.owner, Task.parent_id)
+            .filter(Task.task_id.in_(ids))
+            .all())
+    collaborators = collaborator_ids_by_task([row.task_id for row in rows])
+    return {
+        row.task_id: {
+            'task_id': row.task_id,
+            'title': row.title,
+            'status': row.status,
+            'priority': row.priority,
+            'owner': row.owner,
+            'parent_id': row.parent_id,
+            'collaborators': collaborators[row.task_id]
+        }
+        for row in rows
+    }
+
+def visible_to_employee(employee_id):
+    """SQL filter: task is owned by employee_id OR employee_id is a collaborator (EXISTS, no join)"""
+    # aliased so it is not correlated with a task_collaborators join in the outer query
+    tc = Task_Collaborators.alias()
+    return or_(
+        Task.owner == employee_id,
+        exists().where(and_(
+            tc.c.task_id == Task.task_id,
+            tc.c.staff_id == employee_id
+        ))
+    )
+
+def parse_window_bound(value):
+    """Parse an optional ?from= / ?to= value (ISO date or datetime) to naive UTC; None if absent"""
+    if not value:
+        return None
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(UTC).replace(tzinfo=None)
+    return dt
+
+def window_end_filter(column, value):
+    """
+    SQL criterion for an optional ?to= style upper bound; None if absent. A datetime is inclusive; a
+    date-only value covers the whole of that day, so it becomes an exclusive bound at the next midnight.
+    Raises ValueError on a bad date.
+    """
+    bound = parse_window_bound(value)
+    if bound is None:
+        return None
     try:
-        response = requests.post(
-            f'{NOTIFICATION_SERVICE_URL}/api/test/deadline-reminders',
-            timeout=5
-        )
-        if response.ok:
-            print(f"[Notification] Triggered deadline reminder check")
-        else:
-            print(f"[Notification] Failed to trigger deadline reminder check: {response.status_code}")
-    except Exception as e:
-        print(f"[Notification] Failed to trigger deadline reminder check: {e}")
+        date.fromisoformat(value)
+    except ValueError:
+        return column <= bound
+    return column < bound + timedelta(days=1)
+
+def notify_task_status_updated(task_id, old_status, new_status, updated_by_id):
+    """Queue notification when task status changes"""
+    # Use the same task-updated endpoint as other field changes
+    notify_task_updates_batch([{
+        'task_id': task_id,
+        'changed_fields': ['status'],
+        'actor_id': updated_by_id
+    }])
+
+def notify_task_assigned(task_id, assigned_to, assigned_by_id):
+    """Queue notification when task is assigned"""
+    task = Task.query.get(task_id)
+    if not task:
+        return
+    enqueue_notification('/api/internal/events/task-assigned', {
+        'task_id': task_id,
+        'task_title': task.title,
+        'assigned_to': assigned_to,
+        'assigned_by_id': assigned_by_id,
+        'assigned_by_name': staff_names([assigned_by_id]).get(assigned_by_id, 'Unknown')
+    }, task_id=task_id)
+
+def clear_deadline_logs(task_ids):
+    """Queue clearing of deadline notification logs for tasks whose deadline changed, so new reminders can be sent"""
+    task_ids = list(task_ids)
+    enqueue_notification('/api/internal/clear-deadline-logs', {'task_ids': task_ids}, task_id=task_ids[0])
+
+def trigger_deadline_reminder_check(order_task_id=None):
+    """Queue a deadline reminder check after task creation/update (after that task's other events)"""
+    enqueue_notification('/api/test/deadline-reminders', task_id=order_task_id)
 
 # ------------------ Mentions Helpers ------------------
 MENTION_RE = re.compile(r'@(\d+)')  # numeric ids (still supported)
@@ -324,51 +582,49 @@ def create_task():
         return {"message": "Title and description cannot be empty"}, 400
 
     # allow same title tasks if the task with the same title is completed (to allow recurring tasks with same title)
-    existing_tasks = Task.query.filter_by(title=data['title']).all()
-    if existing_tasks:
-        for task in existing_tasks:
-            if task.status in ['ongoing', 'unassigned']:
-                return {"message": "Task with this title already exists"}, 400
+    if open_task_title_exists(data['title']):
+        return {"message": "Task with this title already exists"}, 400
 
     # collaborators
     collaborators_ids = data.get('collaborators', [])
+    project_id = data.get('project_id')
+
+    # Resolve final owner: allow privileged roles to assign owner; otherwise default to current user
+    can_assign = (role or '').lower() in ['manager', 'hr', 'senior manager', 'senior director']
+    requested_owner_id = data['owner'] if can_assign and isinstance(data.get('owner'), int) else None
+
+    # prefetch: every staff id the request refers to (task + subtasks) in one query, and the
+    # project roster in another; everything below validates against these in-memory sets
+    referenced_ids = set(collaborators_ids) | {eid, requested_owner_id}
+    for subtask in data.get('subtasks') or []:
+        if isinstance(subtask, dict):
+            referenced_ids.add(subtask.get('owner', eid))
+            referenced_ids.update(subtask.get('collaborators') or [])
+    staff = staff_by_ids(referenced_ids)
+
     # need to check that the collaborators ids are valid staff ids
     for cid in collaborators_ids:
-        staff = Staff.query.get(cid)
-        if not staff:
+        if cid not in staff:
             return {"message": f"Collaborator {cid} not found"}, 404
-        
-    if data.get('project_id'):
+
+    if project_id:
         # if project_id is given, validate that collaborators are part of the project
-        project = Project.query.get(data['project_id'])
-        if not project:
+        if not Project.query.get(project_id):
             return {"message": "Project not found"}, 404
-        project_member_ids = [member.employee_id for member in project.members]
+        project_member_ids = project_member_id_set(project_id)
         for cid in collaborators_ids:
             if cid not in project_member_ids:
-                staff_obj = Staff.query.get(cid)
-                display = staff_obj.employee_name if staff_obj else f"Employee #{cid}"
-                return {"message": f"'{display}' has to be added as a project member first!"}, 400
+                return {"message": f"'{staff[cid].employee_name}' has to be added as a project member first!"}, 400
     else:
         # if no project_id, validate that collaborators are in the same dept (lonely tasks)
-        dept_staff_ids = [staff.employee_id for staff in Staff.query.filter_by(department=dept).all()]
         for cid in collaborators_ids:
-            if cid not in dept_staff_ids:
+            if staff[cid].department != dept:
                 return {"message": f"Collaborator {cid} is not in the same department"}, 400
-    
-    # Resolve final owner: allow privileged roles to assign owner; otherwise default to current user
-    can_assign = (role or '').lower() in ['manager', 'hr', 'senior manager', 'senior director']
-    intended_owner_id = None
-    if can_assign and 'owner' in data and isinstance(data['owner'], int):
-        if Staff.query.get(data['owner']):
-            intended_owner_id = data['owner']
+
+    intended_owner_id = requested_owner_id if requested_owner_id in staff else None
 
     # If project specified and intended owner provided, ensure owner is a project member
-    if data.get('project_id') and intended_owner_id:
-        project = Project.query.get(data['project_id'])
-        if not project:
-            return {"message": "Project not found"}, 404
-        project_member_ids = [member.employee_id for member in project.members]
+    if project_id and intended_owner_id:
         if intended_owner_id not in project_member_ids:
             return {"message": "Selected owner must be a project member"}, 400
 
@@ -378,7 +634,7 @@ def create_task():
     if final_owner_id not in collaborators_ids:
         collaborators_ids.append(final_owner_id)
 
-    collaborators = Staff.query.filter(Staff.employee_id.in_(collaborators_ids)).all()
+    collaborators = [staff[cid] for cid in dict.fromkeys(collaborators_ids) if cid in staff]
     
     # handle deadline
     # UTC = timezone.utc
@@ -430,8 +686,6 @@ def create_task():
 
     # db.session.add(new_task)
     # db.session.commit()
-    
-    trigger_deadline_reminder_check()
 
     # id = new_task.task_id
 
@@ -464,7 +718,7 @@ def create_task():
                 for cid in sub_collaborators_ids:
                     if cid not in collaborators_ids:
                         raise ValueError(f"2. Subtask collaborator {cid} is not a collaborator of the parent task")
-                sub_collaborators = Staff.query.filter(Staff.employee_id.in_(sub_collaborators_ids)).all()
+                sub_collaborators = [staff[cid] for cid in dict.fromkeys(sub_collaborators_ids) if cid in staff]
                 
                 # handle deadline
                 print(f"Subtask deadline: {subtask['deadline']}, Parent deadline: {deadline}")
@@ -485,7 +739,7 @@ def create_task():
                     raise ValueError("Invalid subtask priority value")
 
                 # handle status
-                sub_owner_role = Staff.query.get(sub_owner).role.lower()
+                sub_owner_role = staff[sub_owner].role.lower()
                 sub_status = 'ongoing' if sub_owner_role == 'staff' else 'unassigned'
 
                 # create subtask object
@@ -504,16 +758,460 @@ def create_task():
                 # set timestamps based on status
                 set_timestamps_by_status(new_subtask, None, sub_status)
                 db.session.add(new_subtask)
-        db.session.commit()
 
         # Trigger immediate deadline reminder check for newly created task
-        trigger_deadline_reminder_check()
+        trigger_deadline_reminder_check(id)
+        db.session.commit()
 
         return {"message": "Task created", "task_id": id}, 201
     except ValueError as ve:
         db.session.rollback()
         return {"message": str(ve)}, 400
 
+# ------------------ Bulk import ------------------
+MAX_BULK_TASKS = 500  # top-level rows per /tasks/bulk request
+BULK_CSV_COLUMNS = ['title', 'description', 'deadline', 'priority', 'project_id', 'owner', 'collaborators', 'recurrence', 'parent']
+ASSIGNING_ROLES = ['manager', 'hr', 'senior manager', 'senior director']
+
+def _csv_int(value, field):
+    value = (value or '').strip()
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{field} must be an integer")
+
+def parse_bulk_csv(text):
+    """
+    CSV rows -> create_task-shaped dicts. Subtasks are rows whose `parent` column names the
+    title of a task row in the same file. Returns (items, errors); each item/subtask carries
+    its CSV line number under '_row'.
+    """
+    reader = csv.DictReader(io.StringIO(text))
+    missing = [c for c in ('title', 'description', 'deadline', 'priority') if c not in (reader.fieldnames or [])]
+    if missing:
+        return [], [{"row": 1, "message": f"Missing CSV columns: {', '.join(missing)}"}]
+
+    items, errors, children = [], [], []
+    for line, row in enumerate(reader, start=2):
+        try:
+            item = {
+                '_row': line,
+                'title': (row.get('title') or '').strip(),
+                'description': (row.get('description') or '').strip(),
+                'deadline': (row.get('deadline') or '').strip(),
+                'priority': _csv_int(row.get('priority'), 'priority'),
+                'collaborators': [int(c) for c in re.split(r'[;\s]+', (row.get('collaborators') or '').strip()) if c],
+            }
+            for field in ('project_id', 'owner', 'recurrence'):
+                value = _csv_int(row.get(field), field)
+                if value is not None:
+                    item[field] = value
+        except ValueError as e:
+            message = str(e) if 'must be' in str(e) else "collaborators must be employee ids separated by ';'"
+            errors.append({"row": line, "message": message})
+            continue
+        parent = (row.get('parent') or '').strip()
+        if parent:
+            children.append((parent, item))
+        else:
+            items.append(item)
+
+    by_title = {item['title']: item for item in items}
+    for parent, item in children:
+        if parent not in by_title:
+            errors.append({"row": item['_row'], "message": f"Parent task '{parent}' is not in this file"})
+            continue
+        by_title[parent].setdefault('subtasks', []).append(item)
+    return items, errors
+
+def validate_bulk_task(item, ctx):
+    """
+    Same rules as create_task, checked against the batch-wide prefetch in ctx.
+    Returns (errors, plan): errors are {"message"[, "subtask"]} dicts, plan holds the Task
+    fields, collaborator ids and subtask plans.
+    """
+    messages = []
+    if not isinstance(item, dict):
+        return [{"message": "Row must be an object"}], None
+    if any(f not in item for f in ('title', 'description', 'deadline', 'priority')):
+        return [{"message": "Missing required fields"}], None
+
+    title = item['title']
+    if not isinstance(title, str) or not title.strip() or not isinstance(item['description'], str) or not item['description'].strip():
+        messages.append("Title and description cannot be empty")
+    elif title in ctx['open_titles']:
+        messages.append("Task with this title already exists")
+    elif ctx['batch_titles'].get(title, 0) > 1:
+        messages.append("Title appears more than once in this batch")
+
+    if not isinstance(item['priority'], int) or item['priority'] not in range(1, 11):
+        messages.append("Invalid priority value")
+
+    deadline = None
+    try:
+        deadline = convert_datetime(item['deadline'])
+        if deadline.replace(tzinfo=UTC) <= datetime.now(UTC):
+            messages.append("Deadline must be in the future")
+    except ValueError as e:
+        messages.append(str(e))
+
+    recurrence = item.get('recurrence')
+    if recurrence is not None and (not isinstance(recurrence, int) or recurrence <= 0):
+        messages.append("Recurrence must be a positive integer")
+
+    staff = ctx['staff']
+    project_id = item.get('project_id')
+    collaborators_ids = list(item.get('collaborators') or [])
+    for cid in collaborators_ids:
+        if cid not in staff:
+            messages.append(f"Collaborator {cid} not found")
+    member_ids = None
+    if project_id:
+        if project_id not in ctx['projects']:
+            messages.append("Project not found")
+        else:
+            member_ids = ctx['members'].get(project_id, set())
+            for cid in collaborators_ids:
+                if cid in staff and cid not in member_ids:
+                    messages.append(f"'{staff[cid].employee_name}' has to be added as a project member first!")
+    else:
+        for cid in collaborators_ids:
+            if cid in staff and staff[cid].department != ctx['dept']:
+                messages.append(f"Collaborator {cid} is not in the same department")
+
+    owner_id = ctx['eid']
+    requested_owner = item.get('owner')
+    if ctx['can_assign'] and isinstance(requested_owner, int) and requested_owner in staff:
+        if member_ids is not None and requested_owner not in member_ids:
+            messages.append("Selected owner must be a project member")
+        owner_id = requested_owner
+    if owner_id not in collaborators_ids:
+        collaborators_ids.append(owner_id)
+
+    errors = [{"message": m} for m in messages]
+    subtask_plans = []
+    for j, subtask in enumerate(item.get('subtasks') or []):
+        sub_errors, sub_plan = validate_bulk_subtask(subtask, deadline, collaborators_ids, project_id, ctx)
+        for message in sub_errors:
+            # CSV subtasks are their own rows; JSON ones are addressed as row + subtask index
+            if isinstance(subtask, dict) and '_row' in subtask:
+                errors.append({"row": subtask['_row'], "message": message})
+            else:
+                errors.append({"subtask": j, "message": message})
+        subtask_plans.append(sub_plan)
+
+    if errors:
+        return errors, None
+
+    status = 'ongoing' if ctx['role'] == 'staff' else 'unassigned'
+    return [], {
+        'fields': {
+            'title': title,
+            'description': item['description'],
+            'attachment': json.dumps(item.get('attachments', [])),
+            'deadline': deadline,
+            'project_id': project_id,
+            'priority': item['priority'],
+            'owner': owner_id,
+            'status': status,
+            'recurrence': recurrence
+        },
+        'collaborators': list(dict.fromkeys(collaborators_ids)),
+        'subtasks': subtask_plans
+    }
+
+def validate_bulk_subtask(subtask, parent_deadline, parent_collaborators, project_id, ctx):
+    if not isinstance(subtask, dict):
+        return ["Subtask must be an object"], None
+    if any(f not in subtask for f in ('title', 'description', 'deadline', 'priority')):
+        return ["Missing required fields in subtask"], None
+
+    errors = []
+    if not str(subtask['title']).strip() or not str(subtask['description']).strip():
+        errors.append("Subtask title and description cannot be empty")
+    if not isinstance(subtask['priority'], int) or subtask['priority'] not in range(1, 11):
+        errors.append("Invalid subtask priority value")
+
+    sub_owner = subtask.get('owner', ctx['eid'])
+    if sub_owner not in parent_collaborators:
+        errors.append(f"Subtask owner {sub_owner} is not a collaborator of the parent task")
+    sub_collaborators = list(subtask.get('collaborators') or [])
+    if ctx['eid'] not in sub_collaborators:
+        sub_collaborators.append(ctx['eid'])
+    for cid in sub_collaborators:
+        if cid not in parent_collaborators:
+            errors.append(f"Subtask collaborator {cid} is not a collaborator of the parent task")
+
+    sub_deadline = None
+    try:
+        sub_deadline = convert_datetime(subtask['deadline'])
+        if sub_deadline.replace(tzinfo=UTC) <= datetime.now(UTC):
+            errors.append("Subtask deadline must be in the future")
+        elif parent_deadline and sub_deadline > parent_deadline:
+            errors.append("Subtask deadline cannot be after parent task deadline")
+    except ValueError as e:
+        errors.append(str(e))
+
+    if errors:
+        return errors, None
+    owner = ctx['staff'].get(sub_owner)
+    sub_status = 'ongoing' if owner and owner.role.lower() == 'staff' else 'unassigned'
+    return [], {
+        'fields': {
+            'title': subtask['title'],
+            'description': subtask['description'],
+            'attachment': json.dumps(subtask.get('attachments', [])),
+            'deadline': sub_deadline,
+            'project_id': project_id,
+            'priority': subtask['priority'],
+            'owner': sub_owner,
+            'status': sub_status
+        },
+        'collaborators': list(dict.fromkeys(sub_collaborators))
+    }
+
+def creation_timestamps(status):
+    """start/completed dates a brand-new task gets, for rows inserted without the ORM"""
+    holder = SimpleNamespace(start_date=None, completed_date=None)
+    set_timestamps_by_status(holder, None, status)
+    return {'start_date': holder.start_date, 'completed_date': holder.completed_date}
+
+def notify_tasks_created(created, actor_id):
+    """One event for a whole import; the notification service fans it out per recipient"""
+    enqueue_notification('/api/events/tasks-created', {'actor_id': actor_id, 'tasks': created})
+
+@app.route('/tasks/bulk', methods=['POST'])
+def create_tasks_bulk():
+    """
+    Import many tasks (with subtasks) at once: a JSON array of create_task payloads, or CSV
+    (text/csv body or a multipart 'file') with columns BULK_CSV_COLUMNS.
+    All rows are validated against shared lookups; if any row fails nothing is written and
+    the per-row errors are returned, otherwise everything is inserted in one transaction.
+    """
+    if 'employee_id' not in session:
+        return {"message": "Unauthorized"}, 401
+    eid = session['employee_id']
+    role = session['role']
+    dept = session['department']
+
+    errors = []
+    if request.mimetype == 'text/csv' or 'file' in request.files:
+        upload = request.files.get('file')
+        raw = upload.read() if upload else request.get_data()
+        try:
+            text = raw.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            return {"message": "CSV must be UTF-8"}, 400
+        items, errors = parse_bulk_csv(text)
+    else:
+        items = request.get_json(silent=True)
+        if not isinstance(items, list):
+            return {"message": "Expected a JSON array of tasks or a CSV file"}, 400
+        for i, item in enumerate(items):
+            if isinstance(item, dict):
+                item['_row'] = i
+
+    if not items and not errors:
+        return {"message": "No tasks to import"}, 400
+    if len(items) > MAX_BULK_TASKS:
+        return {"message": f"At most {MAX_BULK_TASKS} tasks per import"}, 400
+
+    # prefetch everything the batch refers to in a fixed number of queries
+    rows = [item for item in items if isinstance(item, dict)]
+    referenced_ids = {eid}
+    project_ids = set()
+    titles = []
+    for item in rows:
+        referenced_ids.update(c for c in item.get('collaborators') or [] if isinstance(c, int))
+        if isinstance(item.get('owner'), int):
+            referenced_ids.add(item['owner'])
+        if isinstance(item.get('project_id'), int):
+            project_ids.add(item['project_id'])
+        if isinstance(item.get('title'), str):
+            titles.append(item['title'])
+        for subtask in item.get('subtasks') or []:
+            if isinstance(subtask, dict) and isinstance(subtask.get('owner'), int):
+                referenced_ids.add(subtask['owner'])
+
+    open_titles = set()
+    if titles:
+        open_titles = {t for (t,) in db.session.query(Task.title).filter(
+            Task.title.in_(set(titles)), Task.status.in_(['ongoing', 'unassigned'])).all()}
+    members = {}
+    if project_ids:
+        for pid, staff_id in db.session.query(project_members.c.project_id, project_members.c.staff_id).filter(
+                project_members.c.project_id.in_(project_ids)).all():
+            members.setdefault(pid, set()).add(staff_id)
+    batch_titles = {}
+    for t in titles:
+        batch_titles[t] = batch_titles.get(t, 0) + 1
+
+    ctx = {
+        'eid': eid,
+        'role': role,
+        'dept': dept,
+        'can_assign': (role or '').lower() in ASSIGNING_ROLES,
+        'staff': staff_by_ids(referenced_ids),
+        'projects': {p.id for p in Project.query.filter(Project.id.in_(project_ids)).all()} if project_ids else set(),
+        'members': members,
+        'open_titles': open_titles,
+        'batch_titles': batch_titles
+    }
+
+    plans = []
+    for i, item in enumerate(items):
+        row = item.get('_row', i) if isinstance(item, dict) else i
+        item_errors, plan = validate_bulk_task(item, ctx)
+        for err in item_errors:
+            err.setdefault("row", row)
+            errors.append(err)
+        plans.append((row, plan))
+
+    if errors:
+        return {"message": "Validation failed, nothing was imported", "errors": errors}, 400
+
+    # tasks and subtasks go in through the session, one flush per level, so every row carries the id
+    # the database generated for it; collaborator links are one executemany
+    try:
+        parents = [Task(collaborators=[], **plan['fields']) for row, plan in plans]
+        for task in parents:
+            set_timestamps_by_status(task, None, task.status)
+        db.session.add_all(parents)
+        db.session.flush()
+        parent_ids = [task.task_id for task in parents]
+
+        subtasks = {
+            parent_id: [Task(collaborators=[], parent_id=parent_id, **sub_plan['fields']) for sub_plan in plan['subtasks']]
+            for parent_id, (row, plan) in zip(parent_ids, plans)
+        }
+        new_subtasks = [subtask for subs in subtasks.values() for subtask in subs]
+        for subtask in new_subtasks:
+            set_timestamps_by_status(subtask, None, subtask.status)
+        if new_subtasks:
+            db.session.add_all(new_subtasks)
+            db.session.flush()
+        subtask_ids = {parent_id: [subtask.task_id for subtask in subs] for parent_id, subs in subtasks.items()}
+
+        links = []
+        created_events = []
+        for parent_id, (row, plan) in zip(parent_ids, plans):
+            links += [{'task_id': parent_id, 'staff_id': sid} for sid in plan['collaborators']]
+            created_events.append({'task_id': parent_id, 'title': plan['fields']['title'], 'parent_id': None,
+                                   'owner': plan['fields']['owner'], 'collaborators': plan['collaborators']})
+            for sub_id, sub_plan in zip(subtask_ids[parent_id], plan['subtasks']):
+                links += [{'task_id': sub_id, 'staff_id': sid} for sid in sub_plan['collaborators']]
+                created_events.append({'task_id': sub_id, 'title': sub_plan['fields']['title'], 'parent_id': parent_id,
+                                       'owner': sub_plan['fields']['owner'], 'collaborators': sub_plan['collaborators']})
+        if links:
+            db.session.execute(Task_Collaborators.insert(), links)
+            touch_task_views(staff_ids={link['staff_id'] for link in links})
+        notify_tasks_created(created_events, eid)
+        trigger_deadline_reminder_check()
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error in create_tasks_bulk: {e}")
+        return {"message": "Import failed, nothing was imported"}, 500
+
+    created = [
+        {"row": row, "task_id": parent_id, "subtask_ids": subtask_ids[parent_id]}
+        for parent_id, (row, plan) in zip(parent_ids, plans)
+    ]
+
+    return {"message": f"{len(created)} tasks created", "created": created}, 201
+
+def timeline_task_filters(role, employee_id, window_from=None, window_to=None):
+    """WHERE criteria shared by the JSON and NDJSON timeline paths (window_to is the raw ?to= value)"""
+    filters = []
+    if role == 'staff':
+        # Staff can only see their own tasks and tasks they collaborate on
+        filters.append(visible_to_employee(employee_id))
+    if window_from:
+        filters.append(Task.deadline >= window_from)
+    to_filter = window_end_filter(Task.deadline, window_to)
+    if to_filter is not None:
+        filters.append(to_filter)
+    return filters
+
+def timeline_task_dict(task_id, title, description, status, priority, deadline, owner, collaborators, project_id):
+    return {
+        "id": task_id,
+        "title": title,
+        "description": description,
+        "status": status,
+        "priority": priority,
+        "due_date": deadline.isoformat() if deadline else None,
+        "owner": owner,
+        "collaborators": collaborators,
+        "project_id": project_id
+    }
+
+def timeline_member_dict(member):
+    return {
+        "employee_id": member.employee_id,
+        "employee_name": member.employee_name,
+        "role": member.role,
+        "department": member.department,
+        "team": member.team
+    }
+
+TIMELINE_STREAM_BATCH = 500
+
+def stream_project_timeline(project_id, filters):
+    """
+    NDJSON timeline: a header record, one "task" record per task, then "member" and
+    "project_date_range" trailer records. Tasks come from a single task LEFT JOIN task_collaborators
+    query read with yield_per, grouped by task_id as rows arrive, so memory does not grow with the project.
+    """
+    yield json.dumps({"type": "timeline", "project_id": project_id}) + "\n"
+
+    rows = (db.session.query(Task.task_id, Task.title, Task.description, Task.status, Task.priority,
+                             Task.deadline, Task.owner, Task.project_id, Task_Collaborators.c.staff_id)
+            .outerjoin(Task_Collaborators, Task_Collaborators.c.task_id == Task.task_id)
+            .filter(Task.project_id == project_id, *filters)
+            .order_by(Task.task_id, Task_Collaborators.c.staff_id)
+            .execution_options(yield_per=TIMELINE_STREAM_BATCH))
+
+    def task_record(row, collaborators):
+        return json.dumps({"type": "task", **timeline_task_dict(
+            row.task_id, row.title, row.description, row.status, row.priority,
+            row.deadline, row.owner, collaborators, row.project_id)}) + "\n"
+
+    earliest = latest = None
+    current = None
+    collaborators = []
+    try:
+        for row in rows:
+            if current is not None and row.task_id != current.task_id:
+                yield task_record(current, collaborators)
+                collaborators = []
+            if current is None or row.task_id != current.task_id:
+                current = row
+                if row.deadline:
+                    earliest = row.deadline if earliest is None else min(earliest, row.deadline)
+                    latest = row.deadline if latest is None else max(latest, row.deadline)
+            if row.staff_id is not None:
+                collaborators.append(row.staff_id)
+        if current is not None:
+            yield task_record(current, collaborators)
+
+        project = Project.query.get(project_id)
+        if project:
+            for member in project.members:
+                yield json.dumps({"type": "member", **timeline_member_dict(member)}) + "\n"
+
+        yield json.dumps({
+            "type": "project_date_range",
+            "start_date": earliest.isoformat() if earliest else None,
+            "end_date": latest.isoformat() if latest else None
+        }) + "\n"
+    except Exception as e:
+        # headers are already sent, so report the failure in-band
+        print(f"Error streaming project timeline: {e}")
+        yield json.dumps({"type": "error", "error": "Internal server error"}) + "\n"
+
 @app.route("/projects/<int:project_id>/timeline", methods=["GET"])
 def get_project_timeline(project_id):
     """
@@ -529,10 +1227,28 @@ def get_project_timeline(project_id):
         if not current_user_id:
             return {"error": "Unauthorized"}, 401
         
-        # Get project tasks
-        project_tasks = Task.query.filter_by(project_id=project_id).all()
+        # Optional deadline window: ?from=&to= (ISO 8601), served by ix_Task_deadline
+        try:
+            window_from = parse_window_bound(request.args.get('from'))
+            filters = timeline_task_filters(current_role, current_user_id, window_from, request.args.get('to'))
+        except ValueError:
+            return {"error": "Invalid from/to date"}, 400
+
+        if request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson']) == 'application/x-ndjson':
+            # decided before the stream starts, with the same outcome as the JSON path below
+            if (db.session.get(Project, project_id) is None
+                    and db.session.query(Task.query.filter_by(project_id=project_id).exists()).scalar()):
+                return {"error": "Project not found"}, 404
+            return Response(
+                stream_with_context(stream_project_timeline(project_id, filters)),
+                mimetype='application/x-ndjson'
+            )
+
+        # Get project tasks; staff only see tasks they own or collaborate on (filtered in SQL)
+        project_query = Task.query.filter_by(project_id=project_id)
+        project_tasks = project_query.filter(*filters).all()
         
-        if not project_tasks:
+        if not project_tasks and not db.session.query(project_query.exists()).scalar():
             return {
                 "project_id": project_id,
                 "tasks": [],
@@ -544,41 +1260,17 @@ def get_project_timeline(project_id):
         if not project:
             return {"error": "Project not found"}, 404
         team_members = project.members.all()
-        
+        collaborators_by_task = collaborator_ids_by_task([task.task_id for task in project_tasks])
+
         # Convert tasks to timeline format
-        timeline_tasks = []
-        for task in project_tasks:
-            # Filter tasks based on role and permissions
-            if current_role == 'staff':
-                # Staff can only see their own tasks and team tasks
-                if task.owner != current_user_id:
-                    # Check if they're a collaborator
-                    is_collaborator = any(collab.employee_id == current_user_id for collab in task.collaborators)
-                    if not is_collaborator:
-                        continue
-            
-            timeline_tasks.append({
-                "id": task.task_id,
-                "title": task.title,
-                "description": task.description,
-                "status": task.status,
-                "priority": task.priority,
-                "due_date": task.deadline.isoformat() if task.deadline else None,
-                "owner": task.owner,
-                "collaborators": [collab.employee_id for collab in task.collaborators],
-                "project_id": task.project_id
-            })
+        timeline_tasks = [
+            timeline_task_dict(task.task_id, task.title, task.description, task.status, task.priority,
+                               task.deadline, task.owner, collaborators_by_task[task.task_id], task.project_id)
+            for task in project_tasks
+        ]
         
         # Convert team members to timeline format
-        timeline_members = []
-        for member in team_members:
-            timeline_members.append({
-                "employee_id": member.employee_id,
-                "employee_name": member.employee_name,
-                "role": member.role,
-                "department": member.department,
-                "team": member.team
-            })
+        timeline_members = [timeline_member_dict(member) for member in team_members]
         
         # Calculate project date range (first task to last task)
         project_date_range = None
@@ -604,6 +1296,137 @@ def get_project_timeline(project_id):
         return {"error": "Internal server error"}, 500
 
 
+# ------------------ Recurrence Engine ------------------
+# Marking a recurring task done only records when its next occurrence is due (next_recurrence_at).
+# The engine materializes due occurrences - the task plus copies of its subtasks and collaborators -
+# in the background, a batch of series per transaction, looking at most RECURRENCE_LOOKAHEAD_DAYS ahead.
+
+RECURRENCE_BATCH_SIZE = int(os.getenv('RECURRENCE_BATCH_SIZE', 100))
+RECURRENCE_LOOKAHEAD_DAYS = int(os.getenv('RECURRENCE_LOOKAHEAD_DAYS', 30))
+RECURRENCE_INTERVAL_SECONDS = int(os.getenv('RECURRENCE_INTERVAL_SECONDS', 60))
+# no scheduler runs under TESTING, so occurrences are materialized right after the status commit
+RECURRENCE_INLINE = bool(os.getenv('TESTING'))
+
+def schedule_recurrence(task):
+    """Precompute when the next occurrence of task is due; None unless it is a done recurring task"""
+    if task.status == 'done' and task.recurrence and task.completed_date:
+        # new deadline is from completion date; completed_date is server-local, deadlines are naive UTC
+        completed_utc = task.completed_date.astimezone(timezone.utc).replace(tzinfo=None)
+        task.next_recurrence_at = completed_utc + timedelta(days=int(task.recurrence))
+    else:
+        task.next_recurrence_at = None
+
+def materialize_recurrence_batch(horizon, batch_size=None):
+    """Create the next occurrence for up to batch_size series due by horizon, in one transaction.
+    Returns how many series were handled (0 once nothing is due)."""
+    series = (Task.query
+              .filter(Task.next_recurrence_at.isnot(None), Task.next_recurrence_at <= horizon)
+              .order_by(Task.next_recurrence_at, Task.task_id)
+              .limit(batch_size or RECURRENCE_BATCH_SIZE)
+              .with_for_update(skip_locked=True)
+              .all())
+    if not series:
+        db.session.rollback()
+        return 0
+
+    source_ids = [t.task_id for t in series]
+    # a completed task only ever gets one occurrence, even if it is reopened and done again
+    already = {tid for (tid,) in db.session.query(Task.recurs_from_id).filter(Task.recurs_from_id.in_(source_ids))}
+    pending = [t for t in series if t.task_id not in already]
+
+    subtasks_by_parent = {t.task_id: [] for t in pending}
+    with_subtasks = [t.task_id for t in pending if t.subtask_count]
+    if with_subtasks:
+        for subtask in Task.query.filter(Task.parent_id.in_(with_subtasks)).order_by(Task.task_id):
+            subtasks_by_parent[subtask.parent_id].append(subtask)
+    all_subtasks = [st for subs in subtasks_by_parent.values() for st in subs]
+    collaborators = collaborator_ids_by_task([t.task_id for t in pending] + [st.task_id for st in all_subtasks])
+    # occurrences start as the owner would have created them: ongoing for staff, unassigned otherwise
+    owners = staff_by_ids({t.owner for t in pending} | {st.owner for st in all_subtasks})
+
+    def occurrence_status(owner_id):
+        owner = owners.get(owner_id)
+        return 'ongoing' if owner and (owner.role or '').lower() == 'staff' else 'unassigned'
+
+    def copy_row(task, **fields):
+        status = occurrence_status(task.owner)
+        row = {
+            'title': task.title, 'description': task.description, 'attachment': task.attachment,
+            'priority': task.priority, 'project_id': task.project_id, 'owner': task.owner,
+            'status': status, 'recurrence': None, 'parent_id': None, 'recurs_from_id': None,
+            **creation_timestamps(status)
+        }
+        row.update(fields)
+        return row
+
+    task_table = Task.__table__
+    if pending:
+        db.session.execute(task_table.insert(), [
+            copy_row(t, deadline=t.next_recurrence_at, recurrence=t.recurrence, recurs_from_id=t.task_id)
+            for t in pending
+        ])
+        new_id_by_source = dict(db.session.query(Task.recurs_from_id, Task.task_id)
+                                .filter(Task.recurs_from_id.in_([t.task_id for t in pending])).all())
+
+        subtask_rows = []
+        for t in pending:
+            for subtask in subtasks_by_parent[t.task_id]:
+                # new subtask deadline is offset by same amount as parent task
+                offset = (t.deadline - subtask.deadline) if t.deadline and subtask.deadline else timedelta(0)
+                subtask_rows.append(copy_row(subtask, deadline=t.next_recurrence_at - offset,
+                                             parent_id=new_id_by_source[t.task_id]))
+        new_subtask_ids = {new_id: [] for new_id in new_id_by_source.values()}
+        if subtask_rows:
+            db.session.execute(task_table.insert(), subtask_rows)
+            for task_id, parent_id in db.session.query(Task.task_id, Task.parent_id).filter(
+                    Task.parent_id.in_(list(new_subtask_ids))).order_by(Task.task_id).all():
+                new_subtask_ids[parent_id].append(task_id)
+
+        links = []
+        for t in pending:
+            new_id = new_id_by_source[t.task_id]
+            links += [{'task_id': new_id, 'staff_id': sid} for sid in collaborators[t.task_id]]
+            for new_sub_id, subtask in zip(new_subtask_ids[new_id], subtasks_by_parent[t.task_id]):
+                links += [{'task_id': new_sub_id, 'staff_id': sid} for sid in collaborators[subtask.task_id]]
+        if links:
+            db.session.execute(Task_Collaborators.insert(), links)
+            touch_task_views(staff_ids={link['staff_id'] for link in links})
+
+    db.session.execute(task_table.update().where(task_table.c.task_id.in_(source_ids)).values(next_recurrence_at=None))
+    db.session.commit()
+    if pending:
+        print(f"[Recurrence] Created {len(pending)} task occurrences")
+    return len(series)
+
+def materialize_recurrences(now=None, batch_size=None):
+    """Work through every series due within the look-ahead window, one batch at a time"""
+    # next_recurrence_at is a naive UTC deadline, so the horizon is too
+    horizon = (now or datetime.now(timezone.utc).replace(tzinfo=None)) + timedelta(days=RECURRENCE_LOOKAHEAD_DAYS)
+    handled = 0
+    while True:
+        try:
+            count = materialize_recurrence_batch(horizon, batch_size)
+        except Exception as e:
+            db.session.rollback()
+            print(f"[Recurrence] Failed to materialize batch: {e}")
+            break
+        if count == 0:
+            break
+        handled += count
+    return handled
+
+def run_recurrence_engine():
+    """Scheduler entry point"""
+    with app.app_context():
+        materialize_recurrences()
+
+def wake_recurrence_engine():
+    """Ask for due occurrences to be materialized now instead of at the next interval"""
+    if RECURRENCE_INLINE:
+        materialize_recurrences()
+    elif scheduler.running:
+        scheduler.modify_job('recurrence_engine', next_run_time=datetime.now())
+
 @app.route("/task/status/<int:task_id>", methods=["PATCH"])
 def update_task_status(task_id):
     # This endpoint only updates task status
@@ -637,73 +1460,130 @@ def update_task_status(task_id):
     # set timestamps based on status
     old_status = curr_task.status
 
-    if new_status == 'done':
-        subtasks = Task.query.filter_by(parent_id=task_id).all()
-        for subtask in subtasks:
-            if subtask.status != 'done':
-                return {"message": "Cannot mark task as done unless all subtasks are done"}, 400
+    if new_status == 'done' and curr_task.open_subtasks:
+        return {"message": "Cannot mark task as done unless all subtasks are done"}, 400
     
     curr_task.status = new_status
     set_timestamps_by_status(curr_task, old_status, new_status)
-    # recurrence update
-    if new_status == 'done' and curr_task.recurrence: # this can only happen if all subtasks are done so dont need to check here
-        # create new task with same details
-        recurrence_days = int(curr_task.recurrence)
-        # new deadline is from completion date
-        new_deadline = curr_task.completed_date + timedelta(days=recurrence_days)
-        new_status = 'unassigned' if role != 'staff' else 'ongoing'
-        new_task = Task(
-            title=curr_task.title,
-            description=curr_task.description,
-            attachment=curr_task.attachment,
-            deadline=new_deadline,
-            project_id=curr_task.project_id,
-            priority=curr_task.priority,
-            owner=curr_task.owner,
-            collaborators=curr_task.collaborators,
-            status=new_status,
-            recurrence=curr_task.recurrence
-        )
-        set_timestamps_by_status(new_task, None, new_status)
-        # comit here first to get new_task id
-        db.session.add(new_task)
-        db.session.flush()  # to get new_task.task_id (maybe not needed)
-        # db.session.commit()
+    # recurrence: the next occurrence is created by the recurrence engine, not on this request
+    if old_status != new_status:
+        schedule_recurrence(curr_task)
+    recurrence_due = curr_task.next_recurrence_at is not None
 
-        id = new_task.task_id
-        #         # need to do subtasks too - subtasks are copied over too
-        subtasks = Task.query.filter_by(parent_id=task_id).all()
-        for subtask in subtasks:
-            # new subtask deadline is offset by same amount as parent task
-            new_subtask_deadline = new_deadline - (curr_task.deadline - subtask.deadline)
-            # owner should be same as original subtask owner
-            new_subtask = Task(
-                title=subtask.title,
-                description=subtask.description,
-                attachment=subtask.attachment,
-                deadline=new_subtask_deadline,
-                project_id=subtask.project_id,
-                parent_id=id,  # link to new parent task
-                priority=subtask.priority,
-                owner=subtask.owner,
-                collaborators=subtask.collaborators,
-                status=new_status
-            )
-            set_timestamps_by_status(new_subtask, None, new_status)
-            db.session.add(new_subtask)
-        # db.session.add(new_task)
-        db.session.commit()
+    # SEND NOTIFICATION IF STATUS CHANGED
+    if old_status != new_status:
+        notify_task_status_updated(task_id, old_status, new_status, eid)
 
     db.session.commit()
 
     # tasks from recurrence
-
-    # SEND NOTIFICATION IF STATUS CHANGED
-    if old_status != new_status:
-        notify_task_status_updated(task_id, old_status, new_status, eid)
+    if recurrence_due:
+        wake_recurrence_engine()
     
     return {"message": "Task status updated"}, 200
 
+MAX_BATCH_STATUS_UPDATES = 500
+TASK_STATUSES = ['unassigned', 'ongoing', 'done', 'under review']
+
+def notify_task_updates_batch(events):
+    """Queue many task-updated events; the relay sends consecutive ones in one batch call.
+
+    Each event carries a snapshot of its task and the actor's name as of this transaction,
+    so the notification service doesn't have to call back for them.
+    """
+    if not events:
+        return
+    snapshots = task_snapshots(e['task_id'] for e in events)
+    # the actor is normally already loaded by the request
+    actor_names = staff_names(e.get('actor_id') for e in events)
+    for e in events:
+        e = dict(e)
+        if e['task_id'] in snapshots:
+            e['task'] = snapshots[e['task_id']]
+        if e.get('actor_id') in actor_names:
+            e['actor_name'] = actor_names[e['actor_id']]
+        enqueue_notification(TASK_UPDATED_PATH, e, task_id=e['task_id'])
+
+@app.route("/tasks/status", methods=["PATCH"])
+def update_task_statuses():
+    """
+    Batch form of PATCH /task/status/<id>: [{task_id, status}, ...]
+    Same rules per item; checks run over the whole batch with set-based queries, and the batch
+    is applied in one transaction only if every item passes (otherwise per-item errors, no changes).
+    """
+    if 'employee_id' not in session:
+        return {"message": "Unauthorized"}, 401
+    eid = session['employee_id']
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, list) or not data:
+        return {"message": "Expected a non-empty JSON array of {task_id, status}"}, 400
+    if len(data) > MAX_BATCH_STATUS_UPDATES:
+        return {"message": f"At most {MAX_BATCH_STATUS_UPDATES} updates per request"}, 400
+
+    errors = []
+    invalid = set()  # indexes that failed shape checks
+    requested = {}  # task_id -> new status (last one wins if a task is listed twice)
+    for i, item in enumerate(data):
+        if not isinstance(item, dict) or not isinstance(item.get('task_id'), int) or 'status' not in item:
+            invalid.add(i)
+            errors.append({"index": i, "message": "Each update needs an integer task_id and a status"})
+        elif item['status'] not in TASK_STATUSES:
+            invalid.add(i)
+            errors.append({"index": i, "task_id": item['task_id'], "message": "Invalid status value"})
+        else:
+            requested[item['task_id']] = item['status']
+
+    task_ids = list(requested)
+    tasks = {t.task_id: t for t in Task.query.filter(Task.task_id.in_(task_ids)).all()} if task_ids else {}
+    # only collaborators can update status: one query for the caller's memberships in the batch
+    allowed = {tid for (tid,) in db.session.query(Task_Collaborators.c.task_id).filter(
+        Task_Collaborators.c.task_id.in_(task_ids), Task_Collaborators.c.staff_id == eid).all()} if task_ids else set()
+
+    # a task can only be done once every subtask is done, counting subtasks opened or done in this same batch
+    open_left = {tid: tasks[tid].open_subtasks for tid, status in requested.items() if status == 'done' and tid in tasks}
+    for tid, status in requested.items():
+        subtask = tasks.get(tid)
+        if subtask is not None and subtask.parent_id in open_left:
+            open_left[subtask.parent_id] += (status != 'done') - (subtask.status != 'done')
+    blocked = {tid for tid, remaining in open_left.items() if remaining > 0}
+
+    for i, item in enumerate(data):
+        if i in invalid:
+            continue
+        task_id = item['task_id']
+        if task_id not in tasks:
+            errors.append({"index": i, "task_id": task_id, "message": "Task not found"})
+        elif task_id not in allowed:
+            errors.append({"index": i, "task_id": task_id, "message": "Only collaborators can update task status"})
+        elif task_id in blocked:
+            errors.append({"index": i, "task_id": task_id, "message": "Cannot mark task as done unless all subtasks are done"})
+
+    if errors:
+        return {"message": "No statuses were updated", "errors": errors}, 400
+
+    changed = []
+    for task_id, new_status in requested.items():
+        task = tasks[task_id]
+        old_status = task.status
+        if old_status == new_status:
+            continue
+        task.status = new_status
+        set_timestamps_by_status(task, old_status, new_status)
+        schedule_recurrence(task)
+        changed.append(task_id)
+    recurrence_due = any(tasks[task_id].next_recurrence_at is not None for task_id in changed)
+    notify_task_updates_batch([
+        {'task_id': task_id, 'changed_fields': ['status'], 'actor_id': eid}
+        for task_id in changed
+    ])
+    db.session.commit()
+
+    if recurrence_due:
+        wake_recurrence_engine()
+
+    return {"message": f"{len(changed)} task statuses updated", "updated": changed}, 200
+
 @app.route("/task/<int:task_id>", methods=["PUT"])
 def update_task(task_id):
     # this endpoint updates task details except status (status will still be given but it will be the same as current status - i think ?)
@@ -788,13 +1668,31 @@ def update_task(task_id):
         }, 403
     # ---------- END NEW ----------
 
-    
+    # prefetch: the project, the subtasks being edited and every staff id referenced by the
+    # task or its subtasks (current collaborators included) in a handful of IN queries;
+    # validation below works off these instead of per-item lookups
+    project = Project.query.get(data['project_id']) if data.get('project_id') is not None else None
+    subtasks_data = data.get('subtasks') or []
+    existing_subtasks = {}
+    edited_subtask_ids = [st['task_id'] for st in subtasks_data if isinstance(st, dict) and 'task_id' in st]
+    if edited_subtask_ids:
+        existing_subtasks = {t.task_id: t for t in Task.query.filter(Task.task_id.in_(edited_subtask_ids)).all()}
+    collaborator_ids = collaborator_ids_by_task([task_id] + edited_subtask_ids)
+    current_collaborator_ids = collaborator_ids[task_id]
+
+    referenced_ids = set(current_collaborator_ids) | set(data.get('collaborators') or []) | {eid, curr_task.owner, data.get('owner')}
+    for st in subtasks_data:
+        if isinstance(st, dict):
+            referenced_ids.add(st.get('owner'))
+            referenced_ids.update(st.get('collaborators') or [])
+    referenced_ids.update(t.owner for t in existing_subtasks.values())
+    staff = staff_by_ids(referenced_ids)
+
     # Allow task owner OR project manager to update task details
     # If updating project_id, allow project manager to attach task to their project
     if curr_task.owner != eid:
         if 'project_id' in data and data['project_id'] is not None:
             # Check if current user is the project manager
-            project = Project.query.get(data['project_id'])
             if not project or project.owner_id != eid:
                 return {"message": "Only task owner or project manager can update task details"}, 403
         else:
@@ -859,7 +1757,9 @@ def update_task(task_id):
             # handle status 
              # status only changes from unassigned to ongoing if owner is staff
              # else remains unchanged
-            new_owner_role = Staff.query.get(data['owner']).role.lower()
+            if data['owner'] not in staff:
+                return {"message": f"Owner {data['owner']} not found"}, 404
+            new_owner_role = staff[data['owner']].role.lower()
             if new_owner_role == 'staff':
                 if curr_task.status == 'unassigned':
                     curr_task.status = 'ongoing'
@@ -873,20 +1773,18 @@ def update_task(task_id):
     if 'project_id' in data and data['project_id'] is not None:
         if curr_task.project_id is None:
             # moving from no project to a project
-            project = Project.query.get(data['project_id'])
             if not project:
                 return {"message": "Project not found"}, 404
-            project_member_ids = [member.employee_id for member in project.members]
+            project_member_ids = project_member_id_set(project.id)
             collaborators_ids = data.get('collaborators', [])
             if collaborators_ids:  # Only validate if collaborators are explicitly provided
                 for cid in collaborators_ids:
                     if cid not in project_member_ids:
-                        staff_obj = Staff.query.get(cid)
-                        display = staff_obj.employee_name if staff_obj else f"Employee #{cid}"
+                        display = staff[cid].employee_name if cid in staff else f"Employee #{cid}"
                         return {"message": f"'{display}' has to be added as a project member first!"}, 400
             else:
                 # If no collaborators provided, preserve existing ones
-                collaborators_ids = [collab.employee_id for collab in curr_task.collaborators]
+                collaborators_ids = list(current_collaborator_ids)
         else:
             # task already has a project; allow if unchanged, reject if changing
             if curr_task.project_id != data['project_id']:
@@ -895,14 +1793,13 @@ def update_task(task_id):
             # use them; otherwise, preserve existing collaborators on the task.
             collaborators_ids = data.get('collaborators')
             if collaborators_ids is None:
-                collaborators_ids = [collab.employee_id for collab in curr_task.collaborators]
+                collaborators_ids = list(current_collaborator_ids)
         
     else:
         # lonely task
         collaborators_ids = data.get('collaborators', [])
-        dept_staff_ids = [staff.employee_id for staff in Staff.query.filter_by(department=dept).all()]
         for cid in collaborators_ids:
-            if cid not in dept_staff_ids:
+            if cid not in staff or staff[cid].department != dept:
                 return {"message": f"Collaborator {cid} is not in the same department"}, 400
             
     # add owner as collaborator
@@ -916,10 +1813,11 @@ def update_task(task_id):
     # Update collaborators in database
     if 'collaborators' in data or 'project_id' in data:
         # print('Updating collaborators to:', collaborators_ids)
-        staff_list = Staff.query.filter(Staff.employee_id.in_(collaborators_ids)).all()
-        curr_task.collaborators = staff_list
+        curr_task.collaborators = [staff[cid] for cid in dict.fromkeys(collaborators_ids) if cid in staff]
 
-    db.session.commit()
+    # flush, not commit: committing here would expire the prefetched rows, and a subtask
+    # validation error below should not leave the parent half-updated
+    db.session.flush()
     # print("updated task collaborators are:", [s.employee_id for s in curr_task.collaborators])
 
     # handle subtasks
@@ -931,12 +1829,16 @@ def update_task(task_id):
 
     id = curr_task.task_id
 
+    # subtask edits are diffed in memory against the prefetched rows; collaborator links,
+    # notifications and deadline-log clears are collected and applied once after the loop
+    subtask_links = {}  # subtask_id -> new collaborator ids, only for subtasks whose set changed
+    subtask_events = []
+
     if 'subtasks' in data:
-        subtasks_data = data['subtasks']
         for subtask in subtasks_data:
             if 'task_id' in subtask: # update existing subtask
                 subtask_id = subtask['task_id']
-                existing_subtask = Task.query.get(subtask_id)
+                existing_subtask = existing_subtasks.get(subtask_id)
                 if existing_subtask is None:
                     return {"message": f"Subtask with id {subtask_id} not found"}, 404
                 print("curr_task.owner", curr_task.owner, "existing_subtask.owner", existing_subtask.owner, "eid", eid)
@@ -990,8 +1892,10 @@ def update_task(task_id):
                 # Owner
                 if 'owner' in subtask:
                     new_owner = subtask['owner']
-                    new_owner_role = Staff.query.get(new_owner).role.lower()
-                    existing_subtask_owner_role = Staff.query.get(existing_subtask.owner).role.lower()
+                    if new_owner not in staff:
+                        return {"message": f"Subtask owner {new_owner} not found"}, 404
+                    new_owner_role = staff[new_owner].role.lower()
+                    existing_subtask_owner_role = staff[existing_subtask.owner].role.lower()
                     if new_owner != existing_subtask.owner:  # assigning subtask (also only downwards)
                         if existing_subtask_owner_role == 'staff':
                             return {"message": "Staff cannot assign tasks"}, 400
@@ -1011,46 +1915,16 @@ def update_task(task_id):
                         if cid not in collaborators_ids:
                             return {"message": f"4. Subtask collaborator {cid} is not a collaborator of the parent task"}, 400
                     # Compare sets to detect real change
-                    before_ids = {s.employee_id for s in existing_subtask.collaborators}
-                    after_ids = set(requested_collab_ids)
+                    before_ids = set(collaborator_ids.get(subtask_id, []))
+                    after_ids = {cid for cid in requested_collab_ids if cid in staff}
                     if before_ids != after_ids:
                         changed.append('collaborators')
-                    sub_collaborators = Staff.query.filter(Staff.employee_id.in_(requested_collab_ids)).all()
-                    existing_subtask.collaborators = sub_collaborators
+                        subtask_links[subtask_id] = list(dict.fromkeys(cid for cid in requested_collab_ids if cid in staff))
 
-                # Emit notification event for subtask updates only if there are actual changes
+                # Queue notification event for subtask updates only if there are actual changes
                 if changed:
-                    try:
-                        requests.post(
-                            f'{NOTIFICATION_SERVICE_URL}/api/events/task-updated',
-                            json={
-                                'task_id': subtask_id,
-                                'changed_fields': changed,
-                                'actor_id': eid
-                            },
-                            timeout=3
-                        )
-                        
-                        # If deadline was changed, clear old deadline logs and trigger new check
-                        if 'deadline' in changed:
-                            try:
-                                # Clear old deadline logs
-                                clear_resp = requests.delete(
-                                    f'{NOTIFICATION_SERVICE_URL}/api/internal/clear-deadline-logs/{subtask_id}',
-                                    timeout=2
-                                )
-                                if clear_resp.ok:
-                                    print(f"[Notification] Cleared deadline logs for subtask {subtask_id}")
-                                
-                                # Trigger immediate deadline reminder check
-                                trigger_deadline_reminder_check()
-                            except Exception as e:
-                                print(f"[Notification] Error clearing subtask deadline logs: {e}")
-                        
-                    except Exception as e:
-                        print(f"[Notification] Failed to send subtask update notification: {e}")
-                
-                
+                    subtask_events.append({'task_id': subtask_id, 'changed_fields': changed, 'actor_id': eid})
+
             else: # create new subtask
 
                 # TODO: only task owner can create subtasks
@@ -1077,7 +1951,7 @@ def update_task(task_id):
                 for cid in sub_collaborators_ids:
                     if cid not in collaborators_ids:
                         return {"message": f" 5. Subtask collaborator {cid} is not a collaborator of the parent task"}, 400
-                sub_collaborators = Staff.query.filter(Staff.employee_id.in_(sub_collaborators_ids)).all()
+                sub_collaborators = [staff[cid] for cid in dict.fromkeys(sub_collaborators_ids) if cid in staff]
                 
                 # handle deadline
                 sub_deadline = convert_datetime(subtask['deadline'])
@@ -1108,13 +1982,23 @@ def update_task(task_id):
                     status=sub_status
                 )
                 db.session.add(new_subtask)
-        db.session.commit()
 
+    # replace collaborator links of edited subtasks: one delete, one executemany insert
+    if subtask_links:
+        db.session.execute(Task_Collaborators.delete().where(Task_Collaborators.c.task_id.in_(list(subtask_links))))
+        link_rows = [{'task_id': sid, 'staff_id': cid} for sid, cids in subtask_links.items() for cid in cids]
+        if link_rows:
+            db.session.execute(Task_Collaborators.insert(), link_rows)
+        touch_task_views(task_ids=[task_id, *subtask_links],
+                         staff_ids={cid for sid in subtask_links for cid in collaborator_ids[sid]} |
+                                   {row['staff_id'] for row in link_rows})
+
+    deadline_changed = old_deadline != curr_task.deadline
+
+    events = []
     # SEND NOTIFICATION IF DEADLINE CHANGED
-    if old_deadline != curr_task.deadline:
-        notify_due_date_changed(task_id, old_deadline, curr_task.deadline, eid)
-        # Trigger deadline reminder check for updated deadline
-        trigger_deadline_reminder_check()
+    if deadline_changed:
+        events.append({'task_id': task_id, 'changed_fields': ['deadline'], 'actor_id': eid})
     
     # SEND NOTIFICATION IF OTHER TASK FIELDS CHANGED
     if main_changes:
@@ -1124,19 +2008,19 @@ def update_task(task_id):
             changed_field_names.remove('deadline')
         
         if changed_field_names:
-            try:
-                requests.post(
-                    f'{NOTIFICATION_SERVICE_URL}/api/events/task-updated',
-                    json={
-                        'task_id': task_id,
-                        'changed_fields': changed_field_names,
-                        'actor_id': data.get('actor_id', eid)
-                    },
-                    timeout=3
-                )
-                print(f"[Notification] Sent task update notification for fields: {changed_field_names}")
-            except Exception as e:
-                print(f"[Notification] Failed to send task update notification: {e}")
+            events.append({'task_id': task_id, 'changed_fields': changed_field_names, 'actor_id': data.get('actor_id', eid)})
+
+    events += subtask_events
+    notify_task_updates_batch(events)
+
+    # deadline reminders restart for every task whose deadline moved
+    deadline_task_ids = ([task_id] if deadline_changed else []) + \
+        [e['task_id'] for e in subtask_events if 'deadline' in e['changed_fields']]
+    if deadline_task_ids:
+        clear_deadline_logs(deadline_task_ids)
+        trigger_deadline_reminder_check(task_id)
+
+    db.session.commit()
 
     return {"message": "Task updated"}, 200
 
@@ -1154,13 +2038,18 @@ def upload_attachment():
     
     if file and allowed_file(file.filename):
         filename = secure_filename(file.filename)
-        unique_filename = f"{int(time.time())}_{filename}"
-        
+
         upload_dir = app.config['UPLOAD_FOLDER']
         os.makedirs(upload_dir, exist_ok=True)
-        
-        filepath = os.path.join(upload_dir, unique_filename)
-        file.save(filepath)
+
+        # stream to a temp file while hashing, then rename to a content-addressed name
+        digest = hashlib.sha256()
+        tmp_path = os.path.join(upload_dir, f".{uuid.uuid4().hex}.part")
+        with open(tmp_path, 'wb') as out:
+            for chunk in iter(lambda: file.stream.read(ATTACHMENT_CHUNK_SIZE), b''):
+                digest.update(chunk)
+                out.write(chunk)
+        unique_filename = store_content_addressed(tmp_path, filename, digest)
         
         return jsonify({
             'message': 'File uploaded successfully',
@@ -1170,6 +2059,348 @@ def upload_attachment():
     
     return jsonify({'error': 'Invalid file type'}), 400
 
+def store_content_addressed(tmp_path, filename, digest):
+    """Move a fully written temp file to its content-addressed name and return that name"""
+    unique_filename = f"{digest.hexdigest()[:32]}_{filename}"
+    os.replace(tmp_path, os.path.join(os.path.dirname(tmp_path), unique_filename))
+    return unique_filename
+
+# ------------------ Chunked Uploads ------------------
+# Protocol: POST /upload-attachment/sessions -> PUT .../chunks/<n> (raw bytes, in order) -> POST .../finalize
+# Chunks are appended straight to "<upload_id>.part" in the upload folder; the size of that file is the
+# source of truth for how far an upload got, so a client can GET the session and resume from "offset".
+
+_upload_locks = {}
+_upload_locks_guard = threading.Lock()
+
+def _upload_lock(upload_id):
+    with _upload_locks_guard:
+        return _upload_locks.setdefault(upload_id, threading.Lock())
+
+def _upload_paths(upload_id):
+    upload_dir = app.config['UPLOAD_FOLDER']
+    return os.path.join(upload_dir, f".{upload_id}.part"), os.path.join(upload_dir, f".{upload_id}.json")
+
+def _load_upload_session(upload_id):
+    if not UPLOAD_ID_RE.match(upload_id):
+        return None
+    part_path, meta_path = _upload_paths(upload_id)
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    meta['received'] = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    return meta
+
+def _acknowledged_offset(meta):
+    """Bytes covered by complete chunks (a chunk cut off mid-transfer is not acknowledged)"""
+    if meta['received'] >= meta['size']:
+        return meta['size']
+    return (meta['received'] // meta['chunk_size']) * meta['chunk_size']
+
+def _upload_session_dict(upload_id, meta):
+    offset = _acknowledged_offset(meta)
+    return {
+        'upload_id': upload_id,
+        'filename': meta['filename'],
+        'size': meta['size'],
+        'chunk_size': meta['chunk_size'],
+        'offset': offset,
+        'next_chunk': offset // meta['chunk_size'],
+        'total_chunks': max(1, -(-meta['size'] // meta['chunk_size'])),
+    }
+
+@app.route('/upload-attachment/sessions', methods=['POST'])
+def create_upload_session():
+    """Start a resumable upload; input: {filename, size}"""
+    data = request.json or {}
+    filename = secure_filename(data.get('filename') or '')
+    size = data.get('size')
+
+    if not filename or not allowed_file(filename):
+        return jsonify({'error': 'Invalid file type'}), 400
+    if not isinstance(size, int) or size <= 0:
+        return jsonify({'error': 'size must be a positive integer'}), 400
+    if size > UPLOAD_MAX_SIZE:
+        return jsonify({'error': 'File too large'}), 413
+
+    upload_id = uuid.uuid4().hex
+    meta = {
+        'filename': filename,
+        'size': size,
+        'chunk_size': UPLOAD_CHUNK_SIZE,
+        'created_at': datetime.now(UTC).isoformat(),
+    }
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    part_path, meta_path = _upload_paths(upload_id)
+    open(part_path, 'wb').close()
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+
+    meta['received'] = 0
+    return jsonify(_upload_session_dict(upload_id, meta)), 201
+
+@app.route('/upload-attachment/sessions/<upload_id>', methods=['GET'])
+def get_upload_session(upload_id):
+    """Where to resume an interrupted upload from"""
+    meta = _load_upload_session(upload_id)
+    if meta is None:
+        return jsonify({'error': 'Upload session not found'}), 404
+    return jsonify(_upload_session_dict(upload_id, meta)), 200
+
+@app.route('/upload-attachment/sessions/<upload_id>/chunks/<int:index>', methods=['PUT'])
+def put_upload_chunk(upload_id, index):
+    """Append chunk <index> (raw request body) to the upload; chunks must arrive in order"""
+    with _upload_lock(upload_id):
+        meta = _load_upload_session(upload_id)
+        if meta is None:
+            return jsonify({'error': 'Upload session not found'}), 404
+
+        chunk_size = meta['chunk_size']
+        offset = _acknowledged_offset(meta)
+        start = index * chunk_size
+        if start >= meta['size']:
+            return jsonify({'error': 'Chunk index out of range'}), 400
+        expected = min(chunk_size, meta['size'] - start)
+
+        if start < offset:
+            # retry of a chunk we already have
+            return jsonify(_upload_session_dict(upload_id, meta)), 200
+        if start > offset:
+            return jsonify({'error': 'Chunk out of order', **_upload_session_dict(upload_id, meta)}), 409
+        if request.content_length is not None and request.content_length != expected:
+            return jsonify({'error': f'Chunk {index} must be {expected} bytes'}), 400
+
+        part_path, _ = _upload_paths(upload_id)
+        written = 0
+        with open(part_path, 'r+b') as out:
+            # drop any bytes left behind by a chunk that was cut off mid-transfer
+            out.truncate(offset)
+            out.seek(offset)
+            for piece in iter(lambda: request.stream.read(ATTACHMENT_CHUNK_SIZE), b''):
+                written += len(piece)
+                if written > expected:
+                    break
+                out.write(piece)
+            if written != expected:
+                out.truncate(offset)
+                return jsonify({'error': f'Chunk {index} must be {expected} bytes'}), 400
+
+        meta['received'] = offset + written
+        return jsonify(_upload_session_dict(upload_id, meta)), 200
+
+@app.route('/upload-attachment/sessions/<upload_id>/finalize', methods=['POST'])
+def finalize_upload_session(upload_id):
+    """Verify all bytes arrived and publish the file under its content-addressed name"""
+    with _upload_lock(upload_id):
+        meta = _load_upload_session(upload_id)
+        if meta is None:
+            return jsonify({'error': 'Upload session not found'}), 404
+        if meta['received'] != meta['size']:
+            return jsonify({'error': 'Upload incomplete', **_upload_session_dict(upload_id, meta)}), 409
+
+        part_path, meta_path = _upload_paths(upload_id)
+        digest = hashlib.sha256()
+        with open(part_path, 'rb') as f:
+            for piece in iter(lambda: f.read(ATTACHMENT_CHUNK_SIZE), b''):
+                digest.update(piece)
+        unique_filename = store_content_addressed(part_path, meta['filename'], digest)
+        os.remove(meta_path)
+
+    with _upload_locks_guard:
+        _upload_locks.pop(upload_id, None)
+
+    return jsonify({
+        'message': 'File uploaded successfully',
+        'file_path': unique_filename,
+        'filename': unique_filename
+    }), 200
+
+@app.route('/upload-attachment/sessions/<upload_id>', methods=['DELETE'])
+def abort_upload_session(upload_id):
+    with _upload_lock(upload_id):
+        if _load_upload_session(upload_id) is None:
+            return jsonify({'error': 'Upload session not found'}), 404
+        _remove_upload_session(upload_id)
+    return '', 204
+
+def _remove_upload_session(upload_id):
+    for path in _upload_paths(upload_id):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    with _upload_locks_guard:
+        _upload_locks.pop(upload_id, None)
+
+def _mtime_or_none(path):
+    try:
+        return os.path.getmtime(path)
+    except FileNotFoundError:
+        return None
+
+def cleanup_stale_upload_sessions():
+    """Drop sessions that have not received a chunk within UPLOAD_SESSION_TTL"""
+    upload_dir = app.config['UPLOAD_FOLDER']
+    if not os.path.isdir(upload_dir):
+        return 0
+    cutoff = time.time() - UPLOAD_SESSION_TTL.total_seconds()
+    removed = 0
+    for name in os.listdir(upload_dir):
+        if not (name.startswith('.') and name.endswith('.json')):
+            continue
+        upload_id = name[1:-len('.json')]
+        if not UPLOAD_ID_RE.match(upload_id):
+            continue
+        lock = _upload_lock(upload_id)
+        # a chunk or finalize is in flight: the session is active, not stale
+        if not lock.acquire(blocking=False):
+            continue
+        try:
+            last_activity = max((mtime for mtime in map(_mtime_or_none, _upload_paths(upload_id)) if mtime is not None),
+                                default=None)
+            if last_activity is None:
+                # finalized or aborted since listdir: drop the lock entry _upload_lock just made for it
+                with _upload_locks_guard:
+                    _upload_locks.pop(upload_id, None)
+            elif last_activity < cutoff:
+                _remove_upload_session(upload_id)
+                removed += 1
+        finally:
+            lock.release()
+    if removed:
+        print(f"[Uploads] Removed {removed} stale upload sessions")
+    return removed
+
+def sees_company_tasks(role, dept):
+    return role == 'director' or role == 'senior manager' or dept == 'HR'
+
+# ------------------ Task view cache ------------------
+# Every member of a team renders the same team_tasks map and every director the same company
+# tree, so each team's part is serialised once and kept in task_view_cache under ("team", dept, team),
+# along with the task and staff ids it was built from. Commits that write those tasks, their
+# collaborator links or those staff drop the entry; any staff write drops everything.
+# The cache is per process: writes from other workers and services bump the shared TASK_VIEWS
+# version (models/view_version.py), which is checked once per request before the cache is read.
+
+task_view_cache = ScopedCache('task-views')
+
+def task_views():
+    """task_view_cache, brought up to date with the shared version (once per request)"""
+    # request.environ rather than g: g lives as long as the app context, which can span requests
+    environ = request.environ if has_request_context() else {}
+    if 'task_views.version' not in environ:
+        environ['task_views.version'] = current_view_version(TASK_VIEWS)
+        task_view_cache.sync(environ['task_views.version'])
+    return task_view_cache
+
+def touch_task_views(task_ids=(), staff_ids=()):
+    """Record task/staff writes made with core statements, which the flush hook can't see"""
+    touched = db.session.info.setdefault("task_views_touched", (set(), set()))
+    touched[0].update(task_ids)
+    touched[1].update(staff_ids)
+    mark_view_write(db.session)
+
+@event.listens_for(Session, "after_flush")
+def _collect_task_view_writes(db_session, flush_context):
+    task_ids, staff_ids = set(), set()
+    for obj in list(db_session.new) + list(db_session.dirty) + list(db_session.deleted):
+        if isinstance(obj, Staff):
+            db_session.info["task_views_staff_changed"] = True
+        elif isinstance(obj, Task):
+            # subtasks are rendered inside their parent, so a subtask write touches the parent too
+            task_ids.update(tid for tid in (obj.task_id, obj.parent_id) if tid is not None)
+            history = sa_inspect(obj).attrs.collaborators.history
+            staff_ids.update(s.employee_id for s in list(history.added) + list(history.deleted))
+    if task_ids or staff_ids:
+        touched = db_session.info.setdefault("task_views_touched", (set(), set()))
+        touched[0].update(task_ids)
+        touched[1].update(staff_ids)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_task_views(db_session):
+    touched = db_session.info.pop("task_views_touched", None)
+    if db_session.info.pop("task_views_staff_changed", False):
+        task_view_cache.clear()
+    elif touched:
+        task_view_cache.invalidate(task_ids=touched[0], staff_ids=touched[1])
+    bumped = db_session.info.pop("view_versions_bumped", {}).get(TASK_VIEWS)
+    if bumped:
+        # our own write is already invalidated above; only someone else's bump clears the rest
+        task_view_cache.advance(*bumped)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_task_view_writes(db_session):
+    db_session.info.pop("task_views_touched", None)
+    db_session.info.pop("task_views_staff_changed", None)
+
+def _task_ids_in(task_dicts):
+    for t in task_dicts:
+        yield t["task_id"]
+        yield from _task_ids_in(t["subtasks"])
+
+def team_fragment(dept_name, team_name):
+    """
+    [(employee_id, employee_name, tasks_json), ...] for one team, from the cache.
+    tasks_json is that member's top-level tasks (with subtasks) already serialised.
+    """
+    def build():
+        members = staff_rows(Staff.query.filter_by(department=dept_name, team=team_name).order_by(Staff.employee_id))
+        tasks_by_member = top_level_task_rows_by_member([m.employee_id for m in members])
+        # one tree build for the whole team: a task shared by members is serialised once
+        rows = {row.task_id: row for member_rows in tasks_by_member.values() for row in member_rows}
+        dicts = dict(zip(rows, task_tree_dicts(list(rows.values()))))
+        fragment, task_ids = [], set()
+        for m in members:
+            task_dicts = [dicts[row.task_id] for row in tasks_by_member[m.employee_id]]
+            task_ids.update(_task_ids_in(task_dicts))
+            fragment.append((m.employee_id, m.employee_name, json.dumps(task_dicts)))
+        return fragment, task_ids, [m.employee_id for m in members]
+
+    return task_views().get_or_build(("team", dept_name, team_name), build,
+                                        size=lambda fragment: sum(len(name) + len(body) for _, name, body in fragment))
+
+def fragment_object(fragment):
+    """{employee_name: tasks} over a team fragment, streamed from its serialised task lists"""
+    return JSONObject((name, RawJSON(tasks_json)) for _, name, tasks_json in fragment)
+
+def company_task_summary():
+    return task_views().get_or_build(("company", "summary"), lambda: (build_company_task_summary(), EVERYTHING, ()),
+                                        size=lambda summary: len(json.dumps(summary)))
+
+def build_company_task_summary():
+    """
+    {dept: {task_count, teams: {team: {task_count, employees: {employee_name: task_count}}}}}
+    Counts are of top-level tasks; a task shared by several people counts once per team / department.
+    """
+    top_level = and_(Task.task_id == Task_Collaborators.c.task_id, Task.parent_id.is_(None))
+    employee_counts = (db.session.query(Staff.department, Staff.team, Staff.employee_name, func.count(Task.task_id))
+                       .outerjoin(Task_Collaborators, Task_Collaborators.c.staff_id == Staff.employee_id)
+                       .outerjoin(Task, top_level)
+                       .group_by(Staff.employee_id, Staff.department, Staff.team, Staff.employee_name)
+                       .order_by(Staff.department, Staff.team, Staff.employee_name)
+                       .all())
+
+    def distinct_counts(*columns):
+        rows = (db.session.query(*columns, func.count(func.distinct(Task.task_id)))
+                .join(Task_Collaborators, Task_Collaborators.c.staff_id == Staff.employee_id)
+                .join(Task, top_level)
+                .group_by(*columns)
+                .all())
+        return {tuple(row[:-1]): row[-1] for row in rows}
+
+    team_counts = distinct_counts(Staff.department, Staff.team)
+    dept_counts = distinct_counts(Staff.department)
+
+    summary = {}
+    for dept_name, team_name, employee_name, count in employee_counts:
+        dept_node = summary.setdefault(dept_name, {"task_count": dept_counts.get((dept_name,), 0), "teams": {}})
+        team_node = dept_node["teams"].setdefault(
+            team_name, {"task_count": team_counts.get((dept_name, team_name), 0), "employees": {}})
+        team_node["employees"][employee_name] = count
+    return summary
+
 @app.route("/tasks", methods=["GET"])
 def get_all_tasks():
     # Get session data safely
@@ -1195,10 +2426,10 @@ def get_all_tasks():
 # ----------- New task code: get tasks based on role ---------------------------------------------
 
     def top_level_tasks_for(employee_id):
-        return (Task.query.filter(
+        return task_tree_dicts(task_rows(Task.query.filter(
                     Task.collaborators.any(employee_id=employee_id),
                     Task.parent_id.is_(None)        # <-- only parents
-        ).all())
+        ).order_by(Task.task_id)))
 
     # # TODO: move my_tasks_list here to avoid code duplication (minor)
 
@@ -1207,56 +2438,109 @@ def get_all_tasks():
         # get all tasks i am a collaborator and owner of
         # my_tasks = Task.query.filter(Task.collaborators.any(employee_id=eid)).all()
         # my_tasks_list = [t.to_dict() for t in my_tasks]
-        my_tasks_list = [t.to_dict() for t in top_level_tasks_for(eid)]
-        # get all tasks of team members
-        team_members = Staff.query.filter_by(team=team).all()
-        team_tasks = {}
-        for member in team_members:
-            if member.employee_id == eid:
-                continue
-            # member_tasks = Task.query.filter(Task.collaborators.any(employee_id=member.employee_id)).all()
-            member_tasks = top_level_tasks_for(member.employee_id)
-            team_tasks[member.employee_name] = [t.to_dict() for t in member_tasks]
-        
-        return jsonify({"my_tasks": my_tasks_list, "team_tasks": team_tasks}), 200
+        my_tasks_list = top_level_tasks_for(eid)
+        # get all tasks of team members (every department's team of that name), from the cached team fragments;
+        # fetched (or built) before the response starts, so a failed query is still a 500 and only encoding streams
+        team_depts = [d for (d,) in Staff.query.with_entities(Staff.department).filter_by(team=team).distinct()]
+        fragments = [team_fragment(team_dept, team) for team_dept in team_depts]
+        team_tasks = JSONObject(
+            (name, RawJSON(tasks_json))
+            for fragment in fragments
+            for member_id, name, tasks_json in fragment
+            if member_id != eid
+        )
+        return json_stream_response({"my_tasks": my_tasks_list, "team_tasks": team_tasks})
 
 
     # if role is director, get all task in the company
     # return as {my_tasks: [], company_tasks: {dept1: {team1: {emp1: [list of tasks], emp2: [...]}, team2: {...}}, dept2: {...}}}
-    elif role == 'director' or role == 'senior manager' or dept == 'HR':
+    # ?view=summary returns only counts ({my_tasks: [], company_summary: {...}}); branches load from /tasks/company/<dept>/<team>
+    elif sees_company_tasks(role, dept):
         print('Getting tasks for director/senior manager/hr')
         # get all tasks i am a collaborator of (includes those im owner of)
         # my_tasks = Task.query.filter(Task.collaborators.any(employee_id=eid)).all()
         # my_tasks_list = [t.to_dict() for t in my_tasks]
-        my_tasks_list = [t.to_dict() for t in top_level_tasks_for(eid)]
-        # get all tasks in the company organized by dept, team, employee
-        # get all departments
-        departments = Staff.query.with_entities(Staff.department).distinct().all() # list of tuples with one element
-        company_tasks = {}
-        for dept_tuple in departments:
-            dept_name = dept_tuple[0]
-            dept_members = Staff.query.filter_by(department=dept_name).all()
-            dept_dict = {}
-            for member in dept_members:
-                # member_tasks = Task.query.filter(Task.collaborators.any(employee_id=member.employee_id)).all()
-                member_tasks = top_level_tasks_for(member.employee_id)
-                team_name = member.team
-                if team_name not in dept_dict:
-                    dept_dict[team_name] = {}
-                dept_dict[team_name][member.employee_name] = [t.to_dict() for t in member_tasks]
-            company_tasks[dept_name] = dept_dict
-
-        return jsonify({"my_tasks": my_tasks_list, "company_tasks": company_tasks}), 200
+        my_tasks_list = top_level_tasks_for(eid)
+        if request.args.get('view') == 'summary':
+            return jsonify({"my_tasks": my_tasks_list, "company_summary": company_task_summary()}), 200
+
+        # get all tasks in the company organized by dept, team, employee, from the cached team fragments
+        teams = {}
+        for dept_name, team_name in (Staff.query.with_entities(Staff.department, Staff.team)
+                                     .distinct().order_by(Staff.department, Staff.team)):
+            teams.setdefault(dept_name, []).append(team_name)
+        # every team's fragment is fetched (or built) before the response starts, so a failed query is
+        # still a 500; the fragments are already-serialised strings, and only their encoding is streamed
+        fragments = {(dept_name, team_name): team_fragment(dept_name, team_name)
+                     for dept_name, team_names in teams.items() for team_name in team_names}
+        company_tasks = JSONObject(
+            (dept_name, JSONObject(
+                (team_name, fragment_object(fragments[dept_name, team_name]))
+                for team_name in team_names))
+            for dept_name, team_names in teams.items()
+        )
+        return json_stream_response({"my_tasks": my_tasks_list, "company_tasks": company_tasks})
+
+@app.route("/tasks/company/<dept_name>/<team_name>", methods=["GET"])
+def get_company_team_tasks(dept_name, team_name):
+    """One branch of the company task tree: {department, team, team_tasks: {emp: [list of tasks]}}"""
+    eid = session.get('employee_id', None)
+    if not eid:
+        return {"message": "Unauthorized"}, 401
+    if not sees_company_tasks(session.get('role', ''), session.get('department', '')):
+        return {"message": "Only directors, senior managers and HR can view company tasks"}, 403
+
+    fragment = team_fragment(dept_name, team_name)
+    if not fragment:
+        return {"message": "Team not found"}, 404
+    return json_stream_response({"department": dept_name, "team": team_name, "team_tasks": fragment_object(fragment)})
 
 
 # --------------------------------------------------------------------------------------------------------------
     
+def attachment_folder():
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.normpath(os.path.join(base_dir, '..', 'uploads', 'attachments'))
+
+@lru_cache(maxsize=ATTACHMENT_ETAG_CACHE_SIZE)
+def _hash_attachment(path, mtime_ns, size):
+    # keyed by version as well as path, so a replaced file is hashed again
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(ATTACHMENT_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:32]
+
+def attachment_etag(path):
+    """Strong ETag for files that are not content-addressed (older timestamp-named uploads)"""
+    st = os.stat(path)
+    return _hash_attachment(path, st.st_mtime_ns, st.st_size)
+
 @app.route('/attachments/<path:filename>')
 def serve_attachment(filename):
-    """Serve uploaded files"""
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    upload_folder = os.path.join(base_dir, '..', 'uploads', 'attachments')
-    return send_from_directory(upload_folder, filename)
+    """
+    Serve uploaded files.
+    Content-addressed files are cached for a year as immutable; older uploads are revalidated
+    against a strong ETag. Range / If-Range / If-None-Match are handled by send_from_directory.
+    """
+    upload_folder = attachment_folder()
+    path = safe_join(upload_folder, filename)
+    if path is None or not os.path.isfile(path):
+        return jsonify({'error': 'File not found'}), 404
+
+    immutable = CONTENT_ADDRESSED_RE.match(os.path.basename(path)) is not None
+    etag = os.path.basename(path)[:32] if immutable else attachment_etag(path)
+
+    response = send_from_directory(
+        upload_folder,
+        filename,
+        etag=etag,
+        conditional=True,
+        max_age=ATTACHMENT_MAX_AGE if immutable else None
+    )
+    if immutable:
+        response.cache_control.immutable = True
+    return response
 
 
 # ------------------ Comments Endpoints ------------------
@@ -1311,9 +2595,7 @@ def create_task_comment(task_id):
         if isinstance(fname, str) and fname:
             db.session.add(CommentAttachment(comment_id=comment.id, filename=fname))
 
-    db.session.commit()
-    
-    # Send notifications after successful comment creation
+    # Queue notifications in the same transaction as the comment
     try:
         print(f"[NOTIFICATION DEBUG] Starting comment creation notifications for task {task_id}")
         task = Task.query.get(task_id)
@@ -1337,23 +2619,24 @@ def create_task_comment(task_id):
             notify_user_ids.discard(session['employee_id'])
             print(f"[NOTIFICATION DEBUG] Final notify list (excluding author {session['employee_id']}): {list(notify_user_ids)}")
             
-            # Send general comment notification to collaborators/owner
-            author_name = get_employee_name(session['employee_id'])
+            # Send general comment notification to collaborators/owner; the author's name is
+            # resolved once here from the shared staff table and sent with every event
+            author_name = staff_names([session['employee_id']]).get(session['employee_id'], 'Unknown')
             print(f"[NOTIFICATION DEBUG] Author name: {author_name}")
+            excerpt = f'{content[:100]}{"..." if len(content) > 100 else ""}'
             for user_id in notify_user_ids:
                 notification_payload = {
                     'staff_id': user_id,
                     'action': 'added',
                     'title': f'Comments updated: {task.title}',
-                    'message': f'New comment added by {author_name}: {content[:100]}{"..." if len(content) > 100 else ""}',
+                    'message': f'New comment added by {author_name}: {excerpt}',
                     'related_task_id': task_id,
                     'related_comment_id': comment.id,
+                    'actor_id': session['employee_id'],
                     'actor_name': author_name
                 }
-                print(f"[NOTIFICATION DEBUG] Sending notification to user {user_id}: {notification_payload}")
-                response = requests.post(f'{NOTIFICATION_SERVICE_URL}/api/events/comment-added', 
-                    json=notification_payload, timeout=3)
-                print(f"[NOTIFICATION DEBUG] Notification response for user {user_id}: {response.status_code} - {response.text}")
+                print(f"[NOTIFICATION DEBUG] Queueing notification to user {user_id}: {notification_payload}")
+                enqueue_notification('/api/events/comment-added', notification_payload, task_id=task_id)
             
             # Send mention notifications to mentioned users
             all_mentioned_ids = numeric_ids | resolved_name_ids
@@ -1363,23 +2646,24 @@ def create_task_comment(task_id):
                     mention_payload = {
                         'staff_id': mentioned_id,
                         'title': f'You were mentioned in: {task.title}',
-                        'message': f'{author_name} mentioned you in a comment: {content[:100]}{"..." if len(content) > 100 else ""}',
+                        'message': f'{author_name} mentioned you in a comment: {excerpt}',
                         'related_task_id': task_id,
                         'related_comment_id': comment.id,
+                        'actor_id': session['employee_id'],
                         'actor_name': author_name
                     }
-                    print(f"[NOTIFICATION DEBUG] Sending mention notification to user {mentioned_id}: {mention_payload}")
-                    response = requests.post(f'{NOTIFICATION_SERVICE_URL}/api/events/mention', 
-                        json=mention_payload, timeout=3)
-                    print(f"[NOTIFICATION DEBUG] Mention notification response for user {mentioned_id}: {response.status_code} - {response.text}")
+                    print(f"[NOTIFICATION DEBUG] Queueing mention notification to user {mentioned_id}: {mention_payload}")
+                    enqueue_notification('/api/events/mention', mention_payload, task_id=task_id)
         else:
             print(f"[NOTIFICATION DEBUG] Task {task_id} not found!")
     except Exception as e:
-        print(f"[NOTIFICATION DEBUG] Failed to send comment notifications: {e}")
+        print(f"[NOTIFICATION DEBUG] Failed to queue comment notifications: {e}")
         import traceback
         traceback.print_exc()
         # Don't fail the comment creation if notifications fail
-    
+
+    db.session.commit()
+
     # include attachments in response
     resp_atts = [
         {"id": a.id, "filename": a.filename, "url": f"/attachments/{a.filename}"}
@@ -1427,9 +2711,7 @@ def update_comment(comment_id):
     for mid in (numeric_ids | resolved_name_ids):
         db.session.add(CommentMention(comment_id=comment.id, mentioned_id=mid))
 
-    db.session.commit()
-    
-    # Send notifications after successful comment update
+    # Queue notifications in the same transaction as the edit
     try:
         task = Task.query.get(comment.task_id)
         if task:
@@ -1445,37 +2727,40 @@ def update_comment(comment_id):
             # Remove the comment author from notifications
             notify_user_ids.discard(session['employee_id'])
             
-            # Send general comment notification to collaborators/owner
-            author_name = get_employee_name(session['employee_id'])
+            # Send general comment notification to collaborators/owner (author resolved once, from the staff table)
+            author_name = staff_names([session['employee_id']]).get(session['employee_id'], 'Unknown')
+            excerpt = f'{content[:100]}{"..." if len(content) > 100 else ""}'
             for user_id in notify_user_ids:
-                requests.post(f'{NOTIFICATION_SERVICE_URL}/api/events/comment-updated', 
-                    json={
+                enqueue_notification('/api/events/comment-updated', {
                         'staff_id': user_id,
                         'action': 'updated',
                         'title': f'Comments updated: {task.title}',
-                        'message': f'Comment updated by {author_name}: {content[:100]}{"..." if len(content) > 100 else ""}',
+                        'message': f'Comment updated by {author_name}: {excerpt}',
                         'related_task_id': comment.task_id,
                         'related_comment_id': comment.id,
+                        'actor_id': session['employee_id'],
                         'actor_name': author_name
-                    }, timeout=3)
+                    }, task_id=comment.task_id)
             
             # Send mention notifications to mentioned users
             all_mentioned_ids = numeric_ids | resolved_name_ids
             for mentioned_id in all_mentioned_ids:
                 if mentioned_id != session['employee_id']:  # Don't notify the author
-                    requests.post(f'{NOTIFICATION_SERVICE_URL}/api/events/mention', 
-                        json={
+                    enqueue_notification('/api/events/mention', {
                             'staff_id': mentioned_id,
                             'title': f'You were mentioned in: {task.title}',
-                            'message': f'{author_name} mentioned you in a comment: {content[:100]}{"..." if len(content) > 100 else ""}',
+                            'message': f'{author_name} mentioned you in a comment: {excerpt}',
                             'related_task_id': comment.task_id,
                             'related_comment_id': comment.id,
+                            'actor_id': session['employee_id'],
                             'actor_name': author_name
-                        }, timeout=3)
+                        }, task_id=comment.task_id)
     except Exception as e:
-        print(f"[Notification] Failed to send comment update notifications: {e}")
+        print(f"[Notification] Failed to queue comment update notifications: {e}")
         # Don't fail the comment update if notifications fail
-    
+
+    db.session.commit()
+
     return jsonify(comment.to_dict()), 200
 
 #delete comment
@@ -1518,7 +2803,7 @@ def get_single_task(task_id):
     Get a single task by ID
     Used by Notification Service to get task details
     """
-    task = Task.query.get(task_id)
+    task = next(iter(task_rows(Task.query.filter_by(task_id=task_id))), None)
     if not task:
         return jsonify({'error': 'Task not found'}), 404
     
@@ -1530,35 +2815,153 @@ def get_single_task(task_id):
         'priority': task.priority,
         'deadline': task.deadline.isoformat() if task.deadline else None,
         'owner': task.owner,
-        'collaborators': [collab.employee_id for collab in task.collaborators],
+        'collaborators': collaborator_ids_by_task([task_id])[task_id],
         'project_id': task.project_id,
         'parent_id': task.parent_id
     }), 200
 
+@app.route('/api/internal/circuit-breakers', methods=['GET'])
+def circuit_breaker_status():
+    """State of this service's breakers for the notification and employee services"""
+    return jsonify({'breakers': breaker_snapshots()}), 200
+
+INTERNAL_TASK_PAGE_SIZE = 500
+INTERNAL_TASK_MAX_PAGE_SIZE = 5000
+
+def parse_status_list(value):
+    """?status=a,b -> ['a', 'b']"""
+    return [s.strip() for s in value.split(',') if s.strip()] if value else []
+
+def internal_task_filters(args):
+    """
+    SQL filters for the internal task exports:
+    ?status=a,b (only these), ?exclude_status=done (all but these), ?deadline_from= / ?deadline_to= (ISO, inclusive).
+    Raises ValueError on a bad date.
+    """
+    filters = []
+    statuses = parse_status_list(args.get('status'))
+    if statuses:
+        filters.append(Task.status.in_(statuses))
+    excluded = parse_status_list(args.get('exclude_status'))
+    if excluded:
+        filters.append(Task.status.notin_(excluded))
+    deadline_from = parse_window_bound(args.get('deadline_from'))
+    if deadline_from:
+        filters.append(Task.deadline >= deadline_from)
+    deadline_to = window_end_filter(Task.deadline, args.get('deadline_to'))
+    if deadline_to is not None:
+        filters.append(deadline_to)
+    return filters
+
+def internal_task_page(filters, after_id, limit):
+    """
+    [(row, [staff_id, ...]), ...] for up to `limit` tasks with task_id > after_id, in task_id order.
+    One query: the page of task ids as a derived table joined to the task columns and LEFT JOINed to task_collaborators.
+    """
+    page = (db.session.query(Task.task_id)
+            .filter(Task.task_id > after_id, *filters)
+            .order_by(Task.task_id)
+            .limit(limit)
+            .subquery())
+    rows = (db.session.query(Task.task_id, Task.title, Task.description, Task.status, Task.priority,
+                             Task.deadline, Task.owner, Task.project_id, Task.parent_id, Task_Collaborators.c.staff_id)
+            .join(page, page.c.task_id == Task.task_id)
+            .outerjoin(Task_Collaborators, Task_Collaborators.c.task_id == Task.task_id)
+            .order_by(Task.task_id, Task_Collaborators.c.staff_id)
+            .all())
+    result = []
+    for row in rows:
+        if not result or result[-1][0].task_id != row.task_id:
+            result.append((row, []))
+        if row.staff_id is not None:
+            result[-1][1].append(row.staff_id)
+    return result
+
+def stream_internal_tasks(filters, record, after_id, limit):
+    """
+    NDJSON export: one "task" record per task, then an "end" record with next_after_id (set when
+    `limit` cut the export short). Walks keyset pages so memory does not grow with the result.
+    """
+    sent = 0
+    try:
+        while limit is None or sent < limit:
+            step = INTERNAL_TASK_PAGE_SIZE if limit is None else min(INTERNAL_TASK_PAGE_SIZE, limit - sent)
+            page = internal_task_page(filters, after_id, step)
+            for row, collaborators in page:
+                yield json.dumps({"type": "task", **record(row, collaborators)}) + "\n"
+            sent += len(page)
+            if len(page) < step:
+                after_id = None
+                break
+            after_id = page[-1][0].task_id
+        yield json.dumps({"type": "end", "next_after_id": after_id}) + "\n"
+    except Exception as e:
+        # headers are already sent, so report the failure in-band
+        print(f"Error streaming internal tasks: {e}")
+        yield json.dumps({"type": "error", "error": "Internal server error"}) + "\n"
+
+def internal_task_export(filters, record):
+    """
+    Serve an internal task export, keyset-paged on task_id with ?after_id= and ?limit=.
+    JSON: {'tasks': [...], 'next_after_id'} with a default page size; pass next_after_id back for the next page.
+    NDJSON (Accept: application/x-ndjson): streamed, unbounded unless ?limit= is given.
+    """
+    try:
+        after_id = int(request.args.get('after_id', 0))
+        limit = request.args.get('limit')
+        limit = int(limit) if limit is not None else None
+    except ValueError:
+        return jsonify({'error': 'after_id and limit must be integers'}), 400
+    if limit is not None and limit < 1:
+        return jsonify({'error': 'limit must be positive'}), 400
+    if limit is not None:
+        limit = min(limit, INTERNAL_TASK_MAX_PAGE_SIZE)
+
+    if request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson']) == 'application/x-ndjson':
+        return Response(
+            stream_with_context(stream_internal_tasks(filters, record, after_id, limit)),
+            mimetype='application/x-ndjson'
+        )
+
+    limit = limit or INTERNAL_TASK_PAGE_SIZE
+    page = internal_task_page(filters, after_id, limit)
+    return json_stream_response({
+        'tasks': (record(row, collaborators) for row, collaborators in page),
+        'next_after_id': page[-1][0].task_id if len(page) == limit else None
+    })
+
+@app.route('/api/internal/task-view-cache', methods=['GET'])
+def task_view_cache_status():
+    """Size and hit/miss counters of the cached team / company task views"""
+    return jsonify({'cache': task_view_cache.snapshot()}), 200
+
 @app.route('/api/internal/tasks/all', methods=['GET'])
 def get_all_tasks_for_notifications():
     """
-    Get all tasks in a simple format for notification service
+    Get tasks in a simple format for notification service
     Used by Notification Service for deadline reminders
+    Filters: ?status=, ?exclude_status=, ?deadline_from=, ?deadline_to=; paging: ?after_id=, ?limit=
     """
-    tasks = Task.query.all()
-    tasks_list = []
-    
-    for task in tasks:
-        tasks_list.append({
-            'task_id': task.task_id,
-            'title': task.title,
-            'description': task.description,
-            'status': task.status,
-            'priority': task.priority,
-            'deadline': task.deadline.isoformat() if task.deadline else None,
-            'owner': task.owner,
-            'collaborators': [collab.employee_id for collab in task.collaborators],
-            'project_id': task.project_id,
-            'parent_id': task.parent_id
-        })
-    
-    return jsonify({'tasks': tasks_list}), 200
+    try:
+        filters = internal_task_filters(request.args)
+    except ValueError:
+        return jsonify({'error': 'Invalid date format'}), 400
+
+    def record(row, collaborators):
+        return {
+            'task_id': row.task_id,
+            'title': row.title,
+            'description': row.description,
+            'status': row.status,
+            'priority': row.priority,
+            'deadline': row.deadline.isoformat() if row.deadline else None,
+            'owner': row.owner,
+            'collaborators': collaborators,
+            'project_id': row.project_id,
+            'parent_id': row.parent_id
+        }
+
+    return internal_task_export(filters, record)
 
 #converting the datetime format
 @app.route('/api/internal/tasks/upcoming-deadlines', methods=['GET'])
@@ -1566,6 +2969,7 @@ def get_upcoming_deadlines():
     """
     Get tasks with deadlines in specified date range
     Used by Notification Service for deadline reminders
+    Same status filters and paging as /api/internal/tasks/all
     """
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
@@ -1574,32 +2978,36 @@ def get_upcoming_deadlines():
         return jsonify({'error': 'start_date and end_date required'}), 400
     
     try:
-        # Convert ISO strings to datetime
-        from datetime import datetime
-        start = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-        end = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
+        start = parse_window_bound(start_date)
+        end = window_end_filter(Task.deadline, end_date)
+        filters = internal_task_filters(request.args)
     except ValueError:
         return jsonify({'error': 'Invalid date format'}), 400
     
-    # Query tasks with deadlines in range, not completed
-    tasks = Task.query.filter(
-        Task.deadline >= start,
-        Task.deadline <= end,
-        Task.status != 'done'  # Your status name for completed
-    ).all()
-    
-    result = []
-    for task in tasks:
-        result.append({
-            'task_id': task.task_id,
-            'title': task.title,
-            'deadline': task.deadline.strftime('%Y-%m-%d') if task.deadline else None,
-            'owner': task.owner,
-            'collaborators': get_task_collaborators_ids(task.task_id),
-            'is_subtask': task.parent_id is not None
-        })
-    
-    return jsonify({'tasks': result}), 200
+    # tasks with deadlines in range, not completed
+    filters += [Task.deadline >= start, end, Task.status != 'done']
+
+    def record(row, collaborators):
+        return {
+            'task_id': row.task_id,
+            'title': row.title,
+            'deadline': row.deadline.strftime('%Y-%m-%d') if row.deadline else None,
+            'owner': row.owner,
+            'collaborators': collaborators,
+            'is_subtask': row.parent_id is not None
+        }
+
+    return internal_task_export(filters, record)
+
+# ------------------ Background Jobs ------------------
+scheduler = BackgroundScheduler()
+scheduler.add_job(cleanup_stale_upload_sessions, 'interval', hours=1, id='stale_upload_cleanup')
+scheduler.add_job(run_recurrence_engine, 'interval', seconds=RECURRENCE_INTERVAL_SECONDS, id='recurrence_engine',
+                  max_instances=1, coalesce=True)
+scheduler.add_job(run_outbox_relay, 'interval', seconds=OUTBOX_INTERVAL_SECONDS, id='outbox_relay',
+                  max_instances=1, coalesce=True)
+if not os.getenv('TESTING'):
+    scheduler.start()
 
 if __name__ == "__main__":
     with app.app_context():
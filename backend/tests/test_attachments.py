@@ -0,0 +1,266 @@
+# backend/tests/test_attachments.py
+import io
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+# Set testing environment
+os.environ['TESTING'] = 'true'
+
+from tasks.task import app
+
+
+class TestAttachmentServing(unittest.TestCase):
+    """Test cases for attachment upload and cached / ranged serving"""
+
+    @classmethod
+    def setUpClass(cls):
+        app.config["TESTING"] = True
+        cls.app = app
+        cls.client = app.test_client()
+
+    def setUp(self):
+        self.upload_dir = tempfile.mkdtemp()
+        self.original_upload_folder = self.app.config['UPLOAD_FOLDER']
+        self.app.config['UPLOAD_FOLDER'] = self.upload_dir
+        self.folder_patch = patch('tasks.task.attachment_folder', return_value=self.upload_dir)
+        self.folder_patch.start()
+
+    def tearDown(self):
+        self.folder_patch.stop()
+        self.app.config['UPLOAD_FOLDER'] = self.original_upload_folder
+        shutil.rmtree(self.upload_dir, ignore_errors=True)
+
+    def upload(self, content=b"%PDF-1.4 hello world", name="report.pdf"):
+        return self.client.post(
+            '/upload-attachment',
+            data={'attachment': (io.BytesIO(content), name)},
+            content_type='multipart/form-data'
+        )
+
+    # ----------------------------------------------------------------------
+    # Upload
+    # ----------------------------------------------------------------------
+
+    def test_upload_is_content_addressed(self):
+        """Same bytes always map to the same stored name"""
+        first = self.upload().get_json()['filename']
+        second = self.upload().get_json()['filename']
+        self.assertEqual(first, second)
+        self.assertRegex(first, r'^[0-9a-f]{32}_report\.pdf$')
+        self.assertEqual(os.listdir(self.upload_dir), [first])
+
+    def test_upload_invalid_type(self):
+        response = self.upload(name="script.exe")
+        self.assertEqual(response.status_code, 400)
+
+    # ----------------------------------------------------------------------
+    # Serving
+    # ----------------------------------------------------------------------
+
+    def test_content_addressed_file_is_immutable(self):
+        filename = self.upload().get_json()['filename']
+        response = self.client.get(f'/attachments/{filename}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, b"%PDF-1.4 hello world")
+        self.assertIn('immutable', response.headers['Cache-Control'])
+        self.assertIn('max-age=31536000', response.headers['Cache-Control'])
+        self.assertEqual(response.headers['ETag'], f'"{filename[:32]}"')
+
+    def test_if_none_match_returns_304(self):
+        filename = self.upload().get_json()['filename']
+        etag = self.client.get(f'/attachments/{filename}').headers['ETag']
+        response = self.client.get(f'/attachments/{filename}', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b"")
+
+    def test_range_request_returns_partial_content(self):
+        filename = self.upload().get_json()['filename']
+        response = self.client.get(f'/attachments/{filename}', headers={'Range': 'bytes=0-7'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.data, b"%PDF-1.4")
+        self.assertEqual(response.headers['Content-Range'], 'bytes 0-7/20')
+        self.assertEqual(response.headers['Accept-Ranges'], 'bytes')
+
+    def test_legacy_file_gets_strong_etag_and_revalidates(self):
+        legacy = "1759598560_old.pdf"
+        with open(os.path.join(self.upload_dir, legacy), 'wb') as f:
+            f.write(b"legacy bytes")
+        response = self.client.get(f'/attachments/{legacy}')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-cache', response.headers['Cache-Control'])
+        self.assertNotIn('immutable', response.headers['Cache-Control'])
+        self.assertFalse(response.headers['ETag'].startswith('W/'))
+        again = self.client.get(f'/attachments/{legacy}', headers={'If-None-Match': response.headers['ETag']})
+        self.assertEqual(again.status_code, 304)
+
+    def test_legacy_etag_cache_is_bounded_and_follows_changes(self):
+        from tasks.task import attachment_etag, _hash_attachment, ATTACHMENT_ETAG_CACHE_SIZE
+        path = os.path.join(self.upload_dir, "1759598561_old.pdf")
+        with open(path, 'wb') as f:
+            f.write(b"first version")
+        first = attachment_etag(path)
+        with open(path, 'wb') as f:
+            f.write(b"second version!")
+        self.assertNotEqual(attachment_etag(path), first)
+        self.assertEqual(_hash_attachment.cache_info().maxsize, ATTACHMENT_ETAG_CACHE_SIZE)
+
+    def test_missing_file_returns_404(self):
+        response = self.client.get('/attachments/does_not_exist.pdf')
+        self.assertEqual(response.status_code, 404)
+
+    def test_path_traversal_rejected(self):
+        response = self.client.get('/attachments/../tasks/task.py')
+        self.assertEqual(response.status_code, 404)
+
+
+class TestChunkedUpload(unittest.TestCase):
+    """Test cases for the resumable chunked upload protocol"""
+
+    @classmethod
+    def setUpClass(cls):
+        app.config["TESTING"] = True
+        cls.app = app
+        cls.client = app.test_client()
+
+    def setUp(self):
+        self.upload_dir = tempfile.mkdtemp()
+        self.original_upload_folder = self.app.config['UPLOAD_FOLDER']
+        self.app.config['UPLOAD_FOLDER'] = self.upload_dir
+        # small chunks so tests stay fast
+        self.chunk_patch = patch('tasks.task.UPLOAD_CHUNK_SIZE', 4)
+        self.chunk_patch.start()
+        self.content = b"0123456789"  # 3 chunks: 4 + 4 + 2
+
+    def tearDown(self):
+        self.chunk_patch.stop()
+        self.app.config['UPLOAD_FOLDER'] = self.original_upload_folder
+        shutil.rmtree(self.upload_dir, ignore_errors=True)
+
+    def create_session(self, size=None, filename="big.pdf"):
+        response = self.client.post('/upload-attachment/sessions', json={
+            "filename": filename,
+            "size": len(self.content) if size is None else size
+        })
+        return response
+
+    def put_chunk(self, upload_id, index, data):
+        return self.client.put(
+            f'/upload-attachment/sessions/{upload_id}/chunks/{index}',
+            data=data,
+            content_type='application/octet-stream'
+        )
+
+    def test_full_chunked_upload(self):
+        session = self.create_session()
+        self.assertEqual(session.status_code, 201)
+        upload_id = session.get_json()['upload_id']
+        self.assertEqual(session.get_json()['total_chunks'], 3)
+
+        for i in range(3):
+            response = self.put_chunk(upload_id, i, self.content[i * 4:(i + 1) * 4])
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['offset'], 10)
+
+        final = self.client.post(f'/upload-attachment/sessions/{upload_id}/finalize')
+        self.assertEqual(final.status_code, 200)
+        filename = final.get_json()['filename']
+        self.assertRegex(filename, r'^[0-9a-f]{32}_big\.pdf$')
+        with open(os.path.join(self.upload_dir, filename), 'rb') as f:
+            self.assertEqual(f.read(), self.content)
+        # session files are gone
+        self.assertEqual(os.listdir(self.upload_dir), [filename])
+
+    def test_resume_after_interrupted_chunk(self):
+        upload_id = self.create_session().get_json()['upload_id']
+        self.put_chunk(upload_id, 0, b"0123")
+        # simulate a dropped connection that left half a chunk on disk
+        with open(os.path.join(self.upload_dir, f".{upload_id}.part"), 'ab') as f:
+            f.write(b"45")
+
+        status = self.client.get(f'/upload-attachment/sessions/{upload_id}').get_json()
+        self.assertEqual(status['offset'], 4)
+        self.assertEqual(status['next_chunk'], 1)
+
+        self.assertEqual(self.put_chunk(upload_id, 1, b"4567").status_code, 200)
+        self.assertEqual(self.put_chunk(upload_id, 2, b"89").status_code, 200)
+        final = self.client.post(f'/upload-attachment/sessions/{upload_id}/finalize')
+        with open(os.path.join(self.upload_dir, final.get_json()['filename']), 'rb') as f:
+            self.assertEqual(f.read(), self.content)
+
+    def test_out_of_order_chunk_rejected(self):
+        upload_id = self.create_session().get_json()['upload_id']
+        response = self.put_chunk(upload_id, 1, b"4567")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.get_json()['offset'], 0)
+
+    def test_duplicate_chunk_is_idempotent(self):
+        upload_id = self.create_session().get_json()['upload_id']
+        self.put_chunk(upload_id, 0, b"0123")
+        response = self.put_chunk(upload_id, 0, b"0123")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['offset'], 4)
+
+    def test_wrong_chunk_length_rejected(self):
+        upload_id = self.create_session().get_json()['upload_id']
+        response = self.put_chunk(upload_id, 0, b"012")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get(f'/upload-attachment/sessions/{upload_id}').get_json()['offset'], 0)
+
+    def test_finalize_incomplete_upload(self):
+        upload_id = self.create_session().get_json()['upload_id']
+        self.put_chunk(upload_id, 0, b"0123")
+        response = self.client.post(f'/upload-attachment/sessions/{upload_id}/finalize')
+        self.assertEqual(response.status_code, 409)
+
+    def test_create_session_validation(self):
+        self.assertEqual(self.create_session(filename="evil.exe").status_code, 400)
+        self.assertEqual(self.create_session(size=0).status_code, 400)
+        self.assertEqual(self.client.get('/upload-attachment/sessions/not-a-real-id').status_code, 404)
+
+    def test_stale_sessions_cleaned_up(self):
+        from tasks.task import cleanup_stale_upload_sessions
+
+        stale_id = self.create_session().get_json()['upload_id']
+        fresh_id = self.create_session().get_json()['upload_id']
+        old = time.time() - 3 * 24 * 60 * 60
+        for suffix in ('.part', '.json'):
+            os.utime(os.path.join(self.upload_dir, f".{stale_id}{suffix}"), (old, old))
+
+        self.assertEqual(cleanup_stale_upload_sessions(), 1)
+        self.assertEqual(self.client.get(f'/upload-attachment/sessions/{stale_id}').status_code, 404)
+        self.assertEqual(self.client.get(f'/upload-attachment/sessions/{fresh_id}').status_code, 200)
+
+
+    def test_cleanup_skips_busy_and_vanished_sessions(self):
+        from tasks.task import _upload_lock, _upload_locks, cleanup_stale_upload_sessions
+
+        busy_id = self.create_session().get_json()['upload_id']
+        gone_id = self.create_session().get_json()['upload_id']
+        old = time.time() - 3 * 24 * 60 * 60
+        for upload_id in (busy_id, gone_id):
+            for suffix in ('.part', '.json'):
+                os.utime(os.path.join(self.upload_dir, f".{upload_id}{suffix}"), (old, old))
+
+        real_getmtime = os.path.getmtime
+
+        def vanish(path):
+            # finalize/abort wins the race after listdir: both files are gone
+            if gone_id in path:
+                raise FileNotFoundError(path)
+            return real_getmtime(path)
+
+        # a chunk PUT holds the busy session's lock
+        with _upload_lock(busy_id), patch('tasks.task.os.path.getmtime', side_effect=vanish):
+            self.assertEqual(cleanup_stale_upload_sessions(), 0)
+        # the vanished session's lock entry, made by the sweep itself, does not outlive it
+        self.assertNotIn(gone_id, _upload_locks)
+        self.assertEqual(self.client.get(f'/upload-attachment/sessions/{busy_id}').status_code, 200)
+        # once the lock is free it is swept as usual
+        self.assertEqual(cleanup_stale_upload_sessions(), 2)
+
+if __name__ == '__main__':
+    unittest.main()
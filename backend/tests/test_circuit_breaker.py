@@ -0,0 +1,138 @@
+# backend/tests/test_circuit_breaker.py
+import os
+import unittest
+from unittest.mock import patch, MagicMock
+
+import requests
+
+# Set testing environment
+os.environ['TESTING'] = 'true'
+
+from common.circuit_breaker import CircuitBreaker, CircuitOpenError, CLOSED, OPEN, HALF_OPEN, reset_breakers
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def failing_call():
+    raise requests.ConnectionError("connection refused")
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """State machine: closed -> open -> half-open -> closed/open"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker("downstream", failure_threshold=3, reset_timeout=30, clock=self.clock)
+
+    def trip(self):
+        for _ in range(3):
+            with self.assertRaises(requests.ConnectionError):
+                self.breaker.call(failing_call)
+
+    def test_opens_after_consecutive_failures(self):
+        self.trip()
+        self.assertEqual(self.breaker.state, OPEN)
+        fn = MagicMock()
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.call(fn)
+        fn.assert_not_called()
+        self.assertEqual(self.breaker.snapshot()['rejected_calls'], 1)
+
+    def test_success_resets_failure_count(self):
+        for _ in range(2):
+            with self.assertRaises(requests.ConnectionError):
+                self.breaker.call(failing_call)
+        self.breaker.call(lambda: MagicMock(status_code=200))
+        with self.assertRaises(requests.ConnectionError):
+            self.breaker.call(failing_call)
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    def test_server_errors_count_client_errors_do_not(self):
+        for _ in range(3):
+            self.breaker.call(lambda: MagicMock(status_code=404))
+        self.assertEqual(self.breaker.state, CLOSED)
+        for _ in range(3):
+            self.breaker.call(lambda: MagicMock(status_code=503))
+        self.assertEqual(self.breaker.state, OPEN)
+
+    def test_half_open_trial_closes_on_success(self):
+        self.trip()
+        self.clock.now += 30
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.breaker.call(lambda: MagicMock(status_code=200))
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    def test_half_open_allows_one_trial_and_reopens_on_failure(self):
+        self.trip()
+        self.clock.now += 30
+        self.breaker.before_call()  # the trial call is in flight
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.call(MagicMock())
+        self.breaker.record_failure("still down")
+        self.assertEqual(self.breaker.state, OPEN)
+        snapshot = self.breaker.snapshot()
+        self.assertEqual(snapshot['retry_in'], 30)
+        self.assertEqual(snapshot['last_error'], "still down")
+
+
+class TestServiceBreakers(unittest.TestCase):
+    """Downstream calls in the task and notification services go through shared breakers"""
+
+    def setUp(self):
+        reset_breakers()
+
+    def tearDown(self):
+        reset_breakers()
+
+    def test_employee_lookups_fail_fast_once_open(self):
+        from notifications.app import app, _get_employee_names, employee_service_breaker
+        with patch('notifications.app.requests') as mock_requests:
+            mock_requests.post.side_effect = requests.ConnectionError("down")
+            for _ in range(employee_service_breaker.failure_threshold + 5):
+                self.assertEqual(_get_employee_names([1, 2]), {})
+            self.assertEqual(mock_requests.post.call_count, employee_service_breaker.failure_threshold)
+
+        status = app.test_client().get('/api/internal/circuit-breakers').get_json()
+        employee = next(b for b in status['breakers'] if b['name'] == 'employee-service')
+        self.assertEqual(employee['state'], OPEN)
+        self.assertEqual(employee['rejected_calls'], 5)
+
+    def test_relay_holds_events_while_notification_service_is_down(self):
+        from tasks.task import app, db, relay_outbox, enqueue_notification, notification_service_breaker
+        from models.outbox import OutboxEvent
+        with app.app_context():
+            db.create_all()
+            try:
+                for i in range(3):
+                    enqueue_notification('/api/events/mention', {'staff_id': i}, task_id=i)
+                db.session.commit()
+                for _ in range(notification_service_breaker.failure_threshold):
+                    notification_service_breaker.record_failure("down")
+                with patch('tasks.task.requests') as mock_requests:
+                    self.assertEqual(relay_outbox(), 0)
+                    mock_requests.post.assert_not_called()
+                # untouched: still due, no attempts burned
+                self.assertEqual([e.attempts for e in OutboxEvent.query.all()], [0, 0, 0])
+            finally:
+                db.session.remove()
+                db.drop_all()
+
+    def test_notification_task_lookup_fails_fast(self):
+        from notifications.app import app, _get_task, task_service_breaker
+        with app.app_context(), patch('notifications.app.requests') as mock_requests:
+            mock_requests.get.side_effect = requests.Timeout("slow")
+            for _ in range(task_service_breaker.failure_threshold + 3):
+                self.assertIsNone(_get_task(42))
+            self.assertEqual(mock_requests.get.call_count, task_service_breaker.failure_threshold)
+            status = app.test_client().get('/api/internal/circuit-breakers').get_json()
+            self.assertIn(OPEN, [b['state'] for b in status['breakers'] if b['name'] == 'task-service'])
+
+
+if __name__ == '__main__':
+    unittest.main()
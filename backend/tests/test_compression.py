@@ -0,0 +1,123 @@
+# backend/tests/test_compression.py
+import gzip
+import io
+import json
+import os
+import unittest
+from unittest.mock import patch
+
+# Set testing environment
+os.environ['TESTING'] = 'true'
+
+from flask import Flask, Response, send_file
+
+from common import compression
+from common.compression import init_compression
+from common.json_stream import iter_json, json_stream_response, JSONObject, RawJSON
+
+
+def make_app():
+    app = Flask(__name__)
+    init_compression(app, min_size=100)
+
+    @app.route("/big")
+    def big():
+        response = app.json.response([{"id": i, "title": "task"} for i in range(100)])
+        response.set_etag("v1")
+        return response
+
+    @app.route("/small")
+    def small():
+        return {"ok": True}
+
+    @app.route("/stream")
+    def stream():
+        return json_stream_response({"items": ({"id": i} for i in range(1000))})
+
+    @app.route("/file")
+    def file():
+        return send_file(io.BytesIO(b"x" * 1000), mimetype="text/plain")
+
+    return app
+
+
+class TestCompressResponse(unittest.TestCase):
+    """Negotiation, threshold and streaming behaviour of the after_request hook"""
+
+    def setUp(self):
+        self.client = make_app().test_client()
+
+    def test_gzip_above_threshold(self):
+        plain = self.client.get("/big")
+        response = self.client.get("/big", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response.headers["Vary"])
+        self.assertLess(len(response.data), len(plain.data))
+        self.assertEqual(gzip.decompress(response.data), plain.data)
+        self.assertEqual(int(response.headers["Content-Length"]), len(response.data))
+
+    def test_etag_weakened_when_compressed(self):
+        response = self.client.get("/big", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response.headers["ETag"], 'W/"v1"')
+        self.assertEqual(self.client.get("/big").headers["ETag"], '"v1"')
+
+    def test_not_compressed_when_small_or_not_accepted(self):
+        small = self.client.get("/small", headers={"Accept-Encoding": "gzip"})
+        self.assertNotIn("Content-Encoding", small.headers)
+        refused = self.client.get("/big", headers={"Accept-Encoding": "gzip;q=0, identity"})
+        self.assertNotIn("Content-Encoding", refused.headers)
+        self.assertNotIn("Content-Encoding", self.client.get("/big").headers)
+
+    def test_brotli_preferred_when_available(self):
+        with patch.object(compression, "available_encodings", return_value=["gzip"]):
+            response = self.client.get("/big", headers={"Accept-Encoding": "br, gzip"})
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        if compression.brotli is None:
+            self.skipTest("brotli not installed")
+        response = self.client.get("/big", headers={"Accept-Encoding": "gzip, br"})
+        self.assertEqual(response.headers["Content-Encoding"], "br")
+        self.assertEqual(compression.brotli.decompress(response.data), self.client.get("/big").data)
+
+    def test_stream_compressed_incrementally(self):
+        response = self.client.get("/stream", headers={"Accept-Encoding": "gzip"}, buffered=False)
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertNotIn("Content-Length", response.headers)
+        body = json.loads(gzip.decompress(b"".join(response.response)))
+        self.assertEqual(len(body["items"]), 1000)
+
+    def test_file_passthrough_untouched(self):
+        response = self.client.get("/file", headers={"Accept-Encoding": "gzip"})
+        self.assertNotIn("Content-Encoding", response.headers)
+        self.assertEqual(response.data, b"x" * 1000)
+
+
+class TestIterJson(unittest.TestCase):
+    """The incremental encoder produces the same document as json.dumps"""
+
+    def test_matches_json_dumps(self):
+        value = {"a": [1, 2.5, None, True], "b": {"c": "é\"q"}, "d": []}
+        self.assertEqual(json.loads("".join(iter_json(value))), value)
+
+    def test_lazy_parts(self):
+        consumed = []
+
+        def rows():
+            for i in range(3):
+                consumed.append(i)
+                yield {"id": i}
+
+        chunks = iter_json({"rows": rows(), "team": JSONObject(iter([("x", RawJSON('[{"id":7}]'))]))}, chunk_size=1)
+        first = next(chunks)
+        self.assertEqual(consumed, [])
+        text = first + "".join(chunks)
+        self.assertEqual(json.loads(text), {"rows": [{"id": 0}, {"id": 1}, {"id": 2}], "team": {"x": [{"id": 7}]}})
+
+    def test_chunks_bounded(self):
+        chunks = list(iter_json(list(range(10000)), chunk_size=1000))
+        self.assertGreater(len(chunks), 10)
+        self.assertTrue(all(len(c) < 1100 for c in chunks))
+
+
+if __name__ == '__main__':
+    unittest.main()
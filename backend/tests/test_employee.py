@@ -1,5 +1,11 @@
+import gzip
+import threading
 import unittest
-from employee.employee import app, db, Staff
+from unittest.mock import patch
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+from employee import employee as employee_service
+from employee.employee import app, db, Staff, invalidate_directory
 from models.staff import Staff, Manager, Director, SeniorManager
 
 
@@ -16,6 +22,8 @@ class TestEmployee(unittest.TestCase):
 
         with app.app_context():
             db.create_all()
+        # drop_all/create_all bypass the ORM, so start each test from a fresh directory snapshot
+        invalidate_directory()
 
     def tearDown(self):
         """Clean up database after each test."""
@@ -168,6 +176,290 @@ class TestEmployee(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTrue(any(emp["department"] == "Operations" for emp in response.get_json()))
 
+    def _register(self, name, email):
+        return self._register_in(name, email)
+
+    def test_bulk_internal_lookup_get(self):
+        """Fetch several employees in one call, reporting unknown ids."""
+        a = self._register("Bulk A", "bulka@gmail.com")
+        b = self._register("Bulk B", "bulkb@gmail.com")
+        response = self.client.get(f"/api/internal/employees?ids={a},{b},9999")
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual({e["employee_name"] for e in data["employees"]}, {"Bulk A", "Bulk B"})
+        self.assertEqual(data["missing"], [9999])
+
+    def test_bulk_internal_lookup_post(self):
+        """POST body form for id lists too long for a query string."""
+        ids = [self._register(f"Post {i}", f"post{i}@gmail.com") for i in range(3)]
+        response = self.client.post("/api/internal/employees", json={"ids": ids})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(e["employee_id"] for e in response.get_json()["employees"]), sorted(ids))
+
+    def test_bulk_internal_lookup_single_query(self):
+        """All requested staff are loaded with one SELECT."""
+        ids = [self._register(f"Q {i}", f"q{i}@gmail.com") for i in range(5)]
+        response, queries = self._count_queries(
+            lambda: self.client.get("/api/internal/employees?ids=" + ",".join(map(str, ids))))
+        self.assertEqual(len(response.get_json()["employees"]), 5)
+        self.assertEqual(queries, 1)
+
+    def test_bulk_internal_lookup_invalid(self):
+        """Non-integer ids and malformed bodies are rejected."""
+        self.assertEqual(self.client.get("/api/internal/employees?ids=1,abc").status_code, 400)
+        self.assertEqual(self.client.post("/api/internal/employees", json={"ids": "1,2"}).status_code, 400)
+        empty = self.client.get("/api/internal/employees")
+        self.assertEqual(empty.status_code, 200)
+        self.assertEqual(empty.get_json(), {"employees": [], "missing": []})
+
+    def _count_queries(self, fn):
+        statements = []
+
+        def count(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        with app.app_context():
+            event.listen(db.engine, "before_cursor_execute", count)
+            try:
+                result = fn()
+            finally:
+                event.remove(db.engine, "before_cursor_execute", count)
+        return result, len(statements)
+
+    def test_directory_served_from_snapshot(self):
+        """Repeat directory reads hit no SQL until staff change."""
+        self._register("Snap A", "snapa@gmail.com")
+        self.client.get("/employees/all")
+        response, queries = self._count_queries(lambda: self.client.get("/employees/all"))
+        self.assertEqual(queries, 0)
+        self.assertEqual([e["employee_name"] for e in response.get_json()], ["Snap A"])
+
+        _, queries = self._count_queries(lambda: (
+            self.client.get("/employees/IT"),
+            self.client.get("/departments"),
+            self.client.get("/employees/department/it/team/a"),
+        ))
+        self.assertEqual(queries, 0)
+
+    def test_directory_etag_revalidation(self):
+        """A matching If-None-Match gets an empty 304."""
+        self._register("Etag A", "etaga@gmail.com")
+        first = self.client.get("/employees/IT")
+        self.assertEqual(first.status_code, 200)
+        etag = first.headers["ETag"]
+        again = self.client.get("/employees/IT", headers={"If-None-Match": etag})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.data, b"")
+
+    def test_directory_gzip_keeps_revalidation(self):
+        """Compressed directory bodies carry a weak ETag that still revalidates to 304."""
+        for i in range(20):
+            self._register(f"Gzip {i}", f"gzip{i}@gmail.com")
+        plain = self.client.get("/employees/all")
+        first = self.client.get("/employees/all", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(first.headers["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(first.data), plain.data)
+        self.assertTrue(first.headers["ETag"].startswith("W/"))
+        again = self.client.get("/employees/all", headers={"Accept-Encoding": "gzip", "If-None-Match": first.headers["ETag"]})
+        self.assertEqual(again.status_code, 304)
+
+    def test_directory_rebuilt_after_register(self):
+        """Registering bumps the version, changes the ETag and shows the new employee."""
+        self._register("Dir A", "dira@gmail.com")
+        before = self.client.get("/employees/all")
+        self._register("Dir B", "dirb@gmail.com")
+        after = self.client.get("/employees/all", headers={"If-None-Match": before.headers["ETag"]})
+        self.assertEqual(after.status_code, 200)
+        self.assertGreater(int(after.headers["X-Directory-Version"]), int(before.headers["X-Directory-Version"]))
+        self.assertEqual({e["employee_name"] for e in after.get_json()}, {"Dir A", "Dir B"})
+
+    def test_directory_unknown_department_and_team(self):
+        """Unknown filters return an empty list, not an error."""
+        self.assertEqual(self.client.get("/employees/Nowhere").get_json(), [])
+        self.assertEqual(self.client.get("/employees/department/Nowhere/team/X").get_json(), [])
+
+    def test_team_lookup_is_case_insensitive(self):
+        """Department/team path segments match regardless of case and padding."""
+        self._register("Case A", "casea@gmail.com")
+        response = self.client.get("/employees/department/it/team/ a ")
+        self.assertEqual([e["employee_name"] for e in response.get_json()], ["Case A"])
+
+    def test_department_lookup_is_case_insensitive(self):
+        """Department lookups and the department list compare like the database collation."""
+        self._register_in("Fold A", "folda@gmail.com", department="Straße Ops")
+        self._register_in("Fold B", "foldb@gmail.com", department="STRASSE OPS")
+        response = self.client.get("/employees/strasse%20ops")
+        self.assertEqual({e["employee_name"] for e in response.get_json()}, {"Fold A", "Fold B"})
+        departments = self.client.get("/departments").get_json()
+        self.assertEqual([d for d in departments if d.casefold() == "strasse ops"], ["Straße Ops"])
+
+    def _register_in(self, name, email, department="IT", team="A"):
+        return self.client.post("/register", json={
+            "email": email,
+            "password": "123",
+            "department": department,
+            "employee_name": name,
+            "role": "staff",
+            "team": team
+        }).get_json()["employee_id"]
+
+    def test_search_prefix_on_name_and_email(self):
+        """q matches the start of the name or email, ignoring case and padding."""
+        self._register_in("Alice Tan", "alice@gmail.com")
+        self._register_in("Bob Lim", "ALTERNATE@gmail.com")
+        self._register_in("Carol Ng", "carol@gmail.com")
+        data = self.client.get("/employees/search?q=  AL ").get_json()
+        self.assertEqual([e["employee_name"] for e in data["employees"]], ["Alice Tan", "Bob Lim"])
+        self.assertIsNone(data["next_cursor"])
+
+    def test_search_keeps_inner_spaces(self):
+        """Inner whitespace is matched as typed, like the stored search columns."""
+        self._register_in("Mary  Ann", "maryann@gmail.com")
+        self._register_in("Mary Lou", "marylou@gmail.com")
+        names = lambda q: [e["employee_name"] for e in self.client.get(f"/employees/search?q={q}").get_json()["employees"]]
+        self.assertEqual(names("mary%20%20a"), ["Mary  Ann"])
+        self.assertEqual(names("mary%20a"), [])
+
+    def test_search_filters_department_and_team(self):
+        self._register_in("Dana One", "dana1@gmail.com", department="HR", team="A")
+        self._register_in("Dana Two", "dana2@gmail.com", department="HR", team="B")
+        self._register_in("Dana Three", "dana3@gmail.com", department="IT", team="A")
+        data = self.client.get("/employees/search?q=dana&department=HR&team=B").get_json()
+        self.assertEqual([e["employee_name"] for e in data["employees"]], ["Dana Two"])
+
+    def test_search_treats_wildcards_literally(self):
+        self._register_in("Eve", "eve@gmail.com")
+        self.assertEqual(self.client.get("/employees/search?q=%25").get_json()["employees"], [])
+        self.assertEqual(self.client.get("/employees/search?q=_ve").get_json()["employees"], [])
+
+    def test_search_keyset_pagination(self):
+        """Walking next_cursor returns every match exactly once, in name order."""
+        names = ["Sam %d" % i for i in range(7)] + ["Sam 3"]
+        for i, name in enumerate(names):
+            self._register_in(name, f"sam{i}@gmail.com")
+
+        seen, cursor = [], None
+        while True:
+            url = "/employees/search?q=sam&limit=3" + (f"&cursor={cursor}" if cursor else "")
+            data = self.client.get(url).get_json()
+            self.assertLessEqual(len(data["employees"]), 3)
+            seen.extend(data["employees"])
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+        self.assertEqual([e["employee_name"] for e in seen], sorted(names))
+        self.assertEqual(len({e["employee_id"] for e in seen}), len(names))
+
+    def test_search_invalid_cursor(self):
+        response = self.client.get("/employees/search?q=a&cursor=notanumber_x")
+        self.assertEqual(response.status_code, 400)
+
+    def _add_with_hash(self, email, pwhash):
+        with app.app_context():
+            db.session.add(Staff(employee_name="Hash User", email=email, department="IT",
+                                 role="staff", password=pwhash, team="A"))
+            db.session.commit()
+
+    def _stored_hash(self, email):
+        with app.app_context():
+            return Staff.query.filter_by(email=email).first().password
+
+    def test_register_uses_hash_policy(self):
+        self._register("Policy", "policy@gmail.com")
+        self.assertTrue(self._stored_hash("policy@gmail.com").startswith(employee_service.PASSWORD_HASH_PREFIX + "$"))
+
+    def test_login_rehashes_outdated_hash(self):
+        """A hash from an older cost policy is upgraded after a successful login."""
+        self._add_with_hash("old@gmail.com", generate_password_hash("pw", "pbkdf2:sha256:1000"))
+        version = self.client.get("/employees/all").headers["X-Directory-Version"]
+        response = self.client.post("/login", json={"email": "old@gmail.com", "password": "pw"})
+        self.assertEqual(response.status_code, 200)
+        upgraded = self._stored_hash("old@gmail.com")
+        self.assertTrue(upgraded.startswith(employee_service.PASSWORD_HASH_PREFIX + "$"))
+        # new hash still verifies, and a password-only change leaves the directory alone
+        self.assertEqual(self.client.post("/login", json={"email": "old@gmail.com", "password": "pw"}).status_code, 200)
+        self.assertEqual(self.client.get("/employees/all").headers["X-Directory-Version"], version)
+
+    def test_login_keeps_current_hash(self):
+        self._register("Current", "current@gmail.com")
+        before = self._stored_hash("current@gmail.com")
+        self.client.post("/login", json={"email": "current@gmail.com", "password": "123"})
+        self.assertEqual(self._stored_hash("current@gmail.com"), before)
+
+    def test_short_form_policy_does_not_rehash_every_login(self):
+        """A policy like "scrypt" is compared in the expanded form werkzeug stores."""
+        self._add_with_hash("short@gmail.com", generate_password_hash("pw", "scrypt"))
+        before = self._stored_hash("short@gmail.com")
+        with patch.object(employee_service, "PASSWORD_HASH_PREFIX", employee_service.hash_method_prefix("scrypt")):
+            self.assertFalse(employee_service.needs_rehash(before))
+            self.assertEqual(self.client.post("/login", json={"email": "short@gmail.com", "password": "pw"}).status_code, 200)
+        self.assertEqual(self._stored_hash("short@gmail.com"), before)
+
+    def test_wrong_password_not_rehashed(self):
+        old = generate_password_hash("pw", "pbkdf2:sha256:1000")
+        self._add_with_hash("wrong@gmail.com", old)
+        response = self.client.post("/login", json={"email": "wrong@gmail.com", "password": "nope"})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self._stored_hash("wrong@gmail.com"), old)
+
+    def test_full_hash_queue_returns_503(self):
+        """Login and register fail fast with Retry-After when the hashing queue is full."""
+        self._register("Busy", "busy@gmail.com")
+        full = threading.BoundedSemaphore(1)
+        full.acquire()
+        with patch.object(employee_service, "_hash_slots", full):
+            login = self.client.post("/login", json={"email": "busy@gmail.com", "password": "123"})
+            register = self.client.post("/register", json={
+                "email": "busy2@gmail.com", "password": "123", "department": "IT",
+                "employee_name": "Busy Two", "role": "staff", "team": "A"
+            })
+        self.assertEqual(login.status_code, 503)
+        self.assertEqual(login.headers["Retry-After"], "1")
+        self.assertEqual(register.status_code, 503)
+        with app.app_context():
+            self.assertIsNone(Staff.query.filter_by(email="busy2@gmail.com").first())
+
+    def test_timed_out_job_keeps_its_slot(self):
+        """A request that gives up on its hash job doesn't free the slot while the job still runs."""
+        from concurrent.futures import ThreadPoolExecutor
+        release = threading.Event()
+        pool = ThreadPoolExecutor(max_workers=1)
+        slots = threading.BoundedSemaphore(1)
+        try:
+            with patch.object(employee_service, "PASSWORD_HASH_WORKERS", 1), \
+                    patch.object(employee_service, "PASSWORD_HASH_TIMEOUT", 0.05), \
+                    patch.object(employee_service, "_hash_slots", slots), \
+                    patch.object(employee_service, "hash_pool", return_value=pool):
+                with self.assertRaises(employee_service.HasherBusy):
+                    employee_service.run_hash_job(release.wait)
+                # still running: the next job is refused without reaching the pool
+                with self.assertRaises(employee_service.HasherBusy):
+                    employee_service.run_hash_job(len, "x")
+                release.set()
+                pool.shutdown(wait=True)
+                self.assertTrue(slots.acquire(blocking=False))
+        finally:
+            release.set()
+            pool.shutdown()
+
+    def test_fake_user_hashed_through_queue(self):
+        full = threading.BoundedSemaphore(1)
+        full.acquire()
+        with patch.object(employee_service, "_hash_slots", full):
+            self.assertEqual(self.client.post("/create-fake-user").status_code, 503)
+        self.assertEqual(self.client.post("/create-fake-user").status_code, 201)
+        self.assertTrue(self._stored_hash("zhengruichew@gmail.com").startswith(employee_service.PASSWORD_HASH_PREFIX + "$"))
+
+    def test_hash_jobs_run_in_process_pool(self):
+        pwhash = generate_password_hash("pw", "pbkdf2:sha256:1000")
+        with patch.object(employee_service, "PASSWORD_HASH_WORKERS", 1), \
+                patch.object(employee_service, "_hash_pool", None):
+            try:
+                self.assertTrue(employee_service.verify_password(pwhash, "pw"))
+                self.assertFalse(employee_service.verify_password(pwhash, "nope"))
+            finally:
+                employee_service._hash_pool.shutdown()
+
     # def test_get_employees_by_project_no_relation(self):
     #     """Fetch employees by project (empty result expected)."""
     #     response = self.client.get("/employee/1")
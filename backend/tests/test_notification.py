@@ -201,6 +201,25 @@ class TestRequirement1_ApproachingDeadlines(unittest.TestCase):
         self.assertGreater(len(deadline_notifs), 0)
         self.assertIn('Deadline in 1 day', deadline_notifs[0].title)
     
+    @patch('notifications.app.requests.get')
+    def test_reminder_fetch_is_filtered_and_paged(self, mock_get):
+        """The reminder job asks only for open tasks inside the longest reminder window, following pages"""
+        self.client.put('/api/preferences', headers={'X-Employee-Id': '100'},
+                        json={'deadline_reminder_days': '14,1'})
+        task = {'task_id': 5, 'title': 'Paged', 'deadline': (datetime.now(timezone.utc) + timedelta(days=1)).isoformat(),
+                'status': 'ongoing', 'owner': 100, 'collaborators': [100], 'parent_id': None}
+        pages = [{'tasks': [], 'next_after_id': 4}, {'tasks': [task], 'next_after_id': None}]
+        mock_get.side_effect = lambda url, **kw: MagicMock(ok=True, json=MagicMock(return_value=pages.pop(0)))
+
+        _send_deadline_reminders()
+
+        first, second = (c.kwargs['params'] for c in mock_get.call_args_list)
+        self.assertEqual(first['exclude_status'], 'done,completed')
+        horizon = datetime.fromisoformat(first['deadline_to'])
+        self.assertEqual((horizon.date() - datetime.now(timezone.utc).date()).days, 15)
+        self.assertEqual((first['after_id'], second['after_id']), (0, 4))
+        self.assertTrue(Notification.query.filter_by(staff_id=100, type='deadline_1_day').first())
+
     @patch('notifications.app.requests.get')
     def test_custom_deadline_notification_14_days(self, mock_get):
         """Test custom deadline notification (14 days)"""
@@ -251,6 +270,20 @@ class TestRequirement1_ApproachingDeadlines(unittest.TestCase):
         self.assertFalse(_within_day(deadline, 3))
 
 
+    def test_clear_deadline_logs_for_many_tasks(self):
+        """Deadline logs for several rescheduled tasks are cleared in one call"""
+        for task_id in (11, 12, 13):
+            db.session.add(DeadlineNotificationLog(log_id=f"log-{task_id}", task_id=task_id, staff_id=100,
+                                                   notification_type='deadline_reminder_1'))
+        db.session.commit()
+
+        response = self.client.post('/api/internal/clear-deadline-logs', json={'task_ids': [11, 12]})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['deleted'], 2)
+        self.assertEqual([log.task_id for log in DeadlineNotificationLog.query.all()], [13])
+        self.assertEqual(self.client.post('/api/internal/clear-deadline-logs', json={'task_ids': 'x'}).status_code, 400)
+
 class TestRequirement2_OverdueTasks(unittest.TestCase):
     """
     REQUIREMENT 2: Notify owner and collaborators when task is overdue
@@ -923,6 +956,114 @@ class TestRequirement6_TaskUpdates(unittest.TestCase):
         self.assertGreater(len(collab_notifs), 0)
 
 
+    @patch('notifications.app.requests.post')
+    @patch('notifications.app.requests.get')
+    def test_status_change_resolves_actor_with_bulk_lookup(self, mock_get, mock_post):
+        """Actor name comes from a single call to the bulk employee lookup"""
+        mock_get.return_value.ok = True
+        mock_get.return_value.json.return_value = {
+            'task_id': 58,
+            'title': 'Bulk Lookup Task',
+            'status': 'done',
+            'owner': 501,
+            'collaborators': [501, 502]
+        }
+        mock_post.return_value.ok = True
+        mock_post.return_value.json.return_value = {
+            'employees': [{'employee_id': 501, 'employee_name': 'Task Owner'}],
+            'missing': []
+        }
+
+        response = self.client.post('/api/events/task-updated',
+            json={
+                'task_id': 58,
+                'changed_fields': ['status', 'deadline'],
+                'actor_id': 501
+            }
+        )
+
+        self.assertEqual(response.status_code, 200)
+        mock_post.assert_called_once()
+        self.assertTrue(mock_post.call_args[0][0].endswith('/api/internal/employees'))
+        self.assertEqual(mock_post.call_args[1]['json'], {'ids': [501]})
+        # task-service fetch is the only GET; no per-actor employee calls
+        self.assertEqual(mock_get.call_count, 1)
+        notifs = Notification.query.filter_by(related_task_id=58).all()
+        self.assertTrue(all(n.message.startswith('Task Owner') for n in notifs))
+
+    @patch('notifications.app.requests.post')
+    def test_bulk_created_tasks_aggregated_per_recipient(self, mock_post):
+        """A bulk import produces one notification per recipient, none for the importer"""
+        mock_post.return_value.ok = True
+        mock_post.return_value.json.return_value = {'employees': [{'employee_id': 501, 'employee_name': 'Task Owner'}]}
+
+        response = self.client.post('/api/events/tasks-created', json={
+            'actor_id': 501,
+            'tasks': [
+                {'task_id': None, 'title': f'Imported {i}', 'parent_id': None, 'owner': 501, 'collaborators': [501, 502]}
+                for i in range(3)
+            ]
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['notified'], 1)
+        self.assertEqual(Notification.query.filter_by(staff_id=501).count(), 0)
+        notifs = Notification.query.filter_by(staff_id=502).all()
+        self.assertEqual(len(notifs), 1)
+        self.assertEqual(notifs[0].type, 'task_assigned')
+        self.assertIn('3 new tasks', notifs[0].title)
+        self.assertIn('Task Owner', notifs[0].message)
+
+    @patch('notifications.app.requests.post')
+    @patch('notifications.app.requests.get')
+    def test_batch_status_updates_one_actor_lookup(self, mock_get, mock_post):
+        """A batch of status changes resolves the actor once and notifies every task's recipients"""
+        mock_get.side_effect = lambda url, **kw: MagicMock(ok=True, json=MagicMock(return_value={
+            'task_id': int(url.rsplit('/', 1)[1]),
+            'title': f"Batch {url.rsplit('/', 1)[1]}",
+            'status': 'ongoing',
+            'owner': 501,
+            'collaborators': [501, 502]
+        }))
+        mock_post.return_value.ok = True
+        mock_post.return_value.json.return_value = {'employees': [{'employee_id': 501, 'employee_name': 'Task Owner'}]}
+
+        response = self.client.post('/api/events/task-updated/batch', json={'events': [
+            {'task_id': tid, 'changed_fields': ['status'], 'actor_id': 501} for tid in (71, 72, 73)
+        ]})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['notified'], 6)
+        mock_post.assert_called_once()
+        self.assertEqual(mock_post.call_args[1]['json'], {'ids': [501]})
+        notifs = Notification.query.filter_by(staff_id=502, type='task_status_updated').all()
+        self.assertEqual(sorted(n.related_task_id for n in notifs), [71, 72, 73])
+        self.assertIn('Task Owner', notifs[0].message)
+
+    @patch('notifications.app.requests.post')
+    @patch('notifications.app.requests.get')
+    def test_snapshot_events_do_not_call_back(self, mock_get, mock_post):
+        """Events carrying a task snapshot and actor name are rendered without calling other services"""
+        events = [{
+            'task_id': tid,
+            'changed_fields': ['status'],
+            'actor_id': 501,
+            'actor_name': 'Task Owner',
+            'task': {'task_id': tid, 'title': f"Snap {tid}", 'status': 'done', 'priority': 5,
+                     'owner': 501, 'parent_id': None, 'collaborators': [501, 502]}
+        } for tid in (81, 82)]
+
+        single = self.client.post('/api/events/task-updated', json=events[0])
+        batch = self.client.post('/api/events/task-updated/batch', json={'events': events[1:]})
+
+        self.assertEqual(single.status_code, 200)
+        self.assertEqual(batch.get_json()['notified'], 2)
+        mock_get.assert_not_called()
+        mock_post.assert_not_called()
+        notif = Notification.query.filter_by(staff_id=502, related_task_id=82).first()
+        self.assertEqual(notif.title, 'Status updated: Snap 82')
+        self.assertIn('Task Owner changed task status to: done', notif.message)
+
 class TestNotificationPreferencesIntegration(unittest.TestCase):
     """
     Integration tests for notification preferences affecting all requirements
@@ -1,6 +1,7 @@
 # backend/tests/test_project_timeline.py
 import unittest
 import os
+import json
 from datetime import datetime, timedelta, timezone
 from unittest.mock import patch, MagicMock
 
@@ -492,6 +493,178 @@ class TestProjectTimelineAPI(unittest.TestCase):
                 data = response.get_json()
                 self.assertIn('error', data)
     
+    # ----------------------------------------------------------------------
+    # Test Deadline Window & Query Batching
+    # ----------------------------------------------------------------------
+    
+    def _add_dated_tasks(self, days_list, owner=1):
+        base_date = datetime(2030, 1, 1)
+        with self.app.app_context():
+            for days in days_list:
+                db.session.add(Task(
+                    title=f"Day {days}",
+                    description="Windowed task",
+                    deadline=base_date + timedelta(days=days),
+                    status="ongoing",
+                    owner=owner,
+                    collaborators=[],
+                    priority=1,
+                    project_id=1
+                ))
+            db.session.commit()
+    
+    def test_timeline_deadline_window(self):
+        """from/to restrict tasks to deadlines inside the window (inclusive)"""
+        self.login_as(1, 'manager', 'IT')
+        self._add_dated_tasks([1, 5, 10, 20])
+        
+        response = self.client.get('/projects/1/timeline?from=2030-01-06T00:00:00Z&to=2030-01-11')
+        self.assertEqual(response.status_code, 200)
+        
+        data = response.get_json()
+        titles = sorted(t['title'] for t in data['tasks'])
+        self.assertEqual(titles, ["Day 10", "Day 5"])
+        self.assertEqual(data['project_date_range']['start_date'], "2030-01-06T00:00:00")
+        # members are still returned when the window is narrower than the project
+        self.assertGreater(len(data['team_members']), 0)
+    
+    def test_timeline_date_only_to_covers_that_day(self):
+        """A date-only `to` includes the whole day, up to (not including) the next midnight"""
+        self.login_as(1, 'manager', 'IT')
+        self._add_dated_tasks([9.75, 10, 10.5])
+        
+        data = self.client.get('/projects/1/timeline?to=2030-01-10').get_json()
+        self.assertEqual(sorted(t['due_date'] for t in data['tasks']), ["2030-01-10T18:00:00"])
+        
+        data = self.client.get('/projects/1/timeline?to=2030-01-11T00:00:00').get_json()
+        self.assertEqual(len(data['tasks']), 2)
+    
+    def test_timeline_empty_window_keeps_members(self):
+        self.login_as(1, 'manager', 'IT')
+        self._add_dated_tasks([1])
+        
+        data = self.client.get('/projects/1/timeline?from=2031-01-01').get_json()
+        self.assertEqual(data['tasks'], [])
+        self.assertGreater(len(data['team_members']), 0)
+    
+    def test_timeline_invalid_window(self):
+        self.login_as(1, 'manager', 'IT')
+        response = self.client.get('/projects/1/timeline?from=not-a-date')
+        self.assertEqual(response.status_code, 400)
+    
+    def test_timeline_query_count_independent_of_task_count(self):
+        """Visibility and collaborators are resolved in SQL, not with one query per task"""
+        from sqlalchemy import event
+        
+        self.login_as(2, 'staff', 'IT')
+        with self.app.app_context():
+            for i in range(30):
+                task = Task(
+                    title=f"Bulk {i}",
+                    description="Bulk",
+                    deadline=datetime(2030, 1, 1) + timedelta(days=i),
+                    status="ongoing",
+                    owner=1,
+                    collaborators=[],
+                    priority=1,
+                    project_id=1
+                )
+                db.session.add(task)
+                db.session.flush()
+                task.collaborators.append(self.manager)
+                if i % 2 == 0:
+                    task.collaborators.append(self.staff1)
+            db.session.commit()
+            
+            statements = []
+            def count(conn, cursor, statement, *args):
+                statements.append(statement)
+            event.listen(db.engine, "before_cursor_execute", count)
+            try:
+                response = self.client.get('/projects/1/timeline')
+            finally:
+                event.remove(db.engine, "before_cursor_execute", count)
+        
+        data = response.get_json()
+        self.assertEqual(len(data['tasks']), 15)
+        for task in data['tasks']:
+            self.assertEqual(task['collaborators'], [1, 2])
+        self.assertLessEqual(len(statements), 5)
+    
+    def _get_ndjson(self, url):
+        response = self.client.get(url, headers={'Accept': 'application/x-ndjson'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        return [json.loads(line) for line in response.data.decode().splitlines() if line]
+    
+    def test_timeline_ndjson_stream(self):
+        """NDJSON mode streams a header, task records, then member and date range trailers"""
+        self.login_as(1, 'manager', 'IT')
+        self._add_dated_tasks([3, 1, 7])
+        
+        records = self._get_ndjson('/projects/1/timeline')
+        self.assertEqual(records[0], {"type": "timeline", "project_id": 1})
+        
+        tasks = [r for r in records if r['type'] == 'task']
+        self.assertEqual(sorted(t['title'] for t in tasks), ["Day 1", "Day 3", "Day 7"])
+        
+        members = [r for r in records if r['type'] == 'member']
+        self.assertEqual(len(members), 4)
+        
+        self.assertEqual(records[-1], {
+            "type": "project_date_range",
+            "start_date": "2030-01-02T00:00:00",
+            "end_date": "2030-01-08T00:00:00"
+        })
+        # trailers come after every task record
+        last_task_index = max(i for i, r in enumerate(records) if r['type'] == 'task')
+        first_member_index = min(i for i, r in enumerate(records) if r['type'] == 'member')
+        self.assertLess(last_task_index, first_member_index)
+    
+    def test_timeline_ndjson_missing_project(self):
+        """NDJSON mode answers 404 before streaming, as the JSON mode does, when the project is gone"""
+        self.login_as(1, 'manager', 'IT')
+        with self.app.app_context():
+            # tasks left pointing at a project that no longer exists
+            db.session.add(Task(title="Orphan", description="Orphan", deadline=datetime(2030, 1, 2),
+                                status="ongoing", owner=1, collaborators=[], priority=1, project_id=999))
+            db.session.commit()
+        
+        json_response = self.client.get('/projects/999/timeline')
+        stream_response = self.client.get('/projects/999/timeline', headers={'Accept': 'application/x-ndjson'})
+        self.assertEqual(json_response.status_code, 404)
+        self.assertEqual(stream_response.status_code, 404)
+        self.assertEqual(stream_response.get_json(), {"error": "Project not found"})
+    
+    def test_timeline_ndjson_matches_json(self):
+        """Streamed task records carry the same fields and collaborators as the JSON response"""
+        self.login_as(2, 'staff', 'IT')
+        with self.app.app_context():
+            for i, collaborators in enumerate([[self.staff1, self.manager], [self.manager], [self.staff1]]):
+                task = Task(
+                    title=f"Stream {i}",
+                    description="Stream",
+                    deadline=datetime(2030, 1, 1) + timedelta(days=i),
+                    status="ongoing",
+                    owner=1,
+                    collaborators=[],
+                    priority=1,
+                    project_id=1
+                )
+                db.session.add(task)
+                db.session.flush()
+                for c in collaborators:
+                    task.collaborators.append(c)
+            db.session.commit()
+        
+        json_tasks = self.client.get('/projects/1/timeline').get_json()['tasks']
+        stream_tasks = [r for r in self._get_ndjson('/projects/1/timeline') if r['type'] == 'task']
+        for r in stream_tasks:
+            r.pop('type')
+        key = lambda t: t['id']
+        self.assertEqual(sorted(stream_tasks, key=key), sorted(json_tasks, key=key))
+        self.assertEqual(len(stream_tasks), 2)
+    
     # ----------------------------------------------------------------------
     # Test Team Member Filtering
     # ----------------------------------------------------------------------
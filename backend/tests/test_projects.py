@@ -344,12 +344,12 @@ class TestProjectsAPI(unittest.TestCase):
             self.app.config["TESTING"] = original_testing
 
     # ----------------------------------------------------------------------
-    # Task counts persisted
+    # Task counts (aggregated in SQL, GET does not write)
     # ----------------------------------------------------------------------
 
-    def test_task_counts_persisted_to_db(self):
+    def test_task_counts_aggregated_without_writes(self):
         """
-        GET /projects should compute tasksTotal/tasksDone and persist them to the DB.
+        GET /projects should compute tasksTotal/tasksDone live and leave the stored counters untouched.
         """
         from models.task import Task
 
@@ -357,8 +357,9 @@ class TestProjectsAPI(unittest.TestCase):
             # Create two projects
             p1 = Project(name="Counts P1", owner="O", owner_id=self.staff1_id)
             p2 = Project(name="Counts P2", owner="O", owner_id=self.staff1_id)
-            db.session.add_all([p1, p2]); db.session.commit()
-            pid1, pid2 = p1.id, p2.id
+            p3 = Project(name="Counts P3", owner="O", owner_id=self.staff1_id, tasks_total=7, tasks_done=7)
+            db.session.add_all([p1, p2, p3]); db.session.commit()
+            pid1, pid2, pid3 = p1.id, p2.id, p3.id
 
             # Create tasks for p1: 3 total, 2 done; p2: 1 done
             t1 = Task(title="T1", description="D1",
@@ -371,7 +372,7 @@ class TestProjectsAPI(unittest.TestCase):
                       project_id=pid1, priority=5, collaborators=[])
             t3 = Task(title="T3", description="D3",
                       deadline=datetime.utcnow() + timedelta(days=7),
-                      status="done", owner=self.staff1_id,
+                      status="Done", owner=self.staff1_id,
                       project_id=pid1, priority=5, collaborators=[])
             t4 = Task(title="T4", description="D4",
                       deadline=datetime.utcnow() + timedelta(days=7),
@@ -385,95 +386,49 @@ class TestProjectsAPI(unittest.TestCase):
 
         p1_data = next(p for p in data if p["name"] == "Counts P1")
         p2_data = next(p for p in data if p["name"] == "Counts P2")
+        p3_data = next(p for p in data if p["name"] == "Counts P3")
 
         self.assertEqual(p1_data["tasksTotal"], 3)
         self.assertEqual(p1_data["tasksDone"], 2)
         self.assertEqual(p2_data["tasksTotal"], 1)
         self.assertEqual(p2_data["tasksDone"], 1)
+        # no tasks -> live zero, not the stale stored counter
+        self.assertEqual(p3_data["tasksTotal"], 0)
+        self.assertEqual(p3_data["tasksDone"], 0)
 
-        # Verify persisted in DB
+        # Stored counters are not rewritten by a read
         with self.app.app_context():
-            p1_row = Project.query.get(pid1)
-            p2_row = Project.query.get(pid2)
-            self.assertEqual(p1_row.tasks_total, 3)
-            self.assertEqual(p1_row.tasks_done, 2)
-            self.assertEqual(p2_row.tasks_total, 1)
-            self.assertEqual(p2_row.tasks_done, 1)
-
-    def test_task_counts_persist_commit_failure_returns_counts(self):
+            self.assertEqual(Project.query.get(pid1).tasks_total, 0)
+            self.assertEqual(Project.query.get(pid3).tasks_total, 7)
+
+    def test_list_projects_does_not_commit(self):
         """
-        If persisting counts fails, the endpoint should still return computed counts.
+        A read endpoint must not commit.
         """
-        from models.task import Task
-        from unittest.mock import patch
-
         with self.app.app_context():
-            p = Project(name="Persist Fail P", owner="O", owner_id=self.staff1_id)
+            p = Project(name="No Write P", owner="O", owner_id=self.staff1_id)
             db.session.add(p); db.session.commit()
-            pid = p.id
-            # 2 tasks, 1 done
-            t1 = Task(title="T1", description="D1",
-                      deadline=datetime.utcnow() + timedelta(days=7),
-                      status="done", owner=self.staff1_id,
-                      project_id=pid, priority=5, collaborators=[])
-            t2 = Task(title="T2", description="D2",
-                      deadline=datetime.utcnow() + timedelta(days=7),
-                      status="ongoing", owner=self.staff1_id,
-                      project_id=pid, priority=5, collaborators=[])
-            db.session.add_all([t1, t2]); db.session.commit()
 
-        # Mock commit to fail during GET
-        with patch("projects.app.db.session.commit", side_effect=Exception("commit failed")):
+        with patch("projects.app.db.session.commit") as mock_commit:
             res = self.client.get("/projects")
             self.assertEqual(res.status_code, 200)
-            data = res.get_json()
-            p_data = next(x for x in data if x["name"] == "Persist Fail P")
-            self.assertEqual(p_data["tasksTotal"], 2)
-            self.assertEqual(p_data["tasksDone"], 1)
+            mock_commit.assert_not_called()
 
-    @patch('projects.app.Task')
-    def test_list_projects_with_task_counts(self, mock_task_class):
-        """Test that project listing includes task counts from tasks service"""
-        # Create a test project
+    def test_task_counts_limited_to_listed_projects(self):
+        """The aggregate is only asked about the projects being returned."""
         with self.app.app_context():
-            project = Project(
-                name="Project with Tasks",
-                owner="John Doe",
-                owner_id=self.staff1_id
-            )
-            db.session.add(project)
-            db.session.commit()
-            project_id = project.id
-        
-        # Mock Task.query.all() to return tasks
-        mock_task1 = MagicMock()
-        mock_task1.project_id = project_id
-        mock_task1.task_id = 1
-        mock_task1.status = "done"
-        
-        mock_task2 = MagicMock()
-        mock_task2.project_id = project_id
-        mock_task2.task_id = 2
-        mock_task2.status = "ongoing"
-        
-        mock_task3 = MagicMock()
-        mock_task3.project_id = 999  # Different project
-        mock_task3.task_id = 3
-        mock_task3.status = "done"
-        
-        mock_task_class.query.all.return_value = [mock_task1, mock_task2, mock_task3]
-        
-        response = self.client.get("/projects")
-        
+            p = Project(name="Scoped P", owner="O", owner_id=self.staff1_id)
+            db.session.add(p); db.session.commit()
+            pid = p.id
+
+        with patch("projects.app.task_counts_by_project", return_value={pid: (2, 1)}) as mock_counts:
+            response = self.client.get("/projects")
+
         self.assertEqual(response.status_code, 200)
-        data = response.get_json()
-        
-        # Find our project
-        project_data = next(p for p in data if p["name"] == "Project with Tasks")
-        
-        # Should have correct task counts
-        self.assertEqual(project_data["tasksTotal"], 2)  # 2 tasks for this project
-        self.assertEqual(project_data["tasksDone"], 1)   # 1 done task
+        mock_counts.assert_called_once_with([pid])
+        project_data = next(p for p in response.get_json() if p["name"] == "Scoped P")
+        self.assertEqual(project_data["tasksTotal"], 2)
+        self.assertEqual(project_data["tasksDone"], 1)
 
     @patch('projects.app.Task')
     def test_list_projects_task_query_error(self, mock_task_class):
@@ -488,8 +443,7 @@ class TestProjectsAPI(unittest.TestCase):
             db.session.add(project)
             db.session.commit()
         
-        # Mock Task.query.all() to raise an exception
-        mock_task_class.query.all.side_effect = Exception("Database error")
+        # Mocked Task columns make the aggregate query fail
         
         response = self.client.get("/projects")
         
@@ -640,6 +594,96 @@ class TestProjectsAPI(unittest.TestCase):
             next_time = datetime.fromisoformat(data[i + 1]["updatedAt"].replace("Z", "+00:00"))
             self.assertGreaterEqual(current_time, next_time)
 
+    def test_list_projects_members_loaded_in_one_query(self):
+        """Member ids/names for all listed projects come from a single query, not one per project"""
+        from sqlalchemy import event
+
+        with self.app.app_context():
+            staff = Staff.query.filter(Staff.employee_id.in_([self.staff1_id, self.staff2_id])).all()
+            for i in range(20):
+                project = Project(name=f"Member P{i}", owner="O", owner_id=self.staff1_id)
+                project.members = staff
+                db.session.add(project)
+            db.session.commit()
+
+            statements = []
+            def count(conn, cursor, statement, *args):
+                statements.append(statement)
+            event.listen(db.engine, "before_cursor_execute", count)
+            try:
+                response = self.client.get("/projects")
+            finally:
+                event.remove(db.engine, "before_cursor_execute", count)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(len(data), 20)
+        for p in data:
+            self.assertEqual(p["memberIds"], sorted([self.staff1_id, self.staff2_id]))
+            self.assertEqual(set(p["memberNames"]), {"John Doe", "Jane Smith"})
+        member_queries = [s for s in statements if "project_members" in s]
+        self.assertEqual(len(member_queries), 1)
+
+    def test_list_projects_keyset_pagination(self):
+        """?limit pages through projects newest-first using the X-Next-Cursor header"""
+        with self.app.app_context():
+            base = datetime(2025, 1, 1)
+            for i in range(5):
+                db.session.add(Project(name=f"Page {i}", owner="O", owner_id=self.staff1_id,
+                                       updated_at=base + timedelta(minutes=i)))
+            # same updated_at as "Page 4" to exercise the id tie-breaker
+            db.session.add(Project(name="Page 4b", owner="O", owner_id=self.staff1_id,
+                                   updated_at=base + timedelta(minutes=4)))
+            db.session.commit()
+
+        seen = []
+        cursor = None
+        pages = 0
+        while True:
+            url = "/projects?limit=2" + (f"&cursor={cursor}" if cursor else "")
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, 200)
+            seen.extend(p["name"] for p in res.get_json())
+            pages += 1
+            cursor = res.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(seen, ["Page 4b", "Page 4", "Page 3", "Page 2", "Page 1", "Page 0"])
+
+    def test_unpaged_listing_is_a_snapshot(self):
+        """A project edited while the full listing streams is still listed exactly once"""
+        import projects.app as projects_app
+        with self.app.app_context():
+            base = datetime(2025, 1, 1)
+            projects = [Project(name=f"Snap {i}", owner="O", owner_id=self.staff1_id,
+                                updated_at=base + timedelta(minutes=i)) for i in range(5)]
+            db.session.add_all(projects)
+            db.session.commit()
+            oldest = projects[0].id
+
+        real_dicts = projects_app.project_list_dicts
+        calls = []
+
+        def bump_oldest_then_build(rows):
+            if not calls:
+                db.session.execute(db.update(Project).where(Project.id == oldest)
+                                   .values(updated_at=datetime(2030, 1, 1)))
+            calls.append(len(rows))
+            return real_dicts(rows)
+
+        with patch.object(projects_app, "MAX_PROJECT_PAGE_SIZE", 2), \
+                patch.object(projects_app, "project_list_dicts", side_effect=bump_oldest_then_build):
+            res = self.client.get("/projects")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(calls, [2, 2, 1])
+        self.assertEqual([p["name"] for p in res.get_json()], [f"Snap {i}" for i in range(4, -1, -1)])
+
+    def test_list_projects_invalid_cursor(self):
+        res = self.client.get("/projects?limit=2&cursor=garbage")
+        self.assertEqual(res.status_code, 400)
+
     # ----------------------------------------------------------------------
     # Test Update Project (owner-only)
     # ----------------------------------------------------------------------
@@ -769,5 +813,111 @@ class TestProjectsAPI(unittest.TestCase):
         self.assertIn(self.staff1_id, data["memberIds"])
 
 
+    # ----------------------------------------------------------------------
+    # Bulk roster API
+    # ----------------------------------------------------------------------
+
+    def _bulk_roster_project(self, many=0):
+        """Project owned by staff1 with staff2 as member, plus `many` extra staff rows"""
+        with self.app.app_context():
+            project = Project(name="Roster", owner="Owner", owner_id=self.staff1_id)
+            project.members = Staff.query.filter(Staff.employee_id.in_([self.staff1_id, self.staff2_id])).all()
+            db.session.add(project)
+            extra = [Staff(employee_name=f"Bulk {i}", email=f"bulk{i}@example.com", role="staff",
+                           department="IT", team="A", password="x") for i in range(many)]
+            db.session.add_all(extra)
+            db.session.commit()
+            return project.id, [s.employee_id for s in extra]
+
+    def _cleanup_bulk_staff(self, ids):
+        with self.app.app_context():
+            db.session.execute(db.text("DELETE FROM project_members"))
+            Staff.query.filter(Staff.employee_id.in_(ids)).delete(synchronize_session=False)
+            db.session.commit()
+
+    def test_bulk_roster_add_and_remove(self):
+        pid, extra_ids = self._bulk_roster_project(many=200)
+        try:
+            with self.client.session_transaction() as sess:
+                sess["employee_id"] = self.staff1_id
+
+            res = self.client.patch(f"/projects/{pid}/members",
+                                    json={"add": extra_ids + [9999], "remove": [self.staff2_id]})
+            self.assertEqual(res.status_code, 200)
+            data = res.get_json()
+            self.assertEqual(data["added"], sorted(extra_ids))
+            self.assertEqual(data["removed"], [self.staff2_id])
+            self.assertEqual(data["ignored"], [9999])
+            self.assertEqual(set(data["project"]["memberIds"]), {self.staff1_id, *extra_ids})
+
+            # removing them again in one call
+            res = self.client.patch(f"/projects/{pid}/members", json={"remove": extra_ids})
+            self.assertEqual(res.status_code, 200)
+            self.assertEqual(res.get_json()["project"]["memberIds"], [self.staff1_id])
+        finally:
+            self._cleanup_bulk_staff(extra_ids)
+
+    def test_bulk_roster_blocked_removal_is_atomic(self):
+        pid, _ = self._bulk_roster_project()
+        with self.app.app_context():
+            # staff2 collaborates on a project task, staff3 is not involved
+            s2 = Staff.query.get(self.staff2_id)
+            t = Task(title="T", description="D",
+                     deadline=datetime.utcnow() + timedelta(days=7),
+                     status="ongoing", owner=self.staff1_id,
+                     project_id=pid, priority=5, collaborators=[s2])
+            db.session.add(t); db.session.commit()
+
+        with self.client.session_transaction() as sess:
+            sess["employee_id"] = self.staff1_id
+
+        res = self.client.patch(f"/projects/{pid}/members",
+                                json={"add": [self.staff3_id], "remove": [self.staff2_id]})
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(res.get_json()["blocked"], [self.staff2_id])
+
+        # nothing was applied
+        with self.app.app_context():
+            member_ids = {m.employee_id for m in Project.query.get(pid).members}
+            self.assertEqual(member_ids, {self.staff1_id, self.staff2_id})
+
+    def test_bulk_roster_validation_and_auth(self):
+        pid, _ = self._bulk_roster_project()
+
+        with self.client.session_transaction() as sess:
+            sess["employee_id"] = self.staff2_id  # not the owner
+        self.assertEqual(self.client.patch(f"/projects/{pid}/members", json={"add": []}).status_code, 403)
+
+        with self.client.session_transaction() as sess:
+            sess["employee_id"] = self.staff1_id
+        self.assertEqual(self.client.patch(f"/projects/{pid}/members", json={"add": ["x"]}).status_code, 400)
+        self.assertEqual(self.client.patch("/projects/9999/members", json={}).status_code, 404)
+
+    def test_involved_member_ids_single_query(self):
+        """Removal validation asks the database once, however many ids are checked"""
+        from projects.app import involved_member_ids
+        from sqlalchemy import event
+
+        pid, _ = self._bulk_roster_project()
+        with self.app.app_context():
+            s3 = Staff.query.get(self.staff3_id)
+            db.session.add(Task(title="T", description="D",
+                                deadline=datetime.utcnow() + timedelta(days=7),
+                                status="ongoing", owner=self.staff2_id,
+                                project_id=pid, priority=5, collaborators=[s3]))
+            db.session.commit()
+
+            statements = []
+            def count(conn, cursor, statement, *args):
+                statements.append(statement)
+            event.listen(db.engine, "before_cursor_execute", count)
+            try:
+                involved = involved_member_ids(pid, {self.staff1_id, self.staff2_id, self.staff3_id, 9999})
+            finally:
+                event.remove(db.engine, "before_cursor_execute", count)
+
+        self.assertEqual(involved, {self.staff2_id, self.staff3_id})
+        self.assertEqual(len(statements), 1)
+
 if __name__ == "__main__":
     unittest.main()
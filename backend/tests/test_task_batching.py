@@ -0,0 +1,1195 @@
+# backend/tests/test_task_batching.py
+import gzip
+import json
+import os
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import DEFAULT, patch
+
+from sqlalchemy import bindparam, event
+
+# Set testing environment
+os.environ['TESTING'] = 'true'
+
+from common.json_stream import iter_json
+from tasks.task import app, db
+from models.staff import Staff
+from models.task import Task
+from models.project import Project
+from models.outbox import OutboxEvent
+from common.circuit_breaker import CircuitOpenError, reset_breakers
+
+UTC = timezone.utc
+
+
+def generate_deadline(days_ahead=5):
+    return (datetime.now(UTC) + timedelta(days=days_ahead)).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+
+class TaskBatchTestBase(unittest.TestCase):
+    """Shared fixtures: one department of staff plus a project with all of them on the roster"""
+
+    STAFF_COUNT = 12
+
+    def setUp(self):
+        app.config["TESTING"] = True
+        self.app = app
+        self.client = app.test_client()
+        self.ctx = app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.owner = Staff(employee_name="Batch Owner", email="batch.owner@example.com", role="manager",
+                           department="Finance", team="A", password="x")
+        self.staff = [
+            Staff(employee_name=f"Batch Staff {i}", email=f"batch{i}@example.com", role="staff",
+                  department="Finance", team="A", password="x")
+            for i in range(self.STAFF_COUNT)
+        ]
+        self.outsider = Staff(employee_name="Other Dept", email="batch.other@example.com", role="staff",
+                              department="IT", team="B", password="x")
+        db.session.add_all([self.owner, self.outsider] + self.staff)
+        db.session.commit()
+
+        self.project = Project(name="Batch Project", owner_id=self.owner.employee_id)
+        for member in [self.owner] + self.staff:
+            self.project.members.append(member)
+        db.session.add(self.project)
+        db.session.commit()
+
+        self.owner_id = self.owner.employee_id
+        self.staff_ids = [s.employee_id for s in self.staff]
+        self.outsider_id = self.outsider.employee_id
+        self.project_id = self.project.id
+
+        # notification calls go to the mock instead of the network, through closed breakers
+        reset_breakers()
+        self.requests_patch = patch('tasks.task.requests')
+        self.mock_requests = self.requests_patch.start()
+
+        self.login_as(self.owner_id, "manager")
+
+    def tearDown(self):
+        self.requests_patch.stop()
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def login_as(self, employee_id, role, department="Finance", team="A"):
+        with self.client.session_transaction() as sess:
+            sess["employee_id"] = employee_id
+            sess["role"] = role
+            sess["department"] = department
+            sess["team"] = team
+
+    def count_queries(self, fn):
+        statements = []
+
+        def count(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", count)
+        try:
+            result = fn()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", count)
+        return result, statements
+
+    def task_payload(self, title, collaborators, **extra):
+        payload = {
+            "title": title,
+            "description": f"{title} description",
+            "priority": 5,
+            "deadline": generate_deadline(10),
+            "collaborators": list(collaborators),
+        }
+        payload.update(extra)
+        return payload
+
+
+class TestBatchedValidation(TaskBatchTestBase):
+    """create_task / update_task validate from prefetched sets, not per-item lookups"""
+
+    def test_create_task_query_count_independent_of_collaborators(self):
+        db.session.expunge_all()
+        few, few_sql = self.count_queries(lambda: self.client.post(
+            "/tasks", json=self.task_payload("Few", self.staff_ids[:2], project_id=self.project_id)))
+        db.session.expunge_all()
+        many, many_sql = self.count_queries(lambda: self.client.post(
+            "/tasks", json=self.task_payload("Many", self.staff_ids, project_id=self.project_id)))
+        self.assertEqual(few.status_code, 201)
+        self.assertEqual(many.status_code, 201)
+        selects = lambda sql: [s for s in sql if s.lstrip().upper().startswith("SELECT")]
+        self.assertEqual(len(selects(few_sql)), len(selects(many_sql)))
+        task = db.session.get(Task, many.get_json()["task_id"])
+        self.assertEqual({s.employee_id for s in task.collaborators}, set(self.staff_ids) | {self.owner_id})
+
+    def test_create_task_with_subtasks_uses_one_staff_query(self):
+        payload = self.task_payload("With Subtasks", self.staff_ids, project_id=self.project_id, subtasks=[
+            {"title": f"Sub {i}", "description": "d", "priority": 3, "deadline": generate_deadline(5),
+             "owner": sid, "collaborators": [sid]}
+            for i, sid in enumerate(self.staff_ids[:5])
+        ])
+        response, sql = self.count_queries(lambda: self.client.post("/tasks", json=payload))
+        self.assertEqual(response.status_code, 201, response.get_data(as_text=True))
+        staff_selects = [s for s in sql if s.lstrip().upper().startswith("SELECT") and "FROM staff" in s]
+        self.assertEqual(len(staff_selects), 1)
+        subtasks = Task.query.filter_by(parent_id=response.get_json()["task_id"]).all()
+        self.assertEqual(len(subtasks), 5)
+        self.assertTrue(all(st.status == 'ongoing' for st in subtasks))
+
+    def test_create_task_validation_messages_unchanged(self):
+        missing = self.client.post("/tasks", json=self.task_payload("Missing", [999999]))
+        self.assertEqual(missing.status_code, 404)
+        self.assertIn("999999", missing.get_json()["message"])
+
+        other_dept = self.client.post("/tasks", json=self.task_payload("Other", [self.outsider_id]))
+        self.assertEqual(other_dept.status_code, 400)
+        self.assertIn("same department", other_dept.get_json()["message"])
+
+        not_member = self.client.post("/tasks", json=self.task_payload(
+            "Not Member", [self.outsider_id], project_id=self.project_id))
+        self.assertEqual(not_member.status_code, 400)
+        self.assertIn("Other Dept", not_member.get_json()["message"])
+
+        self.client.post("/tasks", json=self.task_payload("Dup", []))
+        dup = self.client.post("/tasks", json=self.task_payload("Dup", []))
+        self.assertEqual(dup.status_code, 400)
+
+    def test_update_task_subtasks_use_one_staff_query(self):
+        created = self.client.post("/tasks", json=self.task_payload(
+            "Parent", self.staff_ids, project_id=self.project_id, subtasks=[
+                {"title": f"Child {i}", "description": "d", "priority": 3, "deadline": generate_deadline(5),
+                 "owner": self.owner_id}
+                for i in range(4)
+            ]))
+        task_id = created.get_json()["task_id"]
+        subtask_ids = [t.task_id for t in Task.query.filter_by(parent_id=task_id).all()]
+
+        payload = {
+            "project_id": self.project_id,
+            "collaborators": self.staff_ids,
+            "subtasks": [
+                {"task_id": sid, "owner": self.staff_ids[i], "collaborators": [self.staff_ids[i]], "priority": 7}
+                for i, sid in enumerate(subtask_ids)
+            ]
+        }
+        response, sql = self.count_queries(lambda: self.client.put(f"/task/{task_id}", json=payload))
+        self.assertEqual(response.status_code, 200, response.get_data(as_text=True))
+        staff_selects = [s for s in sql if s.lstrip().upper().startswith("SELECT") and "FROM staff" in s
+                         and "task_collaborators" not in s]
+        self.assertEqual(len(staff_selects), 1)
+        db.session.expire_all()
+        for i, sid in enumerate(subtask_ids):
+            subtask = db.session.get(Task, sid)
+            self.assertEqual(subtask.owner, self.staff_ids[i])
+            self.assertEqual(subtask.priority, 7)
+
+
+
+    def subtask_edit_run(self, n, prefix):
+        created = self.client.post("/tasks", json=self.task_payload(
+            prefix, self.staff_ids, project_id=self.project_id, deadline=generate_deadline(20), subtasks=[
+                {"title": f"{prefix} child {i}", "description": "d", "priority": 3, "deadline": generate_deadline(5),
+                 "owner": self.owner_id}
+                for i in range(n)
+            ]))
+        task_id = created.get_json()["task_id"]
+        subtask_ids = [t.task_id for t in Task.query.filter_by(parent_id=task_id).all()]
+        payload = {
+            "project_id": self.project_id,
+            "deadline": generate_deadline(15),
+            "subtasks": [
+                {"task_id": sid, "deadline": generate_deadline(8), "priority": 9,
+                 "collaborators": [self.staff_ids[i % self.STAFF_COUNT]]}
+                for i, sid in enumerate(subtask_ids)
+            ]
+        }
+        db.session.expunge_all()
+        self.mock_requests.reset_mock()
+        response, sql = self.count_queries(lambda: self.client.put(f"/task/{task_id}", json=payload))
+        self.assertEqual(response.status_code, 200, response.get_data(as_text=True))
+        return task_id, subtask_ids, sql
+
+    def test_update_task_subtask_edits_in_constant_round_trips(self):
+        _, _, small = self.subtask_edit_run(2, "Few edits")
+        _, _, large = self.subtask_edit_run(12, "Many edits")
+        self.assertEqual(len(small), len(large))
+
+    def test_update_task_subtask_edits_batch_side_effects(self):
+        task_id, subtask_ids, _ = self.subtask_edit_run(6, "Side effects")
+        posts = self.mock_requests.post.call_args_list
+        self.mock_requests.delete.assert_not_called()
+        urls = [c.args[0] for c in posts]
+        self.assertEqual(sum(u.endswith("/api/events/task-updated/batch") for u in urls), 1)
+        self.assertEqual(sum(u.endswith("/api/internal/clear-deadline-logs") for u in urls), 1)
+        self.assertEqual(sum(u.endswith("/api/test/deadline-reminders") for u in urls), 1)
+
+        events = next(c.kwargs["json"]["events"] for c in posts if c.args[0].endswith("/task-updated/batch"))
+        self.assertEqual([e["task_id"] for e in events], [task_id] + subtask_ids)
+        self.assertEqual(set(events[1]["changed_fields"]), {"deadline", "priority", "collaborators"})
+        cleared = next(c.kwargs["json"]["task_ids"] for c in posts if c.args[0].endswith("/clear-deadline-logs"))
+        self.assertEqual(cleared, [task_id] + subtask_ids)
+
+        db.session.expire_all()
+        for i, sid in enumerate(subtask_ids):
+            subtask = db.session.get(Task, sid)
+            self.assertEqual(subtask.priority, 9)
+            self.assertEqual({s.employee_id for s in subtask.collaborators}, {self.staff_ids[i], self.owner_id})
+
+
+class TestBulkImport(TaskBatchTestBase):
+    """POST /tasks/bulk"""
+
+    def test_json_import_with_subtasks(self):
+        items = [
+            self.task_payload(f"Import {i}", self.staff_ids[:3], project_id=self.project_id, subtasks=[
+                {"title": f"Import {i} child", "description": "d", "priority": 2,
+                 "deadline": generate_deadline(5), "owner": self.staff_ids[0]}
+            ])
+            for i in range(3)
+        ]
+        response = self.client.post("/tasks/bulk", json=items)
+        self.assertEqual(response.status_code, 201, response.get_data(as_text=True))
+        created = response.get_json()["created"]
+        self.assertEqual([c["row"] for c in created], [0, 1, 2])
+
+        for entry in created:
+            task = db.session.get(Task, entry["task_id"])
+            self.assertEqual(task.status, 'unassigned')  # manager creates unassigned
+            self.assertEqual({s.employee_id for s in task.collaborators}, set(self.staff_ids[:3]) | {self.owner_id})
+            self.assertEqual(len(entry["subtask_ids"]), 1)
+            child = db.session.get(Task, entry["subtask_ids"][0])
+            self.assertEqual(child.parent_id, task.task_id)
+            self.assertEqual(child.owner, self.staff_ids[0])
+            self.assertEqual(child.status, 'ongoing')  # staff-owned subtask
+
+    def test_ids_come_from_the_inserted_rows(self):
+        # a closed task with the same title must not be mistaken for the imported one
+        self.client.post("/tasks", json=self.task_payload("Quarterly close", self.staff_ids[:1]))
+        old = Task.query.filter_by(title="Quarterly close").one()
+        old.status = "done"
+        db.session.commit()
+
+        items = [
+            self.task_payload(title, self.staff_ids[:2], subtasks=[
+                {"title": f"step {i}", "description": "d", "priority": 2, "deadline": generate_deadline(5)}
+                for i in range(n)
+            ])
+            for title, n in [("Quarterly close", 2), ("Audit prep", 3)]
+        ]
+        response = self.client.post("/tasks/bulk", json=items)
+        self.assertEqual(response.status_code, 201, response.get_data(as_text=True))
+        for entry, (title, n) in zip(response.get_json()["created"], [("Quarterly close", 2), ("Audit prep", 3)]):
+            self.assertNotEqual(entry["task_id"], old.task_id)
+            self.assertEqual(db.session.get(Task, entry["task_id"]).title, title)
+            subtasks = [db.session.get(Task, sid) for sid in entry["subtask_ids"]]
+            self.assertEqual([(t.title, t.parent_id) for t in subtasks],
+                             [(f"step {i}", entry["task_id"]) for i in range(n)])
+
+    def test_single_notification_and_reminder_call(self):
+        items = [self.task_payload(f"Notify {i}", self.staff_ids[:2]) for i in range(5)]
+        self.client.post("/tasks/bulk", json=items)
+        urls = [c.args[0] for c in self.mock_requests.post.call_args_list]
+        self.assertEqual(sum(u.endswith('/api/events/tasks-created') for u in urls), 1)
+        self.assertEqual(sum(u.endswith('/api/test/deadline-reminders') for u in urls), 1)
+        event_tasks = next(c.kwargs['json']['tasks'] for c in self.mock_requests.post.call_args_list
+                           if c.args[0].endswith('/api/events/tasks-created'))
+        self.assertEqual(len(event_tasks), 5)
+
+    def test_query_count_independent_of_batch_size(self):
+        def run(n, prefix):
+            items = [self.task_payload(f"{prefix} {i}", self.staff_ids[:4], project_id=self.project_id) for i in range(n)]
+            db.session.expunge_all()
+            response, sql = self.count_queries(lambda: self.client.post("/tasks/bulk", json=items))
+            self.assertEqual(response.status_code, 201, response.get_data(as_text=True))
+            return [q for q in sql if q.lstrip().upper().startswith("SELECT")]
+
+        self.assertEqual(len(run(2, "Small")), len(run(20, "Large")))
+
+    def test_per_row_errors_and_nothing_written(self):
+        before = Task.query.count()
+        items = [
+            self.task_payload("Good row", self.staff_ids[:1]),
+            self.task_payload("", []),
+            self.task_payload("Bad priority", [], priority=11),
+            self.task_payload("Bad sub", [], subtasks=[
+                {"title": "late", "description": "d", "priority": 1, "deadline": generate_deadline(30)}
+            ]),
+            self.task_payload("Good row", []),
+        ]
+        response = self.client.post("/tasks/bulk", json=items)
+        self.assertEqual(response.status_code, 400)
+        errors = response.get_json()["errors"]
+        by_row = {}
+        for err in errors:
+            by_row.setdefault(err["row"], []).append(err)
+        self.assertEqual(sorted(by_row), [0, 1, 2, 3, 4])  # duplicate title flags both rows
+        self.assertIn("cannot be empty", by_row[1][0]["message"])
+        self.assertEqual(by_row[3][0]["subtask"], 0)
+        self.assertIn("after parent", by_row[3][0]["message"])
+        self.assertEqual(Task.query.count(), before)
+        self.mock_requests.post.assert_not_called()
+
+    def test_csv_import(self):
+        csv_body = (
+            "title,description,deadline,priority,project_id,owner,collaborators,recurrence,parent\n"
+            f"CSV parent,desc,{generate_deadline(10)},4,{self.project_id},,{self.staff_ids[0]};{self.staff_ids[1]},7,\n"
+            f"CSV child,desc,{generate_deadline(3)},2,,{self.staff_ids[1]},,,CSV parent\n"
+        )
+        response = self.client.post("/tasks/bulk", data=csv_body, content_type="text/csv")
+        self.assertEqual(response.status_code, 201, response.get_data(as_text=True))
+        created = response.get_json()["created"]
+        self.assertEqual(len(created), 1)
+        self.assertEqual(created[0]["row"], 2)
+        parent = db.session.get(Task, created[0]["task_id"])
+        self.assertEqual(parent.recurrence, 7)
+        child = db.session.get(Task, created[0]["subtask_ids"][0])
+        self.assertEqual(child.title, "CSV child")
+        self.assertEqual(child.owner, self.staff_ids[1])
+
+    def test_csv_errors_use_line_numbers(self):
+        csv_body = (
+            "title,description,deadline,priority,parent\n"
+            f"Row two,desc,{generate_deadline(10)},abc,\n"
+            f"Orphan,desc,{generate_deadline(3)},2,Missing parent\n"
+        )
+        response = self.client.post("/tasks/bulk", data=csv_body, content_type="text/csv")
+        self.assertEqual(response.status_code, 400)
+        rows = sorted(e["row"] for e in response.get_json()["errors"])
+        self.assertEqual(rows, [2, 3])
+
+    def test_rejects_non_array(self):
+        self.assertEqual(self.client.post("/tasks/bulk", json={"title": "x"}).status_code, 400)
+        self.assertEqual(self.client.post("/tasks/bulk", json=[]).status_code, 400)
+
+
+class TestBatchStatusUpdate(TaskBatchTestBase):
+    """PATCH /tasks/status"""
+
+    def create(self, title, subtasks=(), **extra):
+        payload = self.task_payload(title, self.staff_ids[:2], subtasks=[
+            {"title": f"{title} {name}", "description": "d", "priority": 3,
+             "deadline": generate_deadline(5), "owner": self.owner_id}
+            for name in subtasks
+        ], **extra)
+        response = self.client.post("/tasks", json=payload)
+        self.assertEqual(response.status_code, 201, response.get_data(as_text=True))
+        task_id = response.get_json()["task_id"]
+        sub_ids = [t.task_id for t in Task.query.filter_by(parent_id=task_id).order_by(Task.task_id).all()]
+        self.mock_requests.reset_mock()
+        return task_id, sub_ids
+
+    def patch(self, updates):
+        return self.client.patch("/tasks/status", json=updates)
+
+    def test_batch_updates_statuses_and_timestamps(self):
+        ids = [self.create(f"Status {i}")[0] for i in range(3)]
+        response = self.patch([{"task_id": tid, "status": "ongoing"} for tid in ids])
+        self.assertEqual(response.status_code, 200, response.get_data(as_text=True))
+        self.assertEqual(sorted(response.get_json()["updated"]), sorted(ids))
+        db.session.expire_all()
+        for tid in ids:
+            task = db.session.get(Task, tid)
+            self.assertEqual(task.status, "ongoing")
+            self.assertIsNotNone(task.start_date)
+
+    def test_parent_and_subtasks_done_in_same_batch(self):
+        parent, subs = self.create("Parent", subtasks=["a", "b"])
+        response = self.patch([{"task_id": parent, "status": "done"}] +
+                              [{"task_id": sid, "status": "done"} for sid in subs])
+        self.assertEqual(response.status_code, 200, response.get_data(as_text=True))
+        db.session.expire_all()
+        self.assertTrue(all(db.session.get(Task, tid).status == "done" for tid in [parent] + subs))
+
+    def test_open_subtask_blocks_whole_batch(self):
+        other, _ = self.create("Other")
+        parent, subs = self.create("Blocked", subtasks=["a", "b"])
+        response = self.patch([
+            {"task_id": other, "status": "ongoing"},
+            {"task_id": parent, "status": "done"},
+            {"task_id": subs[0], "status": "done"},
+        ])
+        self.assertEqual(response.status_code, 400)
+        errors = response.get_json()["errors"]
+        self.assertEqual([(e["index"], e["task_id"]) for e in errors], [(1, parent)])
+        db.session.expire_all()
+        self.assertEqual(db.session.get(Task, other).status, "unassigned")
+        self.assertEqual(db.session.get(Task, subs[0]).status, "unassigned")
+        self.mock_requests.post.assert_not_called()
+
+    def test_per_item_errors(self):
+        task_id, _ = self.create("Mine")
+        self.login_as(self.staff_ids[5], "staff")
+        response = self.patch([
+            {"task_id": task_id, "status": "ongoing"},
+            {"task_id": 999999, "status": "done"},
+            {"task_id": task_id, "status": "finished"},
+            {"status": "done"},
+        ])
+        self.assertEqual(response.status_code, 400)
+        messages = {e["index"]: e["message"] for e in response.get_json()["errors"]}
+        self.assertIn("Invalid status", messages[2])
+        self.assertIn("task_id", messages[3])
+        self.assertIn("not found", messages[1])
+        self.assertIn("collaborators", messages[0])
+
+    def test_one_batched_notification(self):
+        ids = [self.create(f"Notify {i}")[0] for i in range(4)]
+        self.patch([{"task_id": tid, "status": "ongoing"} for tid in ids])
+        calls = self.mock_requests.post.call_args_list
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(calls[0].args[0].endswith("/api/events/task-updated/batch"))
+        events = calls[0].kwargs["json"]["events"]
+        self.assertEqual(sorted(e["task_id"] for e in events), sorted(ids))
+        self.assertTrue(all(e["changed_fields"] == ["status"] and e["actor_id"] == self.owner_id for e in events))
+
+    def test_recurring_task_spawns_next_occurrence(self):
+        task_id, subs = self.create("Recurring", subtasks=["step"], recurrence=7)
+        response = self.patch([{"task_id": subs[0], "status": "done"}, {"task_id": task_id, "status": "done"}])
+        self.assertEqual(response.status_code, 200, response.get_data(as_text=True))
+        copies = Task.query.filter(Task.title == "Recurring", Task.task_id != task_id).all()
+        self.assertEqual(len(copies), 1)
+        self.assertEqual(copies[0].recurrence, 7)
+        self.assertEqual(Task.query.filter_by(parent_id=copies[0].task_id).count(), 1)
+
+    def test_query_count_independent_of_batch_size(self):
+        def run(n, prefix):
+            ids = [self.create(f"{prefix} {i}")[0] for i in range(n)]
+            db.session.expunge_all()
+            response, sql = self.count_queries(
+                lambda: self.patch([{"task_id": tid, "status": "ongoing"} for tid in ids]))
+            self.assertEqual(response.status_code, 200, response.get_data(as_text=True))
+            return [q for q in sql if q.lstrip().upper().startswith("SELECT")]
+
+        self.assertEqual(len(run(2, "Small")), len(run(10, "Large")))
+
+
+class TestRecurrenceEngine(TaskBatchTestBase):
+    """Recurring tasks: the status PATCH schedules, the engine materializes"""
+
+    def setUp(self):
+        super().setUp()
+        # behave like production: nothing is materialized on the request
+        self.inline_patch = patch('tasks.task.RECURRENCE_INLINE', False)
+        self.inline_patch.start()
+
+    def tearDown(self):
+        self.inline_patch.stop()
+        super().tearDown()
+
+    def create_recurring(self, title, recurrence=7, subtask_count=0):
+        payload = self.task_payload(title, self.staff_ids[:2], recurrence=recurrence, subtasks=[
+            {"title": f"{title} step {i}", "description": "d", "priority": 3,
+             "deadline": generate_deadline(5), "owner": self.staff_ids[0], "collaborators": [self.staff_ids[0]]}
+            for i in range(subtask_count)
+        ])
+        response = self.client.post("/tasks", json=payload)
+        self.assertEqual(response.status_code, 201, response.get_data(as_text=True))
+        task_id = response.get_json()["task_id"]
+        Task.query.filter_by(parent_id=task_id).update({"status": "done"})
+        db.session.commit()
+        return task_id
+
+    def mark_done(self, task_id):
+        response = self.client.patch(f"/task/status/{task_id}", json={"status": "done"})
+        self.assertEqual(response.status_code, 200, response.get_data(as_text=True))
+        return response
+
+    def occurrences(self, task_id):
+        return Task.query.filter_by(recurs_from_id=task_id).all()
+
+    def test_status_patch_only_schedules(self):
+        small = self.create_recurring("Small series", subtask_count=1)
+        large = self.create_recurring("Large series", subtask_count=8)
+        db.session.expunge_all()
+        _, small_sql = self.count_queries(lambda: self.mark_done(small))
+        db.session.expunge_all()
+        _, large_sql = self.count_queries(lambda: self.mark_done(large))
+        # subtasks are checked once, never copied on the request
+        self.assertEqual(len(small_sql), len(large_sql))
+        self.assertFalse(any(q.lstrip().upper().startswith("INSERT INTO TASK ") for q in large_sql))
+
+        task = db.session.get(Task, large)
+        completed_utc = task.completed_date.astimezone(UTC).replace(tzinfo=None)
+        self.assertEqual(task.next_recurrence_at, completed_utc + timedelta(days=7))
+        self.assertEqual(self.occurrences(large), [])
+
+    def test_engine_copies_task_subtasks_and_collaborators(self):
+        task_id = self.create_recurring("Weekly report", subtask_count=3)
+        self.mark_done(task_id)
+        from tasks.task import materialize_recurrences
+        self.assertEqual(materialize_recurrences(), 1)
+
+        db.session.expire_all()
+        source = db.session.get(Task, task_id)
+        self.assertIsNone(source.next_recurrence_at)
+        [occurrence] = self.occurrences(task_id)
+        self.assertEqual(occurrence.deadline, source.completed_date.astimezone(UTC).replace(tzinfo=None) + timedelta(days=7))
+        self.assertEqual(occurrence.recurrence, 7)
+        self.assertEqual(occurrence.status, "unassigned")  # manager-owned
+        self.assertEqual({s.employee_id for s in occurrence.collaborators},
+                         {s.employee_id for s in source.collaborators})
+
+        old_subtasks = Task.query.filter_by(parent_id=task_id).order_by(Task.task_id).all()
+        new_subtasks = Task.query.filter_by(parent_id=occurrence.task_id).order_by(Task.task_id).all()
+        self.assertEqual([st.title for st in new_subtasks], [st.title for st in old_subtasks])
+        for old, new in zip(old_subtasks, new_subtasks):
+            self.assertEqual(new.status, "ongoing")  # staff-owned
+            self.assertEqual(source.deadline - old.deadline, occurrence.deadline - new.deadline)
+            self.assertEqual({s.employee_id for s in new.collaborators}, {s.employee_id for s in old.collaborators})
+
+        # nothing left to do on the next tick
+        self.assertEqual(materialize_recurrences(), 0)
+
+    def test_engine_works_in_batches(self):
+        from tasks.task import materialize_recurrences
+        ids = [self.create_recurring(f"Series {i}", subtask_count=2) for i in range(5)]
+        for task_id in ids:
+            self.mark_done(task_id)
+        db.session.expunge_all()
+        handled, sql = self.count_queries(lambda: materialize_recurrences(batch_size=2))
+        self.assertEqual(handled, 5)
+        for task_id in ids:
+            [occurrence] = self.occurrences(task_id)
+            self.assertEqual(Task.query.filter_by(parent_id=occurrence.task_id).count(), 2)
+        # 3 batches plus the final empty poll, each a fixed number of statements
+        inserts = [q for q in sql if q.lstrip().upper().startswith("INSERT")]
+        self.assertEqual(len(inserts), 3 * 3)
+
+    def test_lookahead_defers_far_occurrences(self):
+        from tasks.task import materialize_recurrences, RECURRENCE_LOOKAHEAD_DAYS
+        task_id = self.create_recurring("Quarterly", recurrence=RECURRENCE_LOOKAHEAD_DAYS + 60)
+        self.mark_done(task_id)
+        self.assertEqual(materialize_recurrences(), 0)
+        self.assertEqual(self.occurrences(task_id), [])
+        self.assertEqual(materialize_recurrences(now=datetime.now() + timedelta(days=61)), 1)
+        self.assertEqual(len(self.occurrences(task_id)), 1)
+
+    def test_schedule_uses_utc_on_a_non_utc_server(self):
+        from tasks.task import materialize_recurrences, RECURRENCE_LOOKAHEAD_DAYS
+        previous = os.environ.get("TZ")
+        os.environ["TZ"] = "America/New_York"
+        time.tzset()
+        try:
+            task_id = self.create_recurring("Due at the horizon", recurrence=RECURRENCE_LOOKAHEAD_DAYS)
+            self.mark_done(task_id)
+            expected = datetime.now(UTC).replace(tzinfo=None) + timedelta(days=RECURRENCE_LOOKAHEAD_DAYS)
+            due = db.session.get(Task, task_id).next_recurrence_at
+            self.assertLess(abs(due - expected), timedelta(minutes=1))
+            # a local-time horizon would be hours short of it
+            self.assertEqual(materialize_recurrences(), 1)
+        finally:
+            if previous is None:
+                os.environ.pop("TZ", None)
+            else:
+                os.environ["TZ"] = previous
+            time.tzset()
+
+    def test_reopened_task_is_not_materialized_twice(self):
+        from tasks.task import materialize_recurrences
+        task_id = self.create_recurring("Reopened")
+        self.mark_done(task_id)
+        self.client.patch(f"/task/status/{task_id}", json={"status": "ongoing"})
+        self.assertIsNone(db.session.get(Task, task_id).next_recurrence_at)
+        self.assertEqual(materialize_recurrences(), 0)
+
+        self.mark_done(task_id)
+        materialize_recurrences()
+        self.client.patch(f"/task/status/{task_id}", json={"status": "ongoing"})
+        self.mark_done(task_id)
+        materialize_recurrences()
+        self.assertEqual(len(self.occurrences(task_id)), 1)
+
+    def test_batch_status_patch_schedules(self):
+        ids = [self.create_recurring(f"Batch series {i}") for i in range(3)]
+        response = self.client.patch("/tasks/status", json=[{"task_id": tid, "status": "done"} for tid in ids])
+        self.assertEqual(response.status_code, 200, response.get_data(as_text=True))
+        self.assertEqual(Task.query.filter(Task.recurs_from_id.in_(ids)).count(), 0)
+        self.assertEqual(Task.query.filter(Task.task_id.in_(ids), Task.next_recurrence_at.isnot(None)).count(), 3)
+
+
+class TestNotificationOutbox(TaskBatchTestBase):
+    """Notification calls are staged with the write and delivered by the relay"""
+
+    def setUp(self):
+        super().setUp()
+        # behave like production: nothing is delivered on the request
+        self.inline_patch = patch('tasks.task.OUTBOX_INLINE', False)
+        self.inline_patch.start()
+
+    def tearDown(self):
+        self.inline_patch.stop()
+        super().tearDown()
+
+    def create(self, title):
+        response = self.client.post("/tasks", json=self.task_payload(title, self.staff_ids[:2]))
+        self.assertEqual(response.status_code, 201, response.get_data(as_text=True))
+        return response.get_json()["task_id"]
+
+    def relay(self):
+        from tasks.task import relay_outbox
+        return relay_outbox()
+
+    def test_write_stages_events_without_calling_out(self):
+        task_id = self.create("Outbox task")
+        response = self.client.patch(f"/task/status/{task_id}", json={"status": "ongoing"})
+        self.assertEqual(response.status_code, 200)
+        self.mock_requests.post.assert_not_called()
+        paths = [(e.task_id, e.path) for e in OutboxEvent.query.order_by(OutboxEvent.id)]
+        self.assertEqual(paths, [(task_id, "/api/test/deadline-reminders"), (task_id, "/api/events/task-updated")])
+
+        self.assertEqual(self.relay(), 2)
+        self.assertEqual(OutboxEvent.query.count(), 0)
+        urls = [c.args[0] for c in self.mock_requests.post.call_args_list]
+        self.assertTrue(urls[0].endswith("/api/test/deadline-reminders"))
+        self.assertTrue(urls[1].endswith("/api/events/task-updated"))
+
+    def test_rejected_write_stages_nothing(self):
+        task_id = self.create("Blocked parent")
+        OutboxEvent.query.delete()
+        db.session.commit()
+        self.login_as(self.outsider_id, "staff", department="IT", team="B")
+        response = self.client.patch(f"/task/status/{task_id}", json={"status": "ongoing"})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(OutboxEvent.query.count(), 0)
+
+    def test_consecutive_task_updates_coalesced(self):
+        ids = [self.create(f"Coalesce {i}") for i in range(3)]
+        self.relay()
+        self.mock_requests.reset_mock()
+        self.client.patch("/tasks/status", json=[{"task_id": tid, "status": "ongoing"} for tid in ids])
+        self.relay()
+        [call] = self.mock_requests.post.call_args_list
+        self.assertTrue(call.args[0].endswith("/api/events/task-updated/batch"))
+        self.assertEqual([e["task_id"] for e in call.kwargs["json"]["events"]], ids)
+
+    def test_task_updated_events_carry_snapshot(self):
+        task_id = self.create("Snapshot task")
+        response = self.client.patch(f"/task/status/{task_id}", json={"status": "ongoing"})
+        self.assertEqual(response.status_code, 200)
+        [event] = OutboxEvent.query.filter_by(path="/api/events/task-updated").all()
+        payload = json.loads(event.payload)
+        self.assertEqual(payload["actor_name"], db.session.get(Staff, self.owner_id).employee_name)
+        self.assertEqual(payload["task"]["task_id"], task_id)
+        self.assertEqual(payload["task"]["title"], "Snapshot task")
+        self.assertEqual(payload["task"]["status"], "ongoing")
+        self.assertEqual(payload["task"]["owner"], self.owner_id)
+        self.assertEqual(sorted(payload["task"]["collaborators"]),
+                         sorted(set(self.staff_ids[:2]) | {self.owner_id}))
+
+    def test_failed_delivery_is_retried_later(self):
+        task_id = self.create("Flaky")
+        self.mock_requests.post.side_effect = ConnectionError("notification service down")
+        self.relay()
+        [event] = OutboxEvent.query.all()
+        self.assertEqual(event.attempts, 1)
+        self.assertIn("down", event.last_error)
+        self.assertGreater(event.next_attempt_at, datetime.now())
+        # not due yet, so the next tick leaves it alone
+        self.mock_requests.post.side_effect = None
+        self.mock_requests.post.reset_mock()
+        self.relay()
+        self.mock_requests.post.assert_not_called()
+
+    def test_backing_off_event_holds_back_its_task(self):
+        first = self.create("Backing off")
+        second = self.create("Unrelated")
+        self.relay()
+        self.client.patch(f"/task/status/{first}", json={"status": "ongoing"})
+        self.client.patch(f"/task/status/{first}", json={"status": "under review"})
+        self.client.patch(f"/task/status/{second}", json={"status": "ongoing"})
+        head = OutboxEvent.query.order_by(OutboxEvent.id).first()
+        head.attempts = 1
+        head.next_attempt_at = datetime.now() + timedelta(minutes=5)
+        db.session.commit()
+        self.mock_requests.post.reset_mock()
+
+        self.relay()
+        [call] = self.mock_requests.post.call_args_list
+        self.assertEqual(call.kwargs["json"]["task_id"], second)
+        self.assertEqual(OutboxEvent.query.filter_by(task_id=first).count(), 2)
+
+        head.next_attempt_at = datetime.now() - timedelta(seconds=1)
+        db.session.commit()
+        self.mock_requests.post.reset_mock()
+        self.relay()
+        self.assertEqual(OutboxEvent.query.count(), 0)
+        [call] = self.mock_requests.post.call_args_list
+        self.assertTrue(call.args[0].endswith("/api/events/task-updated/batch"))
+        self.assertEqual([e["task_id"] for e in call.kwargs["json"]["events"]], [first, first])
+
+    def test_client_error_is_not_retried(self):
+        task_id = self.create("Rejected")
+        self.relay()
+        self.client.patch(f"/task/status/{task_id}", json={"status": "ongoing"})
+        self.mock_requests.post.return_value.ok = False
+        self.mock_requests.post.return_value.status_code = 404
+        self.relay()
+        [event] = OutboxEvent.query.all()
+        self.assertIsNone(event.next_attempt_at)
+        self.assertEqual(event.last_error, "HTTP 404")
+        # given-up events don't hold back later ones
+        self.mock_requests.post.return_value.ok = True
+        self.client.patch(f"/task/status/{task_id}", json={"status": "done"})
+        self.relay()
+        self.assertEqual(OutboxEvent.query.count(), 1)
+
+
+    def test_claim_is_committed_before_posting(self):
+        task_id = self.create("Claimed")
+        seen = []
+
+        def post(url, **kwargs):
+            # no transaction (so no row locks) is open while the relay is calling out
+            seen.append(db.session().in_transaction())
+            return DEFAULT
+
+        self.mock_requests.post.side_effect = post
+        self.assertEqual(self.relay(), 1)
+        self.assertEqual(seen, [False])
+        self.assertEqual(OutboxEvent.query.filter_by(task_id=task_id).count(), 0)
+
+    def test_claimed_events_held_back_by_open_breaker_stay_due(self):
+        from tasks.task import relay_outbox_batch, notification_service_breaker
+        first, second = self.create("Breaker 1"), self.create("Breaker 2")
+        due = {e.id: e.next_attempt_at for e in OutboxEvent.query}
+        with patch.object(notification_service_breaker, 'call',
+                          side_effect=CircuitOpenError("notification-service", 30)):
+            self.assertEqual(relay_outbox_batch(), (2, 0))
+        db.session.expire_all()
+        self.assertEqual({e.id: e.next_attempt_at for e in OutboxEvent.query}, due)
+        self.assertEqual({e.attempts for e in OutboxEvent.query}, {0})
+
+    def test_comment_events_resolve_the_author_once(self):
+        task_id = self.create("Commented")
+        OutboxEvent.query.delete()
+        db.session.commit()
+        self.mock_requests.post.reset_mock()
+        response = self.client.post(f"/task/{task_id}/comments", json={"content": "Looks good"})
+        self.assertEqual(response.status_code, 201, response.get_data(as_text=True))
+        # the name comes from the shared staff table, not the employee service
+        self.mock_requests.post.assert_not_called()
+        payloads = [json.loads(e.payload) for e in OutboxEvent.query.filter_by(path="/api/events/comment-added")]
+        self.assertGreater(len(payloads), 1)
+        author = db.session.get(Staff, self.owner_id).employee_name
+        for payload in payloads:
+            self.assertEqual(payload["actor_id"], self.owner_id)
+            self.assertEqual(payload["actor_name"], author)
+            self.assertEqual(payload["message"], f"New comment added by {author}: Looks good")
+
+
+class TestInternalTaskExport(TaskBatchTestBase):
+    """Internal exports filter in SQL, page by task_id and stream NDJSON"""
+
+    def setUp(self):
+        super().setUp()
+        self.ids = []
+        for days in (2, 4, 6, 30):
+            response = self.client.post("/tasks", json=self.task_payload(
+                f"Export {days}", self.staff_ids[:3], deadline=generate_deadline(days)))
+            self.ids.append(response.get_json()["task_id"])
+        done = db.session.get(Task, self.ids[1])
+        done.status = "done"
+        db.session.commit()
+        db.session.expunge_all()
+
+    def test_filters_and_keyset_pages(self):
+        url = f"/api/internal/tasks/all?exclude_status=done&deadline_to={generate_deadline(10)}&limit=1"
+        seen, after_id, queries = [], 0, []
+        while after_id is not None:
+            response, sql = self.count_queries(lambda: self.client.get(f"{url}&after_id={after_id}"))
+            self.assertEqual(response.status_code, 200)
+            body = response.get_json()
+            seen += body["tasks"]
+            after_id = body["next_after_id"]
+            queries.append(len(sql))
+        self.assertEqual([t["task_id"] for t in seen], [self.ids[0], self.ids[2]])
+        self.assertEqual(sorted(seen[0]["collaborators"]), sorted(self.staff_ids[:3] + [self.owner_id]))
+        # one joined query per page, however many collaborators
+        self.assertEqual(set(queries), {1})
+
+    def test_ndjson_stream(self):
+        response = self.client.get("/api/internal/tasks/all?status=done,unassigned,ongoing&limit=3",
+                                   headers={"Accept": "application/x-ndjson"})
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual([r["task_id"] for r in records[:-1]], self.ids[:3])
+        self.assertTrue(all(r["type"] == "task" for r in records[:-1]))
+        self.assertEqual(records[-1], {"type": "end", "next_after_id": self.ids[2]})
+
+    def test_upcoming_deadlines_use_joined_collaborators(self):
+        url = f"/api/internal/tasks/upcoming-deadlines?start_date={generate_deadline(1)}&end_date={generate_deadline(10)}"
+        response, sql = self.count_queries(lambda: self.client.get(url))
+        self.assertEqual(response.status_code, 200)
+        tasks = response.get_json()["tasks"]
+        self.assertEqual([t["task_id"] for t in tasks], [self.ids[0], self.ids[2]])
+        self.assertEqual(len(tasks[0]["collaborators"]), 4)
+        self.assertEqual(len(sql), 1)
+
+    def test_bad_parameters_rejected(self):
+        self.assertEqual(self.client.get("/api/internal/tasks/all?after_id=x").status_code, 400)
+        self.assertEqual(self.client.get("/api/internal/tasks/all?limit=0").status_code, 400)
+        self.assertEqual(self.client.get("/api/internal/tasks/all?deadline_to=soon").status_code, 400)
+
+
+
+class TestCompanyTaskTree(TaskBatchTestBase):
+    """Directors get a count summary and load one team of the company tree at a time"""
+
+    def setUp(self):
+        super().setUp()
+        shared = self.client.post("/tasks", json=self.task_payload("Shared", self.staff_ids[:2], subtasks=[
+            {"title": "Child", "description": "d", "priority": 3, "deadline": generate_deadline(5),
+             "owner": self.owner_id}
+        ]))
+        self.shared_id = shared.get_json()["task_id"]
+        self.login_as(self.outsider_id, "staff", department="IT", team="B")
+        self.outsider_task = self.client.post("/tasks", json=self.task_payload("IT task", [])).get_json()["task_id"]
+        self.login_as(self.owner_id, "director")
+
+    def test_summary_has_counts_only(self):
+        response = self.client.get("/tasks?view=summary")
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertNotIn("company_tasks", body)
+        finance = body["company_summary"]["Finance"]
+        # the shared task is counted once for the team, once per collaborator, and its subtask not at all
+        self.assertEqual(finance["task_count"], 1)
+        team = finance["teams"]["A"]
+        self.assertEqual(team["task_count"], 1)
+        self.assertEqual(team["employees"]["Batch Staff 0"], 1)
+        self.assertEqual(team["employees"]["Batch Staff 5"], 0)
+        self.assertEqual(body["company_summary"]["IT"]["teams"]["B"]["employees"], {"Other Dept": 1})
+
+    def test_summary_query_count_is_constant(self):
+        db.session.expunge_all()
+        _, small = self.count_queries(lambda: self.client.get("/tasks?view=summary"))
+        # tasks the director isn't on, so my_tasks stays the same
+        for i in range(3):
+            db.session.add(Task(title=f"More {i}", description="d", deadline=datetime.now() + timedelta(days=5),
+                                status="ongoing", priority=5, owner=self.staff_ids[i],
+                                collaborators=self.staff[i:i + 3]))
+        db.session.commit()
+        db.session.expunge_all()
+        _, large = self.count_queries(lambda: self.client.get("/tasks?view=summary"))
+        self.assertEqual(len(small), len(large))
+
+    def test_drill_down_loads_one_team(self):
+        response = self.client.get("/tasks/company/Finance/A")
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual((body["department"], body["team"]), ("Finance", "A"))
+        self.assertEqual(len(body["team_tasks"]), self.STAFF_COUNT + 1)
+        self.assertEqual([t["task_id"] for t in body["team_tasks"]["Batch Staff 1"]], [self.shared_id])
+        self.assertEqual(len(body["team_tasks"]["Batch Staff 1"][0]["subtasks"]), 1)
+        self.assertNotIn("Other Dept", body["team_tasks"])
+
+    def test_full_tree_still_available(self):
+        company = self.client.get("/tasks").get_json()["company_tasks"]
+        self.assertEqual(company["Finance"]["A"], self.client.get("/tasks/company/Finance/A").get_json()["team_tasks"])
+        self.assertEqual([t["task_id"] for t in company["IT"]["B"]["Other Dept"]], [self.outsider_task])
+
+    def test_tree_streamed_and_compressed(self):
+        plain = self.client.get("/tasks")
+        self.assertTrue(plain.is_streamed)
+        compressed = self.client.get("/tasks", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(compressed.headers["Content-Encoding"], "gzip")
+        self.assertEqual(json.loads(gzip.decompress(compressed.data)), plain.get_json())
+
+    def test_fragment_failure_is_an_error_status(self):
+        # a team fragment that can't be built fails the view itself, before a 200 could start streaming
+        # (one-character chunks, so nothing past the first chunk is encoded before the response is returned)
+        with patch("tasks.task.top_level_task_rows_by_member", side_effect=RuntimeError("db down")), \
+                patch.object(iter_json, "__defaults__", (1,)):
+            with self.assertRaises(RuntimeError):
+                self.client.get("/tasks", buffered=False)
+            self.login_as(self.staff_ids[0], "staff")
+            with self.assertRaises(RuntimeError):
+                self.client.get("/tasks", buffered=False)
+
+    def test_drill_down_access(self):
+        self.assertEqual(self.client.get("/tasks/company/Finance/Z").status_code, 404)
+        self.login_as(self.staff_ids[0], "staff")
+        self.assertEqual(self.client.get("/tasks/company/Finance/A").status_code, 403)
+        self.login_as(self.outsider_id, "staff", department="HR", team="B")
+        self.assertEqual(self.client.get("/tasks/company/Finance/A").status_code, 200)
+
+
+
+class TestTaskViewCache(TaskBatchTestBase):
+    """Team / company task views come from the scoped cache until a write touches them"""
+
+    def setUp(self):
+        super().setUp()
+        from tasks.task import task_view_cache
+        self.cache = task_view_cache
+        self.cache.clear()
+        self.task_id = self.client.post("/tasks", json=self.task_payload("Cached", self.staff_ids[:2])).get_json()["task_id"]
+        self.login_as(self.outsider_id, "staff", department="IT", team="B")
+        self.other_task = self.client.post("/tasks", json=self.task_payload("Elsewhere", [])).get_json()["task_id"]
+        self.login_as(self.staff_ids[5], "staff")
+
+    def team_task(self, member=0):
+        team_tasks = self.client.get("/tasks").get_json()["team_tasks"]
+        return team_tasks[f"Batch Staff {member}"][0]
+
+    def test_second_reader_hits_cache(self):
+        self.team_task()
+        db.session.expunge_all()
+        self.login_as(self.staff_ids[6], "staff")
+        before = self.cache.snapshot()["hits"]
+        response, sql = self.count_queries(lambda: self.client.get("/tasks"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.cache.snapshot()["hits"], before + 1)
+        # no team task rendering: just the reader's own tasks and the team's departments
+        self.assertFalse(any("task_collaborators.staff_id IN" in s for s in sql))
+        self.assertIn("Batch Staff 5", response.get_json()["team_tasks"])
+        self.assertNotIn("Batch Staff 6", response.get_json()["team_tasks"])
+
+    def test_unknown_team_is_not_cached(self):
+        self.login_as(self.owner_id, "director")
+        for team in ("Nope-1", "Nope-2"):
+            self.assertEqual(self.client.get(f"/tasks/company/Finance/{team}").status_code, 404)
+        self.assertIsNone(self.cache.get(("team", "Finance", "Nope-1")))
+        self.assertEqual(self.cache.snapshot()["entries"], 0)
+
+    def test_task_write_invalidates_its_team_only(self):
+        self.login_as(self.owner_id, "director")
+        self.client.get("/tasks/company/IT/B")
+        self.login_as(self.staff_ids[5], "staff")
+        self.assertEqual(self.team_task()["status"], "unassigned")
+        self.login_as(self.owner_id, "manager")
+        self.client.patch(f"/task/status/{self.task_id}", json={"status": "ongoing"})
+        self.login_as(self.staff_ids[5], "staff")
+        self.assertEqual(self.team_task()["status"], "ongoing")
+        self.assertIsNotNone(self.cache.get(("team", "IT", "B")))
+
+    def test_subtask_and_collaborator_writes_invalidate(self):
+        self.assertEqual(self.team_task()["subtasks"], [])
+        self.login_as(self.owner_id, "manager")
+        response = self.client.put(f"/task/{self.task_id}", json={
+            "collaborators": self.staff_ids[:3],
+            "subtasks": [{"title": "New child", "description": "d", "priority": 3,
+                          "deadline": generate_deadline(5), "owner": self.owner_id}]
+        })
+        self.assertEqual(response.status_code, 200, response.get_data(as_text=True))
+        self.login_as(self.staff_ids[5], "staff")
+        self.assertEqual([t["title"] for t in self.team_task()["subtasks"]], ["New child"])
+        self.assertEqual(self.team_task(member=2)["task_id"], self.task_id)
+
+    def test_staff_write_clears_cache(self):
+        self.team_task()
+        self.assertGreater(self.cache.snapshot()["entries"], 0)
+        db.session.get(Staff, self.staff_ids[0]).employee_name = "Renamed"
+        db.session.commit()
+        self.assertEqual(self.cache.snapshot()["entries"], 0)
+        self.assertIn("Renamed", self.client.get("/tasks").get_json()["team_tasks"])
+
+    def test_write_from_another_process_is_seen(self):
+        from models.view_version import ViewVersion
+        self.assertEqual(self.team_task()["title"], "Cached")
+        # another worker: writes on its own connection, none of this process's hooks run
+        task, versions = Task.__table__, ViewVersion.__table__
+        with db.engine.begin() as conn:
+            conn.execute(task.update().where(task.c.task_id == self.task_id).values(title="Edited elsewhere"))
+            conn.execute(versions.update().values(version=versions.c.version + 1))
+        db.session.expire_all()
+        self.assertEqual(self.team_task()["title"], "Edited elsewhere")
+
+    def test_view_version_bumped_by_relevant_writes_only(self):
+        from models.view_version import TASK_VIEWS, current_view_version
+        before = current_view_version(TASK_VIEWS)
+        staff = db.session.get(Staff, self.staff_ids[0])
+        staff.password = "rehashed"
+        db.session.commit()
+        self.assertEqual(current_view_version(TASK_VIEWS), before)
+        staff.team = "C"
+        db.session.commit()
+        self.assertEqual(current_view_version(TASK_VIEWS), before + 1)
+
+    def test_metrics_endpoint(self):
+        self.team_task()
+        stats = self.client.get("/api/internal/task-view-cache").get_json()["cache"]
+        self.assertEqual(stats["name"], "task-views")
+        self.assertGreater(stats["bytes"], 0)
+        self.assertGreaterEqual(stats["misses"], 1)
+
+
+
+class TestReadModels(TaskBatchTestBase):
+    """GET paths read plain rows: same dicts as Task.to_dict, no identity map, no per-task queries"""
+
+    def create_tree(self, title, n_subtasks=2):
+        response = self.client.post("/tasks", json=self.task_payload(
+            title, self.staff_ids[:3], subtasks=[
+                {"title": f"{title} child {i}", "description": "d", "priority": 3, "deadline": generate_deadline(5),
+                 "owner": self.owner_id, "collaborators": [self.staff_ids[i]]}
+                for i in range(n_subtasks)
+            ]))
+        return response.get_json()["task_id"]
+
+    def test_tree_dicts_match_orm(self):
+        from models.read_models import task_rows, task_tree_dicts
+        ids = [self.create_tree(f"Tree {i}") for i in range(2)]
+        db.session.expunge_all()
+        rows = task_rows(Task.query.filter(Task.task_id.in_(ids)).order_by(Task.task_id))
+        expected = [db.session.get(Task, tid).to_dict() for tid in ids]
+        for d in expected:
+            d["collaborators"].sort()
+            for sub in d["subtasks"]:
+                sub["collaborators"].sort()
+        self.assertEqual(task_tree_dicts(rows), expected)
+
+    def test_my_tasks_constant_queries_and_untracked(self):
+        self.create_tree("Small")
+        db.session.expunge_all()
+        _, small = self.count_queries(lambda: self.client.get("/tasks"))
+        for i in range(4):
+            self.create_tree(f"More {i}", n_subtasks=3)
+        db.session.expunge_all()
+        response, large = self.count_queries(lambda: self.client.get("/tasks"))
+        self.assertEqual(len(response.get_json()["my_tasks"]), 5)
+        self.assertEqual(len(small), len(large))
+        self.assertFalse([obj for obj in db.session.identity_map.values() if isinstance(obj, (Task, Staff))])
+
+    def test_single_task_read(self):
+        task_id = self.create_tree("Single", n_subtasks=0)
+        body = self.client.get(f"/tasks/{task_id}").get_json()
+        self.assertEqual(body["title"], "Single")
+        self.assertEqual(sorted(body["collaborators"]), sorted(self.staff_ids[:3] + [self.owner_id]))
+        self.assertEqual(self.client.get("/tasks/999999").status_code, 404)
+
+
+class TestSubtaskCounters(TaskBatchTestBase):
+    """subtask_count / open_subtasks on the parent follow every subtask write"""
+
+    def create(self, title, n_subtasks=2, **extra):
+        payload = self.task_payload(title, self.staff_ids[:2], subtasks=[
+            {"title": f"{title} {i}", "description": "d", "priority": 3,
+             "deadline": generate_deadline(5), "owner": self.owner_id}
+            for i in range(n_subtasks)
+        ], **extra)
+        response = self.client.post("/tasks", json=payload)
+        self.assertEqual(response.status_code, 201, response.get_data(as_text=True))
+        task_id = response.get_json()["task_id"]
+        return task_id, [t.task_id for t in Task.query.filter_by(parent_id=task_id).order_by(Task.task_id)]
+
+    def counters(self, task_id):
+        db.session.expire_all()
+        task = db.session.get(Task, task_id)
+        return task.subtask_count, task.open_subtasks
+
+    def set_status(self, task_id, status):
+        return self.client.patch(f"/task/status/{task_id}", json={"status": status})
+
+    def test_counters_follow_orm_writes(self):
+        parent, subs = self.create("Parent")
+        other, _ = self.create("Other", n_subtasks=0)
+        self.assertEqual(self.counters(parent), (2, 2))
+        [listed] = [t for t in self.client.get("/tasks").get_json()["my_tasks"] if t["task_id"] == parent]
+        self.assertEqual((listed["subtask_count"], listed["open_subtasks"]), (2, 2))
+
+        self.set_status(subs[0], "done")
+        self.assertEqual(self.counters(parent), (2, 1))
+        self.set_status(subs[0], "ongoing")
+        self.assertEqual(self.counters(parent), (2, 2))
+
+        moved = db.session.get(Task, subs[1])
+        moved.parent_id = other
+        moved.status = "done"
+        db.session.commit()
+        self.assertEqual(self.counters(parent), (1, 1))
+        self.assertEqual(self.counters(other), (1, 0))
+
+        db.session.delete(db.session.get(Task, subs[0]))
+        db.session.commit()
+        self.assertEqual(self.counters(parent), (0, 0))
+
+    def test_loaded_parent_sees_new_counts(self):
+        parent, subs = self.create("Loaded")
+        task = db.session.get(Task, parent)
+        self.assertEqual(task.open_subtasks, 2)
+        db.session.get(Task, subs[0]).status = "done"
+        db.session.flush()
+        self.assertEqual(task.open_subtasks, 1)
+        db.session.rollback()
+        self.assertEqual(task.open_subtasks, 2)
+
+    def test_done_check_does_not_load_subtasks(self):
+        parent, subs = self.create("Check", n_subtasks=3)
+        self.assertEqual(self.set_status(parent, "done").status_code, 400)
+        for sid in subs:
+            self.set_status(sid, "done")
+        db.session.expunge_all()
+        response, sql = self.count_queries(lambda: self.set_status(parent, "done"))
+        self.assertEqual(response.status_code, 200, response.get_data(as_text=True))
+        self.assertFalse([q for q in sql if "task.parent_id IN" in q or "task.parent_id =" in q])
+
+    def test_bulk_and_core_writes_recount(self):
+        parent, subs = self.create("Bulk", n_subtasks=3)
+        other, _ = self.create("Target", n_subtasks=0)
+        Task.query.filter(Task.task_id.in_(subs[:2])).update({"status": "done"})
+        db.session.commit()
+        self.assertEqual(self.counters(parent), (3, 1))
+
+        Task.query.filter_by(task_id=subs[2]).update({"parent_id": other})
+        db.session.commit()
+        self.assertEqual(self.counters(parent), (2, 0))
+        self.assertEqual(self.counters(other), (1, 1))
+
+        db.session.execute(Task.__table__.delete().where(Task.__table__.c.task_id == subs[0]))
+        db.session.commit()
+        self.assertEqual(self.counters(parent), (1, 0))
+
+    def test_bulk_write_of_other_columns_is_not_recounted(self):
+        parent, subs = self.create("Untouched")
+        _, sql = self.count_queries(lambda: Task.query.filter(Task.task_id.in_(subs)).update({"priority": 9}))
+        db.session.commit()
+        self.assertEqual(len(sql), 1)
+        self.assertEqual(self.counters(parent), (2, 2))
+
+    def test_executemany_touches_only_its_parents(self):
+        parent, subs = self.create("Many")
+        other, other_subs = self.create("Bystander")
+        table = Task.__table__
+        _, sql = self.count_queries(lambda: db.session.execute(
+            table.update().where(table.c.task_id == bindparam("b_id")).values(status="done"),
+            [{"b_id": sid} for sid in subs]))
+        db.session.commit()
+        self.assertEqual(self.counters(parent), (2, 0))
+        self.assertEqual(self.counters(other), (2, 2))
+        # the counter update names the one parent, never the whole table
+        counter_updates = [q for q in sql if q.lstrip().upper().startswith("UPDATE") and "subtask_count" in q]
+        self.assertEqual(len(counter_updates), 1)
+        self.assertIn("WHERE task.task_id = ?", counter_updates[0])
+
+    def test_batch_counts_subtasks_changed_in_same_batch(self):
+        parent, subs = self.create("Batch")
+        for sid in subs:
+            self.set_status(sid, "done")
+        response = self.client.patch("/tasks/status", json=[
+            {"task_id": parent, "status": "done"}, {"task_id": subs[0], "status": "ongoing"}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.counters(parent), (2, 0))
+
+    def test_core_inserts_set_counters(self):
+        items = [self.task_payload("Imported", self.staff_ids[:2], subtasks=[
+            {"title": f"Imported {i}", "description": "d", "priority": 2,
+             "deadline": generate_deadline(5), "owner": self.staff_ids[0]}
+            for i in range(3)
+        ])]
+        created = self.client.post("/tasks/bulk", json=items).get_json()["created"][0]
+        self.assertEqual(self.counters(created["task_id"]), (3, 3))
+
+        parent, subs = self.create("Series", recurrence=7)
+        for sid in subs:
+            self.set_status(sid, "done")
+        self.assertEqual(self.set_status(parent, "done").status_code, 200)
+        [occurrence] = Task.query.filter_by(recurs_from_id=parent).all()
+        self.assertEqual(self.counters(occurrence.task_id), (2, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+# backend/tests/test_view_cache.py
+import os
+import unittest
+
+# Set testing environment
+os.environ['TESTING'] = 'true'
+
+from common.view_cache import ScopedCache, EVERYTHING
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestScopedCache(unittest.TestCase):
+    """LRU / byte bounds, expiry and targeted invalidation"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = ScopedCache("views", max_bytes=10, max_entries=3, ttl=30, clock=self.clock)
+
+    def put(self, scope, value, task_ids=(), staff_ids=()):
+        return self.cache.get_or_build(scope, lambda: (value, task_ids, staff_ids))
+
+    def test_hit_and_miss_counters(self):
+        self.assertEqual(self.put("a", "xx"), "xx")
+        self.assertEqual(self.put("a", "yy"), "xx")
+        stats = self.cache.snapshot()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"], stats["bytes"]), (1, 1, 1, 2))
+        self.assertEqual(stats["hit_ratio"], 0.5)
+
+    def test_least_recently_used_evicted_by_count_and_bytes(self):
+        self.put("a", "1")
+        self.put("b", "2")
+        self.put("c", "3")
+        self.cache.get("a")
+        self.put("d", "4")
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.get("a"), "1")
+
+        # 8 more bytes pushes the total to 11, so the oldest entry ("c") goes
+        self.put("e", "12345678")
+        self.assertEqual(self.cache.snapshot()["bytes"], 10)
+        self.assertIsNone(self.cache.get("c"))
+        self.assertEqual(self.cache.get("e"), "12345678")
+        self.assertEqual(self.cache.snapshot()["evictions"], 2)
+
+        # bigger than the whole cache: served, never stored
+        self.put("huge", "x" * 11)
+        self.assertIsNone(self.cache.get("huge"))
+
+    def test_empty_values_are_not_stored(self):
+        for scope in range(5):
+            self.assertEqual(self.put(scope, []), [])
+        stats = self.cache.snapshot()
+        self.assertEqual((stats["entries"], stats["evictions"]), (0, 0))
+
+    def test_entries_expire(self):
+        self.put("a", "1")
+        self.clock.now += 31
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.snapshot()["entries"], 0)
+
+    def test_invalidate_drops_only_dependent_entries(self):
+        self.put("team-1", "a", task_ids={1, 2}, staff_ids={10})
+        self.put("team-2", "b", task_ids={3}, staff_ids={20})
+        self.put("company", "c", task_ids=EVERYTHING)
+        self.assertEqual(self.cache.invalidate(task_ids={2}), 2)
+        self.assertIsNone(self.cache.get("team-1"))
+        self.assertIsNone(self.cache.get("company"))
+        self.assertEqual(self.cache.get("team-2"), "b")
+        self.assertEqual(self.cache.invalidate(staff_ids={20}), 1)
+        self.assertEqual(self.cache.snapshot()["invalidations"], 3)
+
+    def test_build_racing_an_invalidation_is_not_stored(self):
+        def build():
+            self.cache.invalidate(task_ids={1})
+            return "stale", {1}, ()
+
+        self.assertEqual(self.cache.get_or_build("a", build), "stale")
+        self.assertIsNone(self.cache.get("a"))
+
+
+    def test_sync_drops_everything_when_version_moves(self):
+        self.cache.sync(1)
+        self.put("a", "1")
+        self.cache.sync(1)
+        self.assertEqual(self.cache.get("a"), "1")
+        # our own write took the version 1 -> 2: nothing else changed
+        self.cache.advance(1, 2)
+        self.cache.sync(2)
+        self.assertEqual(self.cache.get("a"), "1")
+        # someone else's write
+        self.cache.sync(3)
+        self.assertIsNone(self.cache.get("a"))
+        # a stale advance (another bump came in between) is ignored
+        self.cache.advance(1, 2)
+        self.assertEqual(self.cache.snapshot()["version"], 3)
+
+if __name__ == '__main__':
+    unittest.main()